@@ -0,0 +1,80 @@
+"""Benchmark of OutsideGraph.find_closest_node.
+
+:Date: 18/10/2026
+:Description: Compare the spatial index with the previous linear scan (one geodesic distance per
+node) on random positions around Solbosch. Run it from the root of the repository:
+``python benchmarks/bench_closest_node.py``.
+"""
+
+import random
+import sys
+import time
+
+sys.path.insert(0, "src")
+
+import geopy.distance  # noqa: E402
+
+from Graph import ONodeAttributes, OutsideGraph  # noqa: E402
+from Graph.spatial import haversine  # noqa: E402
+from utils.constants import OUTSIDE_DATA_DIR  # noqa: E402
+
+
+def linear_scan(graph: OutsideGraph, position: tuple) -> str:
+    """Previous implementation: scan every node and stop at the first one within 5 meters."""
+    distance_min = float("inf")
+    closest_node = ""
+    for node in graph.nodes():
+        lat_n = graph.nodes[node][ONodeAttributes.LATITUDE]
+        long_n = graph.nodes[node][ONodeAttributes.LONGITUDE]
+        distance = round(geopy.distance.geodesic(position, (lat_n, long_n)).m)
+        if distance <= 5:
+            return node
+        if distance < distance_min:
+            distance_min = distance
+            closest_node = node
+    return closest_node
+
+
+def exact_scan(graph: OutsideGraph, position: tuple) -> str:
+    """Exact nearest node by haversine distance, used to check the index."""
+    return min(graph.nodes, key=lambda node: haversine(*position, *graph.get_lat_long(node)))
+
+
+def random_positions(graph: OutsideGraph, n: int, seed: int = 0) -> list:
+    """Random positions in the bounding box of the graph (with a small margin)."""
+    rng = random.Random(seed)
+    lats = [graph.get_lat_long(node)[0] for node in graph.nodes]
+    longs = [graph.get_lat_long(node)[1] for node in graph.nodes]
+    return [
+        (
+            rng.uniform(min(lats) - 0.002, max(lats) + 0.002),
+            rng.uniform(min(longs) - 0.002, max(longs) + 0.002),
+        )
+        for _ in range(n)
+    ]
+
+
+def timeit(func, positions: list) -> float:
+    """Mean time of a query in microseconds."""
+    start = time.perf_counter()
+    for position in positions:
+        func(position)
+    return (time.perf_counter() - start) / len(positions) * 1e6
+
+
+def main(n: int = 500) -> None:
+    graph = OutsideGraph(f"{OUTSIDE_DATA_DIR}solbosch_map_updated.json")
+    positions = random_positions(graph, n)
+    mismatches = sum(graph.find_closest_node(p) != exact_scan(graph, p) for p in positions)
+    scan = timeit(lambda p: linear_scan(graph, p), positions)
+    index = timeit(graph.find_closest_node, positions)
+    k_index = timeit(lambda p: graph.find_closest_nodes(p, 5), positions)
+    print(f"{graph.number_of_nodes()} nodes, {n} queries")
+    print(f"linear geodesic scan : {scan:10.1f} us/query")
+    print(f"spatial index        : {index:10.1f} us/query (x{scan / index:.0f})")
+    print(f"spatial index (k=5)  : {k_index:10.1f} us/query")
+    print(f"mismatches with the exact nearest node: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
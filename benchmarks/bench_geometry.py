@@ -0,0 +1,72 @@
+"""Benchmark of the size and the encoding time of the outside paths (see Analyse/geometry.py).
+
+:Date: 18/10/2026
+:Description: On the Solbosch outside graph and on a synthetic outside map of 100k nodes (see
+utils/generate_plans.py), take the longest of random routes, and report for each encoding
+(coordinates, polyline, deltas) and tolerance of the simplification the number of points, the
+size of the json payload of the path and the time to simplify and encode it. Run it from the root
+of the repository: ``python benchmarks/bench_geometry.py``.
+"""
+
+import json
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, "src")
+
+from Analyse import OPathAnalyzer  # noqa: E402
+from Analyse.geometry import DELTAS, ENCODINGS, decode_deltas, encode  # noqa: E402
+from dijkstra import Dijkstra  # noqa: E402
+from Graph import OutsideGraph  # noqa: E402
+from utils.constants import OUTSIDE_DATA_DIR  # noqa: E402
+from utils.generate_plans import generate_outside  # noqa: E402
+
+TOLERANCES = [0, 1, 5, 20]  # In metres
+N_ROUTES = 20  # Random routes, the longest ones are kept
+N_LONGEST = 5
+
+
+def get_long_paths(graph: OutsideGraph, seed: int = 0) -> list:
+    """The longest (in number of nodes) of random routes of the graph."""
+    rng = random.Random(seed)
+    nodes = list(graph.nodes)
+    d = Dijkstra(graph, astar=True)
+    paths = [d.dijkstra(*rng.sample(nodes, 2))[1] for _ in range(N_ROUTES)]
+    return sorted(paths, key=len)[-N_LONGEST:]
+
+
+def measure(graph: OutsideGraph, name: str) -> None:
+    points = [OPathAnalyzer(graph, path).analyse() for path in get_long_paths(graph)]
+    n_points = sum(len(path) for path in points) / len(points)
+    print(f"{name}: {len(graph)} nodes, routes of {n_points:.0f} nodes")
+    print(f"{'encoding':<14}{'tolerance':>10}{'points':>9}{'bytes':>9}{'ratio':>8}{'time':>11}")
+    reference = None
+    for encoding in ENCODINGS:
+        for tolerance in TOLERANCES:
+            start = time.perf_counter()
+            encoded = [encode(path, encoding, tolerance) for path in points]
+            elapsed = (time.perf_counter() - start) / len(points)
+            size = sum(len(json.dumps(path, separators=(",", ":"))) for path in encoded)
+            size /= len(encoded)
+            reference = reference or size
+            kept = [
+                len(decode_deltas(encode(path, DELTAS, tolerance))) for path in points
+            ]  # Number of points after the simplification
+            print(
+                f"{encoding:<14}{tolerance:>8}m{sum(kept) / len(kept):>9.0f}{size:>9.0f}"
+                f"{size / reference:>8.2f}{elapsed * 1e6:>9.0f}us"
+            )
+
+
+def main() -> None:
+    measure(OutsideGraph(f"{OUTSIDE_DATA_DIR}solbosch_map_updated.json"), "Solbosch")
+    with tempfile.NamedTemporaryFile("w", suffix=".json") as f:
+        json.dump({"synthetic": generate_outside(100000, {})}, f)
+        f.flush()
+        measure(OutsideGraph(f.name), "synthetic")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Benchmark of the contraction hierarchy of the outside graph.
+
+:Date: 18/10/2026
+:Description: Compare the queries of the contraction hierarchy (Dijkstra(graph, hierarchy=True))
+with the plain, A* and bidirectional Dijkstra searches on random pairs of nodes of the outside
+graph: number of expanded nodes and time per query. The hierarchy is loaded from its file (see
+``make hierarchy``) or built if it is missing. Run it from the root of the repository:
+``python benchmarks/bench_hierarchy.py``.
+"""
+
+import random
+import sys
+import time
+
+sys.path.insert(0, "src")
+
+from dijkstra import Dijkstra  # noqa: E402
+from Graph import OutsideGraph  # noqa: E402
+from utils.constants import OUTSIDE_DATA_DIR  # noqa: E402
+
+MODES = {
+    "dijkstra": {},
+    "A*": {"astar": True},
+    "bidirectional": {"bidirectional": True},
+    "hierarchy": {"hierarchy": True},
+}
+
+
+def run(graph: OutsideGraph, pairs: list, **options) -> tuple:
+    """Mean number of expanded nodes and mean time (us) of a query."""
+    d = Dijkstra(graph, **options)
+    settled = 0
+    start = time.perf_counter()
+    for source, target in pairs:
+        d.dijkstra(source, target)
+        settled += d.settled
+    elapsed = time.perf_counter() - start
+    return settled / len(pairs), elapsed / len(pairs) * 1e6
+
+
+def main(n: int = 5000, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    path = f"{OUTSIDE_DATA_DIR}solbosch_map_updated.json"
+    graph = OutsideGraph(path)
+    if not graph.load_hierarchy(path):
+        start = time.perf_counter()
+        graph.save_hierarchy(path)
+        print(f"hierarchy built in {time.perf_counter() - start:.3f}s")
+    print(
+        f"{graph.name}: {len(graph)} nodes, {graph.compiled.n_edges} edges, "
+        f"{graph.hierarchy.n_shortcuts} shortcuts"
+    )
+    nodes = list(graph.nodes)
+    pairs = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(n)]
+    print(f"{'mode':<15}{'nodes':>10}{'time':>10}")
+    for mode, options in MODES.items():
+        settled, elapsed = run(graph, pairs, **options)
+        print(f"{mode:<15}{settled:>10.1f}{elapsed:>8.0f}us")
+
+
+if __name__ == "__main__":
+    main()
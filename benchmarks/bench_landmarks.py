@@ -0,0 +1,61 @@
+"""Benchmark of the landmark (ALT) lower bounds of the building graphs.
+
+:Date: 18/10/2026
+:Description: For each building, report its landmarks, the memory of their distance tables and
+the time to compute them, then compare on random pairs of nodes the plain Dijkstra search, the A*
+search with the floor aware bound only (no landmarks) and the A* search with the floor aware and
+the landmark bounds: number of expanded nodes and time per query. Run it from the root of the
+repository: ``python benchmarks/bench_landmarks.py``.
+"""
+
+import random
+import sys
+import time
+
+sys.path.insert(0, "src")
+
+from dijkstra import Dijkstra  # noqa: E402
+from Graph import BuildingGraph  # noqa: E402
+from utils.constants import BUILDINGS_DATA_DIR  # noqa: E402
+
+
+def run(graph: BuildingGraph, pairs: list, **options) -> tuple:
+    """Mean number of expanded nodes and mean time (us) of a query."""
+    d = Dijkstra(graph, **options)
+    settled = 0
+    start = time.perf_counter()
+    for source, target in pairs:
+        d.dijkstra(source, target)
+        settled += d.settled
+    elapsed = time.perf_counter() - start
+    return settled / len(pairs), elapsed / len(pairs) * 1e6
+
+
+def main(n: int = 2000, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    print(
+        f"{'building':<10}{'nodes':>7}{'landmarks':>11}{'table':>10}{'build':>9}"
+        f"{'dijkstra':>22}{'A* floors':>22}{'A* floors+ALT':>22}"
+    )
+    for building in ("P1", "S"):
+        graph = BuildingGraph(f"{BUILDINGS_DATA_DIR}{building}/{building}.json")
+        compiled = graph.compiled
+        start = time.perf_counter()
+        graph.select_landmarks(compiled, graph.N_LANDMARKS)
+        build = (time.perf_counter() - start) * 1e3
+        n_landmarks = len(graph.landmarks)
+        table = graph.from_landmarks.itemsize * len(graph.from_landmarks) * 2
+        nodes = list(compiled.ids)
+        pairs = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(n)]
+        results = [run(graph, pairs), run(graph, pairs, astar=True)]
+        graph.select_landmarks(compiled, 0)  # Floor aware bound only
+        results.insert(1, run(graph, pairs, astar=True))
+        print(
+            f"{building:<10}{len(nodes):>7}{n_landmarks:>11}"
+            f"{table / 1024:>7.1f} kB{build:>7.1f}ms"
+            + "".join(f"{settled:>10.1f} nodes {time:>5.0f}us" for settled, time in results)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Scaling curves of the routing on synthetic plans (see utils/generate_plans.py).
+
+:Date: 18/10/2026
+:Description: For buildings and outside maps from about 1k to 100k nodes, report the time to load
+the graph from its json file and from its snapshot, the memory of its arrays (Graph.nbytes) and
+the mean time and number of settled nodes of a query between random nodes with the plain, A* and
+bidirectional searches. The plans are written in a temporary directory. Run it from the root of
+the repository: ``python benchmarks/bench_scaling.py``.
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, "src")
+
+from dijkstra import Dijkstra  # noqa: E402
+from Graph import BuildingGraph, Graph, OutsideGraph  # noqa: E402
+from utils.generate_plans import (  # noqa: E402
+    generate_building,
+    generate_outside,
+    get_entrance_positions,
+)
+
+# (floors, rooms per floor) of the buildings and number of roads of the outside maps
+BUILDINGS = [(5, 130), (10, 650), (40, 1650)]
+ROADS = [1000, 10000, 100000]
+
+
+def run(graph: Graph, pairs: list, **options) -> tuple:
+    """Mean number of expanded nodes and mean time (us) of a query."""
+    d = Dijkstra(graph, **options)
+    settled = 0
+    start = time.perf_counter()
+    for source, target in pairs:
+        d.dijkstra(source, target)
+        settled += d.settled
+    elapsed = time.perf_counter() - start
+    return settled / len(pairs), elapsed / len(pairs) * 1e6
+
+
+def measure(graph_class: type, path: str, n_pairs: int, rng: random.Random) -> str:
+    """Load the graph from its json file then from its snapshot and time queries on it."""
+    start = time.perf_counter()
+    graph: Graph = graph_class(path)
+    graph.get_compiled()
+    json_time = time.perf_counter() - start
+    graph.save_snapshot(path)
+    start = time.perf_counter()
+    graph = graph_class(path)
+    snapshot_time = time.perf_counter() - start
+    nodes = list(graph.nodes)
+    pairs = [tuple(rng.sample(nodes, 2)) for _ in range(n_pairs)]
+    line = f"{len(graph):>8}{json_time:>9.2f}s{snapshot_time:>9.3f}s{graph.nbytes() / 2**20:>8.1f}MB"
+    for options in ({}, {"astar": True}, {"bidirectional": True}):
+        settled, elapsed = run(graph, pairs, **options)
+        line += f"{settled:>10.0f}{elapsed:>10.0f}us"
+    return line
+
+
+def main(n_pairs: int = 100, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    header = f"{'nodes':>8}{'json':>10}{'snapshot':>10}{'memory':>10}"
+    for search in ("dijkstra", "A*", "bidirectional"):
+        header += f"{search:>22}"
+    with tempfile.TemporaryDirectory() as directory:
+        print("buildings")
+        print(header)
+        buildings = {}
+        for i, (n_floors, n_rooms) in enumerate(BUILDINGS):
+            name = f"X{i + 1}"
+            buildings[name] = generate_building(name, n_floors, n_rooms)
+            path = os.path.join(directory, f"{name}.json")
+            with open(path, "w") as f:
+                json.dump(buildings[name], f)
+            print(measure(BuildingGraph, path, n_pairs, rng))
+        print("outside")
+        print(header)
+        entrances = get_entrance_positions(buildings, seed=seed)
+        for n_roads in ROADS:
+            path = os.path.join(directory, f"map_{n_roads}.json")
+            with open(path, "w") as f:
+                json.dump({"synthetic": generate_outside(n_roads, entrances, seed=seed)}, f)
+            print(measure(OutsideGraph, path, n_pairs, rng))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Benchmark of the searches of Dijkstra.
+
+:Date: 18/10/2026
+:Description: Compare the plain Dijkstra search with the A* search (Dijkstra(graph, astar=True))
+and the bidirectional search (Dijkstra(graph, bidirectional=True)) on random pairs of nodes of
+each graph, and of the campus graph linking P1 to S through the outside graph: number of expanded
+nodes and time per query. Run it from
+the root of the repository: ``python benchmarks/bench_search.py``.
+"""
+
+import random
+import sys
+import time
+
+sys.path.insert(0, "src")
+
+from dijkstra import Dijkstra  # noqa: E402
+from Graph import BuildingGraph, CampusGraph, Graph, OutsideGraph  # noqa: E402
+from utils.constants import BUILDINGS_DATA_DIR, OUTSIDE_DATA_DIR  # noqa: E402
+
+
+def run(graph: Graph, pairs: list, **options) -> tuple:
+    """Mean number of expanded nodes and mean time (us) of a query."""
+    d = Dijkstra(graph, **options)
+    settled = 0
+    start = time.perf_counter()
+    for source, target in pairs:
+        d.dijkstra(source, target)
+        settled += d.settled
+    elapsed = time.perf_counter() - start
+    return settled / len(pairs), elapsed / len(pairs) * 1e6
+
+
+def main(n: int = 2000, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    graphs = [BuildingGraph(f"{BUILDINGS_DATA_DIR}{b}/{b}.json") for b in ("P1", "S")]
+    outside = OutsideGraph(f"{OUTSIDE_DATA_DIR}solbosch_map_updated.json")
+    campus = CampusGraph(outside, {"P1": graphs[0], "S": graphs[1]})
+    graphs.append(outside)
+    print(f"{'graph':<22}{'nodes':>7}{'dijkstra':>22}{'A*':>22}{'bidirectional':>22}")
+    for graph in [*graphs, campus]:
+        nodes = list(graph.compiled.ids)
+        pairs = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(n)]
+        if graph is campus:  # Long routes: from a room of P1 to a room of S
+            pairs = [
+                (("P1", rng.choice(graphs[0].get_rooms())), ("S", rng.choice(graphs[1].get_rooms())))
+                for _ in range(n)
+            ]
+        blocked = campus.get_blocked(["P1"], ["S"]) if graph is campus else []
+        results = [
+            run(graph, pairs, blocked=blocked),
+            run(graph, pairs, astar=True, blocked=blocked),
+            run(graph, pairs, bidirectional=True, blocked=blocked),
+        ]
+        print(
+            f"{graph.name:<22}{len(nodes):>7}"
+            + "".join(f"{settled:>10.1f} nodes {time:>5.0f}us" for settled, time in results)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark of the time to first byte of the streaming endpoints.
+
+:Date: 18/10/2026
+:Description: For routes between the rooms of P1 and S and routes from positions around the
+campus, compare the time to the response of /api/ask and /api/ask_from_inside with the time to
+the first line and to the last line of their streaming variants (NDJSON), without the route
+cache. The endpoints are called directly (the TestClient of FastAPI reads the whole body of a
+stream before returning it). Run it from the root of the repository:
+``python benchmarks/bench_streaming.py``.
+"""
+
+import asyncio
+import random
+import sys
+import time
+
+sys.path.insert(0, "src")
+
+import main  # noqa: E402
+
+N_ROUTES = 100
+
+
+def get_requests(seed: int = 0) -> dict:
+    """Requests of the endpoints whose route the analyzers can translate."""
+    rng = random.Random(seed)
+    rooms = [
+        name
+        for building in ("P1", "S")
+        for _, name, _ in main.BuildingGraph.read_rooms(main.graphs.get_path(building))
+    ]
+    requests = {"ask": [], "ask_from_inside": []}
+    while len(requests["ask_from_inside"]) < N_ROUTES:
+        start, arrival = rng.sample(rooms, 2)
+        if main.get_building_name(start) == main.get_building_name(arrival):
+            continue
+        try:
+            main.compute_route_from_inside(start, arrival)
+        except (AssertionError, KeyError, ValueError):  # Rooms the plans do not handle
+            continue
+        requests["ask_from_inside"].append({"start": start, "arrival": arrival})
+        position = [50.8125 + rng.uniform(-0.002, 0.002), 4.382 + rng.uniform(-0.003, 0.003)]
+        requests["ask"].append({"start": position, "arrival": arrival})
+    return requests
+
+
+async def measure(endpoint: str, requests: list) -> tuple:
+    """Mean time (ms) to the response, and to the first and the last line of the stream."""
+    handler, stream_handler = getattr(main, endpoint), getattr(main, f"{endpoint}_stream")
+    model = main.PathRequest if endpoint == "ask" else main.PathRequestFromInside
+    total = first = last = 0.0
+    for request in requests:
+        main.route_cache.clear()
+        start = time.perf_counter()
+        await handler(model(**request))
+        total += time.perf_counter() - start
+        main.route_cache.clear()
+        start = time.perf_counter()
+        response = await stream_handler(model(**request))
+        lines = response.body_iterator
+        await lines.__anext__()
+        first += time.perf_counter() - start
+        async for _ in lines:
+            pass
+        last += time.perf_counter() - start
+    return tuple(value / len(requests) * 1e3 for value in (total, first, last))
+
+
+def main_bench() -> None:
+    requests = get_requests()
+    print(f"{'endpoint':<18}{'response':>12}{'first line':>12}{'last line':>12}")
+    for endpoint, endpoint_requests in requests.items():
+        asyncio.run(measure(endpoint, endpoint_requests[:10]))  # Warm up
+        total, first, last = asyncio.run(measure(endpoint, endpoint_requests))
+        print(f"{endpoint:<18}{total:>10.2f}ms{first:>10.2f}ms{last:>10.2f}ms")
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,81 @@
+"""Benchmark of the compiler of the weights of the outside map.
+
+:Date: 18/10/2026
+:Description: On the Solbosch map copied side by side to reach larger sizes, compare the previous
+compiler (one geopy geodesic call per edge) with the vectorised Vincenty and haversine passes,
+then time an incremental run after moving one node. Run it from the root of the repository:
+``python benchmarks/bench_update_weights.py``.
+"""
+
+import copy
+import json
+import sys
+import time
+
+import geopy.distance
+
+sys.path.insert(0, "src")
+
+from utils.update_weigths import (  # noqa: E402
+    HAVERSINE,
+    INPUT_PATH,
+    MAP,
+    VINCENTY,
+    compile_weights,
+)
+
+
+def get_map(copies: int) -> list:
+    """The Solbosch map copied side by side, about 50 m apart in longitude."""
+    with open(INPUT_PATH) as f:
+        base = json.load(f)[MAP]
+    nodes = []
+    for k in range(copies):
+        for node in copy.deepcopy(base):
+            node["id"] = f"{node['id']}_{k}"
+            node["longitude"] += 0.02 * k
+            for neighbor in node["neighbors"]:
+                neighbor["id"] = f"{neighbor['id']}_{k}"
+            nodes.append(node)
+    return nodes
+
+
+def geopy_weights(nodes: list) -> None:
+    """The previous compiler: one geodesic call per edge."""
+    coordinates = {node["id"]: (node["latitude"], node["longitude"]) for node in nodes}
+    for node in nodes:
+        for neighbor in node["neighbors"]:
+            distance = geopy.distance.geodesic(coordinates[node["id"]], coordinates[neighbor["id"]])
+            neighbor["weight"] = round(distance.m)
+
+
+def timed(function, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    print(
+        f"{'edges':>8}{'geopy':>10}{'vincenty':>10}{'haversine':>11}{'incremental':>13}"
+        f"{'speedup':>9}"
+    )
+    for copies in (1, 10, 100):
+        nodes = get_map(copies)
+        n_edges = sum(len(node["neighbors"]) for node in nodes)
+        geopy_time = timed(geopy_weights, copy.deepcopy(nodes))
+        vincenty_time = timed(compile_weights, copy.deepcopy(nodes), method=VINCENTY)
+        haversine_time = timed(compile_weights, copy.deepcopy(nodes), method=HAVERSINE)
+        previous = copy.deepcopy(nodes)
+        compile_weights(previous)
+        nodes[0]["latitude"] += 0.0001
+        incremental_time = timed(compile_weights, nodes, previous)
+        print(
+            f"{n_edges:>8}{geopy_time * 1e3:>8.1f}ms{vincenty_time * 1e3:>8.1f}ms"
+            f"{haversine_time * 1e3:>9.1f}ms{incremental_time * 1e3:>11.1f}ms"
+            f"{geopy_time / vincenty_time:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark of the throughput of the route pool (see utils/workers.py).
+
+:Date: 18/10/2026
+:Description: Compute the responses of /api/ask_from_inside for random pairs of rooms of P1 and S
+(same building and different buildings, no route cache) with the threads of the API process and
+with 1, 2 and 4 worker processes, and report the routes per second. The workers are started and
+warmed up before the timing. The speedup of the processes is bounded by the number of cores.
+Run it from the root of the repository: ``python benchmarks/bench_workers.py``.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+sys.path.insert(0, "src")
+
+import main  # noqa: E402
+from utils.workers import RoutePool  # noqa: E402
+
+N_ROUTES = 400
+WORKERS = [1, 2, 4]
+
+
+def get_pairs(n: int, seed: int = 0) -> list:
+    """Random pairs of room names whose route the analyzers can translate."""
+    rng = random.Random(seed)
+    rooms = [
+        name
+        for building in ("P1", "S")
+        for _, name, _ in main.BuildingGraph.read_rooms(main.graphs.get_path(building))
+    ]
+    pairs = []
+    while len(pairs) < n:
+        pair = tuple(rng.sample(rooms, 2))
+        try:
+            main.compute_route_from_inside(*pair)
+        except (AssertionError, KeyError, ValueError):  # Rooms the plans do not handle
+            continue
+        pairs.append(pair)
+    return pairs
+
+
+async def run(pool: RoutePool, pairs: list, in_process: bool) -> float:
+    """Compute the routes of the pairs concurrently, return the routes per second."""
+    start = time.perf_counter()
+    if in_process:
+        tasks = [pool.run(main.compute_route_from_inside, *pair) for pair in pairs]
+    else:
+        tasks = [
+            pool.run(main.run_route_task, main.compute_route_from_inside, pair, {})
+            for pair in pairs
+        ]
+    await asyncio.gather(*tasks)
+    return len(pairs) / (time.perf_counter() - start)
+
+
+def measure(pool: RoutePool, pairs: list, in_process: bool) -> float:
+    asyncio.run(run(pool, pairs[: pool.n_workers * 4], in_process))  # Warm up the workers
+    throughput = asyncio.run(run(pool, pairs, in_process))
+    pool.shutdown()
+    return throughput
+
+
+def main_bench() -> None:
+    pairs = get_pairs(N_ROUTES)
+    print(f"{os.cpu_count()} cores")
+    print(f"{'executor':<12}{'workers':>8}{'routes/s':>12}{'speedup':>10}")
+    threads = main.ROUTE_THREADS
+    pool = RoutePool(ThreadPoolExecutor(threads), threads, len(pairs), None)
+    reference = measure(pool, pairs, in_process=True)
+    print(f"{'threads':<12}{threads:>8}{reference:>12.0f}{1:>10.2f}")
+    context = multiprocessing.get_context("spawn")
+    for n_workers in WORKERS:
+        executor = ProcessPoolExecutor(n_workers, mp_context=context, initializer=main.init_worker)
+        throughput = measure(RoutePool(executor, n_workers, len(pairs), None), pairs, False)
+        print(f"{'processes':<12}{n_workers:>8}{throughput:>12.0f}{throughput / reference:>10.2f}")
+
+
+if __name__ == "__main__":
+    main_bench()
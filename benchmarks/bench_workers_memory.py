@@ -0,0 +1,73 @@
+"""Benchmark of the memory of the worker processes.
+
+:Date: 18/10/2026
+:Description: Start 1, 4 and 16 processes that load the graphs (from their snapshots, see
+``make snapshots``) and run some queries, like uvicorn workers would, and report the memory of a
+worker: its proportional set size (PSS, shared pages divided by the number of processes sharing
+them) and the part of it that comes from the memory mapped snapshots. Linux only (it reads
+/proc/self/smaps). Run it from the root of the repository:
+``python benchmarks/bench_workers_memory.py``.
+"""
+
+import multiprocessing
+import os
+import random
+import sys
+
+sys.path.insert(0, "src")
+
+from dijkstra import Dijkstra  # noqa: E402
+from Graph import BuildingGraph, OutsideGraph  # noqa: E402
+from Graph.snapshot import EXTENSION  # noqa: E402
+from utils.constants import BUILDINGS_DATA_DIR, OUTSIDE_DATA_DIR  # noqa: E402
+
+
+def get_memory() -> dict:
+    """PSS of the process and of its snapshot mappings in kB."""
+    memory = {"pss": 0, "snapshots": 0}
+    mapping = ""
+    with open("/proc/self/smaps") as f:
+        for line in f:
+            fields = line.split()
+            if not fields[0].endswith(":"):  # Header line of a mapping
+                mapping = fields[5] if len(fields) > 5 else ""
+            elif fields[0] == "Pss:":
+                memory["pss"] += int(fields[1])
+                if mapping.endswith(EXTENSION):
+                    memory["snapshots"] += int(fields[1])
+    return memory
+
+
+def worker(barrier, results, seed: int) -> None:
+    sys.stdout = open(os.devnull, "w")  # Silence the logs of the graphs
+    rng = random.Random(seed)
+    graphs = [BuildingGraph(f"{BUILDINGS_DATA_DIR}{b}/{b}.json") for b in ("P1", "S")]
+    graphs.append(OutsideGraph(f"{OUTSIDE_DATA_DIR}solbosch_map_updated.json"))
+    for graph in graphs:
+        nodes = list(graph.nodes)
+        d = Dijkstra(graph, astar=True)
+        for _ in range(200):
+            d.dijkstra(rng.choice(nodes), rng.choice(nodes))
+    barrier.wait()  # Every worker has mapped the snapshots when the memory is measured
+    results.put(get_memory())
+    barrier.wait()
+
+
+def main() -> None:
+    context = multiprocessing.get_context("spawn")  # Like uvicorn, no memory inherited by fork
+    print(f"{'workers':>8}{'PSS / worker':>16}{'snapshots / worker':>22}")
+    for n in (1, 4, 16):
+        barrier, results = context.Barrier(n), context.Queue()
+        processes = [context.Process(target=worker, args=(barrier, results, i)) for i in range(n)]
+        for process in processes:
+            process.start()
+        memories = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        pss = sum(memory["pss"] for memory in memories) / n
+        snapshots = sum(memory["snapshots"] for memory in memories) / n
+        print(f"{n:>8}{pss:>13.0f} kB{snapshots:>19.1f} kB")
+
+
+if __name__ == "__main__":
+    main()
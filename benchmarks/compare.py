@@ -0,0 +1,82 @@
+"""Comparison of the results of the benchmark suite with a baseline.
+
+:Date: 18/10/2026
+:Description: The results of the suite (see conftest.py) are saved in a json file. A benchmark has
+regressed when both its median and its minimum time are more than threshold (relative) above the
+ones of the baseline: a single slow round (noise of a shared machine) does not fail the gate.
+It is used by the suite (--bench-compare) and can be run on two result files: ``python
+benchmarks/compare.py baseline.json results.json [threshold]``, the exit status is 1 if a
+benchmark regressed.
+"""
+
+import json
+import sys
+from typing import Dict, List, Tuple
+
+DEFAULT_THRESHOLD = 0.2  # Relative slowdown flagged as a regression
+
+
+def load_results(path: str) -> Dict[str, Dict]:
+    """Load the benchmarks of a result file (name -> statistics)."""
+    with open(path) as f:
+        return json.load(f)["benchmarks"]
+
+
+def compare(
+    baseline: Dict[str, Dict], results: Dict[str, Dict], threshold: float = DEFAULT_THRESHOLD
+) -> Tuple[List[str], List[str]]:
+    """Compare the median and minimum times of the benchmarks with the baseline.
+
+    :param baseline: Benchmarks of the baseline.
+    :param results: Benchmarks to compare.
+    :param threshold: Relative slowdown flagged as a regression (0.2: 20% slower).
+    :return: The lines of the report and the names of the regressed benchmarks.
+    """
+    lines = [f"{'benchmark':<60}{'baseline':>12}{'current':>12}{'change':>9}"]
+    regressions = []
+    for name in sorted(set(baseline) | set(results)):
+        if name not in results:
+            lines.append(f"{name:<60}{format_time(baseline[name]['median']):>12}{'missing':>12}")
+            continue
+        if name not in baseline:
+            lines.append(f"{name:<60}{'new':>12}{format_time(results[name]['median']):>12}")
+            continue
+        before, after = baseline[name]["median"], results[name]["median"]
+        change = get_change(before, after)
+        min_change = get_change(baseline[name]["min"], results[name]["min"])
+        flag = ""
+        if change > threshold and min_change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        elif change < -threshold and min_change < -threshold:
+            flag = "  faster"
+        lines.append(
+            f"{name:<60}{format_time(before):>12}{format_time(after):>12}{change:>+9.1%}{flag}"
+        )
+    return lines, regressions
+
+
+def get_change(before: float, after: float) -> float:
+    """Relative change of a time."""
+    return after / before - 1 if before > 0 else 0.0
+
+
+def format_time(seconds: float) -> str:
+    """Format a duration with a readable unit."""
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+
+def main(baseline_path: str, results_path: str, threshold: float = DEFAULT_THRESHOLD) -> int:
+    lines, regressions = compare(load_results(baseline_path), load_results(results_path), threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"{len(regressions)} benchmarks regressed by more than {threshold:.0%}")
+    return int(bool(regressions))
+
+
+if __name__ == "__main__":
+    threshold = float(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_THRESHOLD
+    sys.exit(main(sys.argv[1], sys.argv[2], threshold))
@@ -0,0 +1,162 @@
+"""Plugin of the benchmark suite (test_*.py files of this directory).
+
+:Date: 18/10/2026
+:Description: The bench fixture times a function: the number of calls per round is calibrated so a
+round lasts at least --bench-min-time, then --bench-rounds rounds are timed and their statistics
+(median, mean, min, standard deviation per operation) are recorded. At the end of the session the
+results are printed, saved with --bench-json and compared with a baseline with --bench-compare
+(the session fails if a benchmark is more than --bench-threshold slower, see compare.py).
+Run it from the root of the repository: ``python -m pytest benchmarks -q``.
+"""
+
+import gc
+import json
+import os
+import platform
+import statistics
+import time
+from typing import Callable, Dict, List, Tuple
+
+import pytest
+
+from compare import DEFAULT_THRESHOLD, compare, format_time, load_results
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("bench", "benchmark suite")
+    group.addoption("--bench-json", help="Save the results in this json file.")
+    group.addoption("--bench-compare", help="Compare the results with this json file.")
+    group.addoption(
+        "--bench-threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Relative slowdown flagged as a regression (see compare.py).",
+    )
+    group.addoption("--bench-rounds", type=int, default=7, help="Number of timed rounds.")
+    group.addoption(
+        "--bench-min-time", type=float, default=0.02, help="Minimum duration of a round (s)."
+    )
+
+
+class Bench:
+    """Timer of the benchmarks (see the bench fixture)."""
+
+    def __init__(self, name: str, results: Dict[str, Dict], rounds: int, min_time: float) -> None:
+        self.name = name
+        self.results = results
+        self.rounds = rounds
+        self.min_time = min_time
+
+    def __call__(self, function: Callable, operations: int = 1, **extra):
+        """Time a function.
+
+        :param function: The function, called without arguments.
+        :param operations: Number of operations of a call (e.g: the number of queries it runs),
+            the statistics are per operation.
+        :param extra: Values saved with the results (e.g: the number of settled nodes).
+        :return: The value returned by the first call.
+        """
+        result = function()  # Warm up
+        gc_enabled = gc.isenabled()
+        gc.disable()  # As timeit, the collections would add noise to the rounds
+        try:
+            times, iterations = self.run(function, operations)
+        finally:
+            if gc_enabled:
+                gc.enable()
+        self.results[self.name] = {
+            "median": statistics.median(times),
+            "mean": statistics.mean(times),
+            "min": min(times),
+            "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+            "rounds": self.rounds,
+            "iterations": iterations,
+            "operations": operations,
+            **extra,
+        }
+        return result
+
+    def run(self, function: Callable, operations: int) -> Tuple[List[float], int]:
+        """Calibrate the number of calls of a round and time the rounds.
+
+        :return: The time of an operation in each round and the number of calls of a round.
+        """
+        iterations = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(iterations):
+                function()
+            elapsed = time.perf_counter() - start
+            if elapsed >= self.min_time:
+                break
+            iterations *= 2 if elapsed == 0 else max(2, min(10, int(self.min_time / elapsed) + 1))
+        times = []
+        for _ in range(self.rounds):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                function()
+            times.append((time.perf_counter() - start) / (iterations * operations))
+        return times, iterations
+
+
+def get_results(config) -> Dict[str, Dict]:
+    if not hasattr(config, "bench_results"):
+        config.bench_results = {}
+    return config.bench_results
+
+
+@pytest.fixture
+def bench(request) -> Bench:
+    config = request.config
+    return Bench(
+        request.node.nodeid.split("::", 1)[-1],
+        get_results(config),
+        config.getoption("--bench-rounds"),
+        config.getoption("--bench-min-time"),
+    )
+
+
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+    results = get_results(config)
+    if not results:
+        return
+    path = config.getoption("--bench-json")
+    if path:
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "machine": {
+                        "python": platform.python_version(),
+                        "platform": platform.platform(),
+                        "cpus": os.cpu_count(),
+                    },
+                    "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "benchmarks": results,
+                },
+                f,
+                indent=2,
+            )
+    baseline = config.getoption("--bench-compare")
+    if baseline:
+        threshold = config.getoption("--bench-threshold")
+        config.bench_report, regressions = compare(load_results(baseline), results, threshold)
+        if regressions:
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    results = get_results(config)
+    if not results:
+        return
+    terminalreporter.section("benchmarks")
+    terminalreporter.write_line(f"{'benchmark':<60}{'median':>12}{'min':>12}{'stdev':>10}")
+    for name, stats in results.items():
+        terminalreporter.write_line(
+            f"{name:<60}{format_time(stats['median']):>12}{format_time(stats['min']):>12}"
+            f"{stats['stdev'] / stats['median']:>10.1%}"
+        )
+    if hasattr(config, "bench_report"):
+        terminalreporter.section("comparison with the baseline")
+        for line in config.bench_report:
+            terminalreporter.write_line(line)
@@ -0,0 +1,160 @@
+"""Benchmark suite of the routing on the real plans (P1, S and the Solbosch outside graph).
+
+:Date: 18/10/2026
+:Description: Time each stage of a route: snapping a position to the outside graph, single pair
+searches (plain, A*, bidirectional, and the networkx shortest path of Graph.default_dijkstra as a
+reference), one-to-many searches, the analysis of the paths, and the endpoints through the
+TestClient of FastAPI with and without the route cache. The pairs are drawn with a fixed seed so
+two runs time the same queries. Run it from the root of the repository: ``python -m pytest
+benchmarks -q --bench-json results.json [--bench-compare baseline.json]``, see conftest.py.
+"""
+
+import itertools
+import random
+
+import pytest
+
+from Analyse import BPathAnalyzer, OPathAnalyzer
+from dijkstra import INF, Dijkstra
+from Graph import OUTSIDE, BuildingGraph, CampusGraph, Graph, OutsideGraph
+from utils.constants import BUILDINGS_DATA_DIR, OUTSIDE_DATA_DIR
+
+N_PAIRS = 200
+SEED = 0
+
+
+@pytest.fixture(scope="module")
+def outside() -> OutsideGraph:
+    return OutsideGraph(f"{OUTSIDE_DATA_DIR}solbosch_map_updated.json")
+
+
+@pytest.fixture(scope="module")
+def buildings() -> dict:
+    return {name: BuildingGraph(f"{BUILDINGS_DATA_DIR}{name}/{name}.json") for name in ("P1", "S")}
+
+
+@pytest.fixture(scope="module")
+def graphs(outside: OutsideGraph, buildings: dict) -> dict:
+    """The graphs searched and the pairs of nodes of their queries."""
+    rng = random.Random(SEED)
+    campus = CampusGraph(outside, buildings)
+    graphs = {}
+    for name, graph in (("P1", buildings["P1"]), ("S", buildings["S"]), (OUTSIDE, outside)):
+        nodes = list(graph.nodes)
+        graphs[name] = (graph, [tuple(rng.sample(nodes, 2)) for _ in range(N_PAIRS)])
+    rooms_p1, rooms_s = buildings["P1"].get_rooms(), buildings["S"].get_rooms()
+    pairs = [(("P1", rng.choice(rooms_p1)), ("S", rng.choice(rooms_s))) for _ in range(N_PAIRS)]
+    graphs["campus"] = (campus, pairs)
+    return graphs
+
+
+def run_queries(d: Dijkstra, pairs: list) -> int:
+    """Run the queries, return the number of settled nodes."""
+    settled = 0
+    for source, target in pairs:
+        d.dijkstra(source, target)
+        settled += d.settled
+    return settled
+
+
+def test_snap(bench, outside: OutsideGraph):
+    rng = random.Random(SEED)
+    lats = [outside.nodes[node]["latitude"] for node in outside.nodes]
+    longs = [outside.nodes[node]["longitude"] for node in outside.nodes]
+    positions = [
+        (rng.uniform(min(lats), max(lats)), rng.uniform(min(longs), max(longs)))
+        for _ in range(N_PAIRS)
+    ]
+    bench(lambda: [outside.find_closest_node(p) for p in positions], operations=len(positions))
+
+
+@pytest.mark.parametrize("graph_name", ["P1", "S", OUTSIDE, "campus"])
+@pytest.mark.parametrize("mode", ["plain", "astar", "bidirectional"])
+def test_single_pair(bench, graphs: dict, graph_name: str, mode: str):
+    graph, pairs = graphs[graph_name]
+    options = {"astar": mode == "astar", "bidirectional": mode == "bidirectional"}
+    if graph_name == "campus":  # Routes from P1 to S
+        options["blocked"] = graph.get_blocked(["P1"], ["S"])
+    d = Dijkstra(graph, **options)
+    settled = run_queries(d, pairs)
+    bench(lambda: run_queries(d, pairs), operations=len(pairs), settled=settled / len(pairs))
+
+
+@pytest.mark.parametrize("graph_name", ["P1", "S", OUTSIDE])
+def test_networkx_reference(bench, graphs: dict, graph_name: str):
+    graph, pairs = graphs[graph_name]
+    pairs = [pair for pair in pairs if Dijkstra(graph).dijkstra(*pair)[0] < INF]
+
+    def run():
+        for source, target in pairs:
+            Graph.default_dijkstra(graph, source, target)
+
+    bench(run, operations=len(pairs))
+
+
+@pytest.mark.parametrize("graph_name", ["P1", "S", "campus"])
+def test_one_to_many(bench, graphs: dict, graph_name: str):
+    graph, pairs = graphs[graph_name]
+    sources = sorted({source for source, _ in pairs})[:20]
+    targets = [target for _, target in pairs]
+    blocked = graph.get_blocked(["P1"], ["S"]) if graph_name == "campus" else []
+    d = Dijkstra(graph, blocked=blocked)
+    bench(
+        lambda: [d.dijkstra_to_many(source, targets) for source in sources],
+        operations=len(sources),
+        targets=len(targets),
+    )
+
+
+@pytest.mark.parametrize("building", ["P1", "S"])
+def test_analyse_building(bench, graphs: dict, building: str):
+    graph, pairs = graphs[building]
+    d = Dijkstra(graph)
+    paths = []
+    for source, target in pairs:
+        path = d.dijkstra(source, target)[1]
+        try:
+            BPathAnalyzer(graph, path)
+        except (AssertionError, KeyError):  # Paths the analyzer does not handle
+            continue
+        paths.append(path)
+    bench(lambda: [BPathAnalyzer(graph, path) for path in paths], operations=len(paths))
+
+
+def test_analyse_outside(bench, graphs: dict):
+    graph, pairs = graphs[OUTSIDE]
+    d = Dijkstra(graph)
+    paths = [d.dijkstra(source, target)[1] for source, target in pairs]
+    bench(lambda: [OPathAnalyzer(graph, path).analyse() for path in paths], operations=len(paths))
+
+
+@pytest.fixture(scope="module")
+def client():
+    from fastapi.testclient import TestClient
+
+    import main
+
+    return TestClient(main.app), main
+
+
+ASK = [((50.8125, 4.3820), "P1.2.301"), ((50.8135, 4.3830), "S.4.133")]
+ASK_FROM_INSIDE = [("P1.2.301", "S.4.133"), ("P1.1.203", "P1.2.301"), ("S.5.227", "S.9.216")]
+
+
+@pytest.mark.parametrize("cached", [False, True])
+@pytest.mark.parametrize("endpoint", ["ask", "ask_from_inside"])
+def test_endpoint(bench, client, endpoint: str, cached: bool):
+    client, main = client
+    if endpoint == "ask":
+        requests = [{"start": list(start), "arrival": arrival} for start, arrival in ASK]
+    else:
+        requests = [{"start": start, "arrival": arrival} for start, arrival in ASK_FROM_INSIDE]
+    requests = itertools.cycle(requests)
+
+    def run():
+        if not cached:
+            main.route_cache.clear()
+        response = client.post(f"/api/{endpoint}", json=next(requests))
+        assert response.status_code == 200
+
+    bench(run)
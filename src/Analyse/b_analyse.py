@@ -1,7 +1,10 @@
+import logging
 from typing import List, Tuple
 
 from Graph import BEdgeAttributes, BNodeAttributes, BuildingGraph
 
+logger = logging.getLogger(__name__)
+
 
 class Instruction:
     """Class to represent an instruction."""
@@ -62,7 +65,7 @@ class BPathAnalyzer:
         :param path: The path to analyse. A path is a list of nodes.
         """
         pairs: List = [[self.path[i], self.path[i + 1]] for i in range(len(self.path) - 1)]
-        print(self.path)
+        logger.debug("Analysing the path %s", self.path)
         predecessor = "null"
         for src, trg in pairs:
             direction = self.graph.edges[src, trg][BEdgeAttributes.DIRECTION]
@@ -83,7 +86,7 @@ class BPathAnalyzer:
             elif direction == "straight":
                 instruction = self.get_instruction_and_image(Instruction.STRAIGHT)
             else:
-                print("This is the direction", direction)
+                logger.debug("This is the direction %s", direction)
                 assert direction in [
                     "left",
                     "right",
@@ -127,7 +130,7 @@ class BPathAnalyzer:
         :return: The corresponding instruction and image
         """
         text = self.text_instructions[instruction_type]
-        print(f"This is the tedxt {text} for the instruction type {instruction_type}")
+        logger.debug("This is the text %s for the instruction type %s", text, instruction_type)
         if instruction_type in [Instruction.ELEVATOR, Instruction.STAIRS]:
             text = text[int(up)] + f" {floor}"
         image = f"{self.IMAGES_DIR}{self.images_instructions[instruction_type]}{self.IMAGES_EXT}"
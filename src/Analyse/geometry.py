@@ -0,0 +1,135 @@
+"""Compact forms of the coordinates of a path.
+
+:Date: 18/10/2026
+:Description: The coordinates of the outside path dominate the size of the responses once the
+outside graph is dense. They can be simplified with the Douglas-Peucker algorithm (the points
+closer than a tolerance in metres to the simplified line are dropped) and encoded with the
+encoded polyline format of Google (coordinates rounded to 1e-5 degrees, about 1 m, the difference
+with the previous point written in base64-like characters) or as a flat list of integers (the
+first point, then the difference with the previous point, in 1e-5 degrees).
+"""
+
+import math
+from typing import List, Sequence, Tuple
+
+COORDINATES = "coordinates"  # List of (latitude, longitude)
+POLYLINE = "polyline"  # Encoded polyline string
+DELTAS = "deltas"  # Flat list of integers: lat0, long0, dlat1, dlong1, ...
+ENCODINGS = [COORDINATES, POLYLINE, DELTAS]
+
+PRECISION = 5  # Decimals of the encoded coordinates
+EARTH_RADIUS = 6371008.8  # Mean radius in metres
+
+Point = Tuple[float, float]
+
+
+def simplify(points: Sequence[Point], tolerance: float) -> List[Point]:
+    """Simplify a line with the Douglas-Peucker algorithm.
+
+    :param points: The (latitude, longitude) of the points of the line.
+    :param tolerance: Maximum distance (in metres) between a dropped point and the simplified line.
+    :return: The points that are kept, the first and the last ones always are.
+    """
+    if len(points) < 3:
+        return list(points)
+    # Equirectangular projection around the first point, in metres
+    scale = math.radians(1) * EARTH_RADIUS
+    cos_lat = math.cos(math.radians(points[0][0]))
+    xs = [long * cos_lat * scale for _, long in points]
+    ys = [lat * scale for lat, _ in points]
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        dx, dy = xs[last] - xs[first], ys[last] - ys[first]
+        length = dx * dx + dy * dy
+        farthest, max_distance = -1, tolerance
+        for i in range(first + 1, last):
+            px, py = xs[i] - xs[first], ys[i] - ys[first]
+            # Distance to the segment (to its closest end if the projection is outside of it)
+            t = min(1.0, max(0.0, (px * dx + py * dy) / length)) if length else 0.0
+            distance = math.hypot(px - t * dx, py - t * dy)
+            if distance > max_distance:
+                farthest, max_distance = i, distance
+        if farthest != -1:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def encode_deltas(points: Sequence[Point], precision: int = PRECISION) -> List[int]:
+    """Encode points as integers: the first point, then the difference with the previous one.
+
+    :param points: The (latitude, longitude) of the points.
+    :param precision: Number of decimals kept.
+    :return: The flat list lat0, long0, dlat1, dlong1, ... in 10^-precision degrees.
+    """
+    factor = 10**precision
+    deltas = []
+    previous_lat = previous_long = 0
+    for lat, long in points:
+        lat, long = round(lat * factor), round(long * factor)
+        deltas += [lat - previous_lat, long - previous_long]
+        previous_lat, previous_long = lat, long
+    return deltas
+
+
+def decode_deltas(deltas: Sequence[int], precision: int = PRECISION) -> List[Point]:
+    """Decode the points of encode_deltas."""
+    factor = 10**precision
+    points = []
+    lat = long = 0
+    for i in range(0, len(deltas), 2):
+        lat, long = lat + deltas[i], long + deltas[i + 1]
+        points.append((lat / factor, long / factor))
+    return points
+
+
+def encode_polyline(points: Sequence[Point], precision: int = PRECISION) -> str:
+    """Encode points in the encoded polyline format of Google.
+
+    :param points: The (latitude, longitude) of the points.
+    :param precision: Number of decimals kept (5 in the format of Google).
+    :return: The encoded polyline.
+    """
+    chars = []
+    for value in encode_deltas(points, precision):
+        value = ~(value << 1) if value < 0 else value << 1
+        while value >= 0x20:
+            chars.append(chr((0x20 | (value & 0x1F)) + 63))
+            value >>= 5
+        chars.append(chr(value + 63))
+    return "".join(chars)
+
+
+def decode_polyline(polyline: str, precision: int = PRECISION) -> List[Point]:
+    """Decode the points of an encoded polyline."""
+    deltas = []
+    value = shift = 0
+    for char in polyline:
+        byte = ord(char) - 63
+        value |= (byte & 0x1F) << shift
+        shift += 5
+        if byte < 0x20:
+            deltas.append(~(value >> 1) if value & 1 else value >> 1)
+            value = shift = 0
+    return decode_deltas(deltas, precision)
+
+
+def encode(points: Sequence[Point], encoding: str = COORDINATES, tolerance: float = 0.0):
+    """Simplify and encode the coordinates of a path.
+
+    :param points: The (latitude, longitude) of the points of the path.
+    :param encoding: COORDINATES, POLYLINE or DELTAS.
+    :param tolerance: Tolerance of the simplification in metres (no simplification if 0).
+    :return: The points, the encoded polyline or the list of integers.
+    """
+    if tolerance > 0:
+        points = simplify(points, tolerance)
+    if encoding == POLYLINE:
+        return encode_polyline(points)
+    if encoding == DELTAS:
+        return encode_deltas(points)
+    return list(points)
@@ -9,6 +9,8 @@ from typing import List
 
 from Graph import ONodeAttributes, OutsideGraph
 
+from .geometry import COORDINATES, encode
+
 
 class OPathAnalyzer:
     """Class to analyse the path of in the outside graph."""
@@ -35,3 +37,11 @@ class OPathAnalyzer:
         long = [self.graph.nodes[i][ONodeAttributes.LONGITUDE] for i in self.path]
         lat = [self.graph.nodes[i][ONodeAttributes.LATITUDE] for i in self.path]
         return list(zip(lat, long))
+
+    def get_geometry(self, encoding: str = COORDINATES, tolerance: float = 0.0):
+        """Get the coordinates of the path, simplified and encoded (see geometry.encode).
+
+        :param encoding: COORDINATES, POLYLINE or DELTAS.
+        :param tolerance: Tolerance of the simplification in metres (no simplification if 0).
+        """
+        return encode(self.analyse(), encoding, tolerance)
@@ -1,3 +1,7 @@
 from .b_graph import BEdgeAttributes, BNodeAttributes, BuildingGraph
+from .campus import OUTSIDE, CampusGraph
+from .compiled import CompiledGraph
 from .graph import Graph, GraphTypes
+from .names import NameIndex
 from .o_graph import ONodeAttributes, OutsideGraph
+from .registry import GraphRegistry
@@ -6,11 +6,21 @@
 """
 
 import json
-from typing import Any, Dict, List
+import logging
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from typing_extensions import override
 
+from .compiled import CompiledGraph
 from .graph import EdgeAttributes, Graph, GraphTypes, NodeAttributes
+from .snapshot import get_file_hash, get_snapshot_path, read_meta
+from .turns import ARRAYS as TURN_ARRAYS
+from .turns import DEFAULT_PENALTIES, TurnGraph
+
+logger = logging.getLogger(__name__)
+
+INF = float("inf")
 
 
 class BNodeAttributes(NodeAttributes):
@@ -26,6 +36,12 @@ class BEdgeAttributes(EdgeAttributes):
 
 
 class BuildingGraph(Graph):
+    SNAPSHOT_ATTRIBUTES = ["n_floors", "rooms"]
+    SNAPSHOT_ARRAYS = ["floors", "is_portal", "to_portals", "from_portals"]
+    SNAPSHOT_ARRAYS += ["landmarks", "from_landmarks", "to_landmarks"]
+    SNAPSHOT_ARRAYS += TURN_ARRAYS
+    N_LANDMARKS = 4  # Number of landmarks of the ALT lower bounds (0 to disable them)
+    turns: Optional[TurnGraph] = None  # Line graph of the turn aware searches
 
     def __init__(self, path=None):
         super(BuildingGraph, self).__init__()
@@ -48,8 +64,21 @@ class BuildingGraph(Graph):
             "e": "entrance",
         }
         self.n_floors = -1
+        # (node, name, aliases) of each room, read from the snapshot without the graph (read_rooms)
+        self.rooms: List[Tuple[str, str, List[str]]] = []
         self.current_floor = -1
         self.graph_type = GraphTypes.BUILDING
+        # Data of the A* heuristic (indexed by the integer ids of the compiled graph)
+        self.floors = array("i")
+        self.is_portal = array("b")  # 1 for the nodes through which a path can change of floor
+        self.to_portals = array("d")  # distance of each node to the closest portal
+        self.from_portals = array("d")  # distance of the closest portal to each node
+        # Landmarks (ALT): from_landmarks[l * n + v] is the distance from the landmark l to the node
+        # v and to_landmarks[l * n + v] the distance from v to the landmark l
+        self.landmarks = array("i")
+        self.from_landmarks = array("d")
+        self.to_landmarks = array("d")
+        self.turn_penalties: Dict[str, float] = dict(DEFAULT_PENALTIES)
         self.load_graph(path) if path else None
 
     def is_elevator_or_stair(self, id: str) -> bool:
@@ -70,6 +99,41 @@ class BuildingGraph(Graph):
         """Get all the entrances of the building."""
         return [node for node in self.nodes if self.is_entrance(node)]
 
+    def get_rooms(self):
+        """Get all the rooms (classes, toilets, ...) of the building."""
+        room_types = [self.PREFIXES[prefix] for prefix in ("E", "T", "U")]
+        return [node for node in self.nodes if self.nodes[node][BNodeAttributes.TYPE] in room_types]
+
+    @staticmethod
+    def read_rooms(path: str) -> List[Tuple[str, str, List[str]]]:
+        """Read the rooms of a building without building the graph: from its snapshot if it is up
+        to date (only its attributes are read), otherwise from its json file.
+
+        :param path: Path of the json file of the building.
+        :returns: The (node, name, aliases) of each room, the nodes are the ones of the graph.
+        """
+        meta = read_meta(get_snapshot_path(path), get_file_hash(path))
+        if meta is not None and meta.get("type") == GraphTypes.BUILDING and "rooms" in meta:
+            return [(node, name, aliases) for node, name, aliases in meta["rooms"]]
+        return BuildingGraph.get_plan_rooms(json.load(open(path)))
+
+    @staticmethod
+    def get_plan_rooms(building_data: Dict[str, List[Dict]]) -> List[Tuple[str, str, List[str]]]:
+        """Get the rooms of a building from the content of its json file.
+
+        :param building_data: The nodes of each floor of the building.
+        :returns: The (node, name, aliases) of each room, the nodes are the ones of the graph.
+        """
+        rooms = []
+        for floor, nodes in building_data.items():
+            for node_data in nodes:
+                node_id = node_data[BNodeAttributes.ID]
+                if node_id[0] in ("E", "T", "U") and BNodeAttributes.NAME in node_data:
+                    node = f"{node_id}_{int(floor)}"  # See get_name_from_id
+                    aliases = node_data.get(BNodeAttributes.ALIASES, [])
+                    rooms.append((node, node_data[BNodeAttributes.NAME], aliases))
+        return rooms
+
     @override
     def get_name_from_id(self, id: str) -> str:
         """Get the name of a node from its id.
@@ -83,18 +147,149 @@ class BuildingGraph(Graph):
             return id
         return f"{id}_{self.current_floor}"
 
+    @override
+    def prepare_queries(self, compiled: CompiledGraph) -> None:
+        super(BuildingGraph, self).prepare_queries(compiled)
+        turn_arrays = {attr: getattr(self, attr) for attr in TURN_ARRAYS}
+        self.turns = TurnGraph(compiled, **turn_arrays, penalties=self.turn_penalties)
+
+    def set_turn_penalties(self, penalties: Dict[str, float]) -> None:
+        """Change the penalties of the turns of the turn aware searches (see Graph.turns).
+
+        :param penalties: Penalty of each kind of turn (straight, left, right, uturn, unknown),
+            the missing kinds keep their penalty.
+        :raises ValueError: If a kind of turn is unknown or a penalty is negative.
+        """
+        self.get_compiled()  # The turns are built with the compiled graph
+        self.turns.set_penalties(penalties)
+        self.turn_penalties = dict(self.turns.penalties)
+
+    @override
+    def nbytes(self) -> int:
+        size = super(BuildingGraph, self).nbytes()
+        # Weights of the line graph, its other arrays are in SNAPSHOT_ARRAYS
+        weights = (self.turns.start_weights, self.turns.turn_weights)
+        return size + sum(values.itemsize * len(values) for values in weights)
+
+    @override
+    def prepare_compiled(self, compiled: CompiledGraph) -> None:
+        floor = BNodeAttributes.FLOOR
+        self.floors = array("i", [self.nodes[node][floor] for node in compiled.ids])
+        # A path that changes of floor has to go through a stair, a lift, or a node that is
+        # directly linked to another floor.
+        portals = {idx for idx, node in enumerate(compiled.ids) if self.is_elevator_or_stair(node)}
+        for source, target in self.edges:
+            if self.nodes[source][floor] != self.nodes[target][floor]:
+                portals.update((compiled.index[source], compiled.index[target]))
+        self.is_portal = array("b", [idx in portals for idx in range(len(compiled))])
+        self.to_portals = array("d", compiled.get_distances(portals, reverse=True))
+        self.from_portals = array("d", compiled.get_distances(portals))
+        self.select_landmarks(compiled, self.N_LANDMARKS)
+        direction = BEdgeAttributes.DIRECTION
+        for attr, values in TurnGraph.build_arrays(self, compiled, direction).items():
+            setattr(self, attr, values)
+
+    def select_landmarks(self, compiled: CompiledGraph, n_landmarks: int) -> None:
+        """Choose the landmarks of the ALT lower bounds and compute their distances.
+        The landmarks are chosen far from each other (farthest point selection): each new
+        landmark is the node farthest from the landmarks already chosen, the first one is the
+        node farthest from the first node of the graph. Far landmarks lie "behind" most nodes
+        (e.g: at the top or at the bottom of the building) so they give tight bounds.
+
+        :param compiled: The compiled graph.
+        :param n_landmarks: Number of landmarks.
+        """
+        n = len(compiled)
+        landmarks: List[int] = []
+        from_landmarks, to_landmarks = array("d"), array("d")
+        # Round trip distance of each node to the closest landmark (to the first node at first),
+        # 0 for the nodes that cannot do the round trip so they are never chosen
+        from_first = compiled.get_distances([0] if n else [])
+        to_first = compiled.get_distances([0] if n else [], reverse=True)
+        closest = [a + b if a + b < INF else 0.0 for a, b in zip(from_first, to_first)]
+        while len(landmarks) < n_landmarks:
+            landmark = max(range(n), key=closest.__getitem__)
+            if closest[landmark] <= 0.0:
+                break  # Every node that can be chosen is already a landmark
+            landmarks.append(landmark)
+            from_landmark = compiled.get_distances([landmark])
+            to_landmark = compiled.get_distances([landmark], reverse=True)
+            from_landmarks.extend(from_landmark)
+            to_landmarks.extend(to_landmark)
+            closest = [min(c, a + b) for c, a, b in zip(closest, from_landmark, to_landmark)]
+        self.landmarks = array("i", landmarks)
+        self.from_landmarks, self.to_landmarks = from_landmarks, to_landmarks
+
+    @override
+    def get_heuristic(self, targets: List[int]) -> Optional[Callable[[int], float]]:
+        """Maximum of two lower bounds of the distance to a target:
+        - floor aware bound: to reach a target on another floor, a path has to go through a
+          portal (stair, lift) so it is at least as long as the distance to the closest portal
+          plus the distance of the closest portal to the target,
+        - landmark (ALT) bounds, from the triangle inequality: for a landmark l,
+          d(v, t) >= d(l, t) - d(l, v) and d(v, t) >= d(v, l) - d(t, l).
+        """
+        floors, is_portal = self.floors, self.is_portal
+        to_portals, from_portals = self.to_portals, self.from_portals
+        from_landmarks, to_landmarks = self.from_landmarks, self.to_landmarks
+        n = len(floors)
+        # For each target: its floor (None for a portal), the distance of the closest portal to
+        # it and (offset, d(l, t), d(t, l)) for each landmark l
+        bounds = [
+            (
+                None if is_portal[target] else floors[target],
+                from_portals[target],
+                [
+                    (offset, from_landmarks[offset + target], to_landmarks[offset + target])
+                    for offset in range(0, len(from_landmarks), n)
+                ],
+            )
+            for target in targets
+        ]
+        if not bounds:
+            return None
+
+        def heuristic(idx: int) -> float:
+            best = INF
+            for floor, from_portal, landmarks in bounds:
+                if floor is None:
+                    h = to_portals[idx]
+                elif is_portal[idx]:
+                    h = from_portal
+                elif floors[idx] == floor:
+                    h = 0.0
+                else:
+                    h = to_portals[idx] + from_portal
+                for offset, from_landmark, to_landmark in landmarks:
+                    # The bounds are skipped when the landmark does not reach or is not reached
+                    # by the node (inf - inf), an unreachable target gives an infinite bound.
+                    d = from_landmarks[offset + idx]
+                    if d < INF and from_landmark - d > h:
+                        h = from_landmark - d
+                    if to_landmark < INF and to_landmarks[offset + idx] - to_landmark > h:
+                        h = to_landmarks[offset + idx] - to_landmark
+                if h < best:
+                    best = h
+            return best
+
+        return heuristic
+
     @override
     def load_graph(self, path: str) -> None:
         self.name = self.get_graph_name(path)
-        print(f"Building graph {self.name} created.")
-        building_data = json.load(open(path))
-        floors: List[str] = list(building_data.keys())
-        self.n_floors = len(floors)
-        for current_floor in floors:
-            self.current_floor = int(current_floor)
-            rooms: List[Dict] = building_data[current_floor]
-            for room in rooms:
-                self.add_node_(room)
+        logger.info("Building graph %s created.", self.name)
+        if not self.load_snapshot(path):
+            building_data = json.load(open(path))
+            floors: List[str] = list(building_data.keys())
+            self.n_floors = len(floors)
+            for current_floor in floors:
+                self.current_floor = int(current_floor)
+                rooms: List[Dict] = building_data[current_floor]
+                for room in rooms:
+                    self.add_node_(room)
+            self.rooms = self.get_plan_rooms(building_data)
+            self.compile()
+        self.build_name_index()
 
     @override
     def add_node_(self, node_data: Dict[str, Any]) -> None:
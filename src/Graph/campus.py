@@ -0,0 +1,191 @@
+"""Graph of a campus made of the outside graph and of building graphs.
+
+:Date: 18/10/2026
+:Description: The layers (the outside graph and the loaded building graphs) are stitched together
+in a single compiled graph. Each entrance node of a building (e... ids) is linked to the node with
+the same id in the outside graph through two portal nodes: an exit portal (building -> outside)
+and an entrance portal (outside -> building), with transfer edges of weight 0. A route between a
+room and a position outside, or between rooms of two buildings, is then a single shortest path
+query that only opens the portals of its buildings (see get_blocked): it leaves the starting
+building, enters the arrival building and never goes through another building. The nodes of this
+graph are (layer, node) tuples, the layer of the outside graph is OUTSIDE, and the portals are
+(layer, entrance, EXIT or ENTER) tuples.
+"""
+
+import sys
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from .b_graph import BuildingGraph
+from .compiled import CompiledGraph
+from .graph import GraphTypes
+from .o_graph import OutsideGraph
+
+OUTSIDE = "outside"
+EXIT = "exit"
+ENTER = "enter"
+
+CampusNode = Tuple[str, str]
+
+
+class CampusGraph:
+    """Stitched graph used to route across the layers of a campus.
+    It only has the part of the interface of Graph that Dijkstra uses.
+    """
+
+    def __init__(self, outside: OutsideGraph, layers: Dict[str, BuildingGraph]) -> None:
+        """Constructor of the class.
+
+        :param outside: The outside graph.
+        :param layers: The buildings (by name) linked through the outside graph.
+        """
+        self.outside = outside
+        self.layers: Dict[str, BuildingGraph] = dict(layers)
+        self.name = "+".join([OUTSIDE, *self.layers])
+        self.graph_type = GraphTypes.CAMPUS
+        self.versions: Tuple[int, ...] = ()  # Versions of the layers when they were stitched
+        # Integer ids of the portals by (building, EXIT or ENTER)
+        self.portals: Dict[Tuple[str, str], List[int]] = {}
+        # Integer ids of the entrances of each building in the outside graph
+        self.entrances: Dict[str, List[int]] = {}
+        self.compiled = self.compile()
+
+    @property
+    def type(self) -> str:
+        return self.graph_type
+
+    @property
+    def lowered(self) -> bool:
+        """The heuristic is the one of the outside graph (see get_heuristic)."""
+        return self.outside.lowered
+
+    def get_layers_versions(self) -> Tuple[int, ...]:
+        """Current versions of the outside graph and of the buildings."""
+        return (self.outside.version, *[graph.version for graph in self.layers.values()])
+
+    def is_outdated(self) -> bool:
+        """Check if a layer has been edited or reloaded since the graph was compiled."""
+        return self.versions != self.get_layers_versions()
+
+    def compile(self) -> CompiledGraph:
+        """Build the compiled graph from the compiled graphs of the layers.
+        The outside graph is the first layer, its integer ids are the same as in its own compiled
+        graph. The weight profiles of the campus are the profiles shared by all the layers.
+        """
+        ids: List[Hashable] = []
+        edges: List[Tuple[int, int, float]] = []
+        bases: Dict[str, int] = {}  # integer id of the first node of each layer
+        layers = [(OUTSIDE, self.outside.compiled)]
+        layers += [(name, graph.compiled) for name, graph in self.layers.items()]
+        names = set.intersection(*(set(graph.profiles) for _, graph in layers))
+        profiles: Dict[str, List[float]] = {name: [] for name in sorted(names)}
+        for layer, graph in layers:
+            base = bases[layer] = len(ids)
+            ids += [(layer, node) for node in graph.ids]
+            for source in range(len(graph)):
+                for edge in range(graph.offsets[source], graph.offsets[source + 1]):
+                    edges.append((base + source, base + graph.targets[edge], graph.weights[edge]))
+            for name, weights in profiles.items():
+                weights += graph.profiles[name][0]
+        exits = self.outside.compiled.index
+        self.portals, self.entrances = {}, {}
+        for layer, building in self.layers.items():
+            exit_portals = self.portals[(layer, EXIT)] = []
+            enter_portals = self.portals[(layer, ENTER)] = []
+            self.entrances[layer] = []
+            for entrance in building.get_entrances():
+                if entrance not in exits:
+                    continue
+                inside = bases[layer] + building.compiled.index[entrance]
+                outside = bases[OUTSIDE] + exits[entrance]
+                exit_portal, enter_portal = len(ids), len(ids) + 1
+                ids += [(layer, entrance, EXIT), (layer, entrance, ENTER)]
+                edges += [(inside, exit_portal, 0.0), (exit_portal, outside, 0.0)]
+                edges += [(outside, enter_portal, 0.0), (enter_portal, inside, 0.0)]
+                exit_portals.append(exit_portal)
+                enter_portals.append(enter_portal)
+                self.entrances[layer].append(exits[entrance])
+        for weights in profiles.values():
+            weights += [0.0] * (len(edges) - len(weights))  # The transfer edges
+        self.versions = self.get_layers_versions()
+        return CompiledGraph.from_edges(ids, edges, profiles)
+
+    def get_blocked(self, departures: Iterable[str] = (), arrivals: Iterable[str] = ()) -> List[int]:
+        """Get the portals a route must not go through (see Dijkstra blocked): all of them but the
+        exits of the buildings where it starts and the entrances of the buildings where it ends.
+
+        :param departures: Buildings where the route can start (none if it starts outside).
+        :param arrivals: Buildings where the route can end (none if it ends outside).
+        :returns: The integer ids of the blocked portals.
+        """
+        opened = {(layer, EXIT) for layer in departures} | {(layer, ENTER) for layer in arrivals}
+        return [
+            portal
+            for key, portals in self.portals.items()
+            if key not in opened
+            for portal in portals
+        ]
+
+    def is_in_graph(self, node: CampusNode) -> bool:
+        return node in self.compiled.index
+
+    def find_node(self, name: str) -> CampusNode:
+        """Find a node of a building by its name.
+
+        :param name: The name of the node, e.g: P1.2.301
+        :raises ValueError: If no building has a node with this name.
+        :returns: The node of the campus graph.
+        """
+        for layer, building in self.layers.items():
+            if name in building.name_index:
+                return (layer, building.find_node(name))
+        raise ValueError(f"Invalid name: {name} for node in", self.__class__.__name__)
+
+    def get_heuristic(self, targets: List[int]) -> Optional[Callable[[int], float]]:
+        """Lower bound of the distance to the closest target for the A* searches: on the outside
+        graph, the haversine bound of the outside graph (see OutsideGraph.get_heuristic) to the
+        targets outside and to the entrances of the buildings of the other targets, a route to a
+        room goes through one of them. It is 0 in the buildings and on the portals.
+
+        :param targets: Integer ids (in the compiled graph) of the targets.
+        :returns: The function giving the lower bound of a node (integer id), or None if no
+            target can be reached from the outside graph.
+        """
+        n_outside = len(self.outside.compiled)  # The outside graph is the first layer
+        outside_targets = set()
+        for target in targets:
+            if target < n_outside:
+                outside_targets.add(target)
+            else:
+                outside_targets.update(self.entrances[self.compiled.ids[target][0]])
+        bound = self.outside.get_heuristic(sorted(outside_targets))
+        if bound is None:
+            return None
+
+        def heuristic(idx: int) -> float:
+            return bound(idx) if idx < n_outside else 0.0
+
+        return heuristic
+
+    def nbytes(self) -> int:
+        """Estimate of the memory used by the graph: the compiled arrays and the ids of the nodes
+        (the tuples, the list and the index).
+        """
+        compiled = self.compiled
+        size = compiled.nbytes() + sys.getsizeof(compiled.ids) + sys.getsizeof(compiled.index)
+        return size + sum(sys.getsizeof(node) for node in compiled.ids)
+
+    def split_path(self, path: List[Hashable]) -> List[Tuple[str, List[str]]]:
+        """Split a path of the campus graph into the paths of its layers.
+
+        :param path: Path of (layer, node) tuples, the portals are skipped.
+        :returns: The successive (layer, path in the layer) segments.
+        """
+        segments: List[Tuple[str, List[str]]] = []
+        for node in path:
+            if len(node) != 2:
+                continue
+            layer, node = node
+            if not segments or segments[-1][0] != layer:
+                segments.append((layer, []))
+            segments[-1][1].append(node)
+        return segments
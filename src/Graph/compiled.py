@@ -0,0 +1,280 @@
+"""Compiled (read-only) form of a graph.
+
+:Date: 18/10/2026
+:Description: The topology and the weights of a Graph stored in compressed sparse row (CSR) arrays.
+Nodes are numbered from 0 to n - 1, the edges leaving the node i are stored between
+offsets[i] and offsets[i + 1] in the targets and weights arrays. The reverse graph is stored the
+same way so searches can follow the edges backward. The networkx graph stays the editable
+representation, this one is only used by the routing algorithms.
+A graph can have weight profiles (e.g: step_free): other weights of the same edges, stored in
+arrays parallel to the weights arrays, so a profile costs O(E) floats instead of a copy of the
+graph.
+The searches run in a SearchWorkspace, their per node arrays are allocated once for each graph and
+each thread and reused by the next searches.
+"""
+
+import threading
+from array import array
+from heapq import heapify, heappop, heappush
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Type codes of the arrays
+INDEX = "i"
+WEIGHT = "d"
+
+
+class SearchWorkspace:
+    """Per node arrays of a search, reused from a search to the next one.
+    An entry of dist_to, predecessor or estimates is only valid if the stamp of the node is the
+    generation of the current search. Starting a search only increments the generation, so it
+    costs nothing instead of resetting the arrays, and a search costs in proportion to the nodes it
+    reaches.
+    """
+
+    def __init__(self, n: int) -> None:
+        """Constructor of the class.
+
+        :param n: Number of nodes of the graph.
+        """
+        self.dist_to: List[float] = [float("inf")] * n
+        self.predecessor: List[int] = [-1] * n
+        self.estimates: List[float] = [0.0] * n  # Heuristic of the nodes (A* searches)
+        self.stamps: List[int] = [0] * n  # Generation of the search that last reached each node
+        self.generation = 0
+        self.heap: List[Tuple[float, int]] = []
+
+    def start(self) -> int:
+        """Start a new search, the results of the previous one are discarded.
+
+        :return: The generation of the new search.
+        """
+        self.generation += 1
+        self.heap.clear()
+        return self.generation
+
+    def is_reached(self, idx: int) -> bool:
+        """Check if a node has been reached by the current search."""
+        return self.stamps[idx] == self.generation
+
+    def get_distance(self, idx: int) -> float:
+        """Distance of a node found by the current search (inf if it was not reached)."""
+        return self.dist_to[idx] if self.stamps[idx] == self.generation else float("inf")
+
+
+class CompiledGraph:
+    """Array backed graph used by the routing algorithms."""
+
+    def __init__(
+        self,
+        ids: List[str],
+        offsets: array,
+        targets: array,
+        weights: array,
+        r_offsets: array,
+        r_targets: array,
+        r_weights: array,
+    ) -> None:
+        """Constructor of the class.
+
+        :param ids: Id of each node, the position in the list is the integer id of the node.
+        :param offsets: CSR offsets of the edges (length n + 1).
+        :param targets: Target of each edge.
+        :param weights: Weight of each edge.
+        :param r_offsets: CSR offsets of the reverse edges (length n + 1).
+        :param r_targets: Source of each edge, grouped by the target of the edge.
+        :param r_weights: Weight of each reverse edge.
+        """
+        self.ids = ids
+        self.index: Dict[str, int] = {node: idx for idx, node in enumerate(ids)}
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.r_offsets = r_offsets
+        self.r_targets = r_targets
+        self.r_weights = r_weights
+        # Weights of each profile, for the edges and for the reverse edges
+        self.profiles: Dict[str, Tuple[Sequence[float], Sequence[float]]] = {}
+        self.workspaces = threading.local()  # One search workspace per thread
+
+    @classmethod
+    def from_edges(
+        cls,
+        ids: List[str],
+        edges: Iterable[Tuple[int, int, float]],
+        profiles: Optional[Dict[str, Sequence[float]]] = None,
+    ) -> "CompiledGraph":
+        """Build the CSR arrays from a list of edges.
+
+        :param ids: Id of each node.
+        :param edges: (source, target, weight) of each edge, with integer ids.
+        :param profiles: Weights of each profile, in the order of the edges (see add_profile).
+        :return: The compiled graph.
+        """
+        n = len(ids)
+        edges = list(edges)
+        # The sorts are stable, the edges of a node keep the order in which they were given
+        order = sorted(range(len(edges)), key=lambda edge: edges[edge][0])
+        edges = [edges[edge] for edge in order]
+        offsets, targets, weights = cls.to_csr(n, edges)
+        reverse = sorted(
+            ((target, source, weight) for source, target, weight in edges), key=lambda edge: edge[0]
+        )
+        r_offsets, r_targets, r_weights = cls.to_csr(n, reverse)
+        compiled = cls(ids, offsets, targets, weights, r_offsets, r_targets, r_weights)
+        for name, profile_weights in (profiles or {}).items():
+            compiled.add_profile(name, [profile_weights[edge] for edge in order])
+        return compiled
+
+    @classmethod
+    def from_graph(cls, graph, weight: str) -> "CompiledGraph":
+        """Compile a networkx graph.
+
+        :param graph: The graph to compile.
+        :param weight: Attribute of the edges that contains their weight.
+        :return: The compiled graph.
+        """
+        ids: List[str] = list(graph.nodes)
+        index = {node: idx for idx, node in enumerate(ids)}
+        edges = [
+            (index[source], index[target], float(data[weight]))
+            for source, target, data in graph.edges(data=True)
+        ]
+        return cls.from_edges(ids, edges)
+
+    @staticmethod
+    def to_csr(n: int, edges: List[Tuple[int, int, float]]) -> Tuple[array, array, array]:
+        """Build the CSR arrays of edges sorted by source."""
+        offsets = array(INDEX, [0] * (n + 1))
+        for source, _, _ in edges:
+            offsets[source + 1] += 1
+        for idx in range(n):
+            offsets[idx + 1] += offsets[idx]
+        targets = array(INDEX, [target for _, target, _ in edges])
+        weights = array(WEIGHT, [weight for _, _, weight in edges])
+        return offsets, targets, weights
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def n_edges(self) -> int:
+        return len(self.targets)
+
+    def add_profile(self, name: str, weights: Optional[Sequence[float]] = None) -> None:
+        """Add (or replace) a weight profile.
+        The weights of a profile must not be smaller than the weights of the graph, so the
+        heuristics computed on the latter stay lower bounds. An edge that a profile forbids has an
+        infinite weight. A profile with the weights of the graph shares its arrays.
+
+        :param name: Name of the profile.
+        :param weights: Weight of each edge, in the order of the CSR arrays (None for the
+            weights of the graph).
+        :raises ValueError: If there is not one weight for each edge or a weight is smaller than
+            the weight of the graph.
+        """
+        if weights is not None and len(weights) != self.n_edges:
+            raise ValueError(f"The profile {name} must have {self.n_edges} weights.")
+        if weights is None or all(a == b for a, b in zip(weights, self.weights)):
+            self.profiles[name] = (self.weights, self.r_weights)
+            return
+        if any(a < b for a, b in zip(weights, self.weights)):
+            raise ValueError(f"The weights of the profile {name} must not be smaller.")
+        self.profiles[name] = (array(WEIGHT, weights), self.get_reverse_weights(weights))
+
+    def get_reverse_weights(self, weights: Sequence[float]) -> array:
+        """Reorder weights given in the order of the edges into the order of the reverse edges."""
+        # Same layout as to_csr: the reverse edges of a node are in the order of their sources
+        r_weights = array(WEIGHT, [0.0] * self.n_edges)
+        cursors = array(INDEX, self.r_offsets[:-1])
+        for source in range(len(self)):
+            for edge in range(self.offsets[source], self.offsets[source + 1]):
+                target = self.targets[edge]
+                r_weights[cursors[target]] = weights[edge]
+                cursors[target] += 1
+        return r_weights
+
+    def with_weights(self, weights: array) -> "CompiledGraph":
+        """Get a compiled graph with the same topology (the arrays are shared) and other weights.
+
+        :param weights: Weight of each edge, in the order of the CSR arrays.
+        :return: The new compiled graph, without profiles.
+        """
+        ids, offsets, targets = self.ids, self.offsets, self.targets
+        r_weights = self.get_reverse_weights(weights)
+        return CompiledGraph(
+            ids, offsets, targets, weights, self.r_offsets, self.r_targets, r_weights
+        )
+
+    def find_edge(self, source: int, target: int) -> int:
+        """Get the position of the edge source -> target in the CSR arrays (-1 if there is none)."""
+        for edge in range(self.offsets[source], self.offsets[source + 1]):
+            if self.targets[edge] == target:
+                return edge
+        return -1
+
+    def get_arrays(
+        self, reverse: bool = False, profile: Optional[str] = None
+    ) -> Tuple[array, array, array]:
+        """Get the (offsets, targets, weights) arrays of the graph or of the reverse graph.
+
+        :param reverse: Get the arrays of the reverse graph.
+        :param profile: Get the weights of this profile instead of the weights of the graph.
+        :raises KeyError: If the graph has no such profile.
+        """
+        if reverse:
+            offsets, targets, weights = self.r_offsets, self.r_targets, self.r_weights
+        else:
+            offsets, targets, weights = self.offsets, self.targets, self.weights
+        if profile is not None:
+            weights = self.profiles[profile][1 if reverse else 0]
+        return offsets, targets, weights
+
+    def get_distances(self, roots: Iterable[int], reverse: bool = False) -> List[float]:
+        """Distances of every node to the closest root (full multi-source Dijkstra).
+        It is used to precompute the data of the heuristics, not to answer the queries.
+
+        :param roots: The nodes where the search starts.
+        :param reverse: If True, the edges are followed backward so the distances are the
+            distances from each node to the closest root.
+        :return: The distance of each node (inf if it cannot be reached).
+        """
+        offsets, adjacent, weights = self.get_arrays(reverse)
+        dist_to = [float("inf")] * len(self)
+        heap = []
+        for root in roots:
+            dist_to[root] = 0.0
+            heap.append((0.0, root))
+        heapify(heap)
+        while heap:
+            distance, idx = heappop(heap)
+            if distance > dist_to[idx]:
+                continue
+            for edge in range(offsets[idx], offsets[idx + 1]):
+                neighbor = adjacent[edge]
+                if dist_to[neighbor] > distance + weights[edge]:
+                    dist_to[neighbor] = distance + weights[edge]
+                    heappush(heap, (dist_to[neighbor], neighbor))
+        return dist_to
+
+    def get_workspace(self, backward: bool = False) -> SearchWorkspace:
+        """Get the search workspace of the calling thread (created on first use).
+        The results of a search are only valid until the next search of the same thread.
+
+        :param backward: Get the second workspace of the thread, used by the backward half of a
+            bidirectional search.
+        """
+        name = "backward" if backward else "forward"
+        workspace = getattr(self.workspaces, name, None)
+        if workspace is None:
+            workspace = SearchWorkspace(len(self))
+            setattr(self.workspaces, name, workspace)
+        return workspace
+
+    def nbytes(self) -> int:
+        """Memory used by the arrays (the id map is not included)."""
+        arrays = [self.offsets, self.targets, self.weights]
+        arrays += [self.r_offsets, self.r_targets, self.r_weights]
+        for weights, r_weights in self.profiles.values():
+            if weights is not self.weights:  # The shared arrays are already counted
+                arrays += [weights, r_weights]
+        return sum(a.itemsize * len(a) for a in arrays)
@@ -6,12 +6,20 @@
 """
 
 # import json
+import itertools
+import sys
+import threading
 from abc import abstractmethod
-from typing import Dict, List
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set
 
 import matplotlib.pyplot as plt
 import networkx as nx
 
+from .compiled import CompiledGraph
+from .names import NameIndex
+from .snapshot import Snapshot, get_file_hash, get_snapshot_path, read_snapshot, write_snapshot
+from .updates import Edge, GraphUpdates
+
 
 class NodeAttributes:
     """Attributes of a node."""
@@ -20,6 +28,7 @@ class NodeAttributes:
     NAME = "name"
     COLOR = "color"
     TYPE = "type"
+    ALIASES = "aliases"
 
 
 class EdgeAttributes:
@@ -32,9 +41,34 @@ class GraphTypes:
     GRAPH = "Graph"
     OUTSIDE = "OutsideGraph"
     BUILDING = "BuildingGraph"
+    CAMPUS = "CampusGraph"
+
+
+# Versions are unique across all the graphs, a reloaded graph never gets the version of the old one
+_versions = itertools.count(1)
+_updates_lock = threading.Lock()  # The updates of the graphs are applied one at a time
 
 
 class Graph(nx.DiGraph):
+    _compiled: Optional[CompiledGraph] = None
+    _plan_compiled: Optional[CompiledGraph] = None  # Compiled graph without the updates
+    version = 0  # Changes each time the graph is compiled or updated
+    # Changes when the routes computed on the graph might not be the shortest ones anymore: the
+    # graph is (re)compiled, or an update makes some routes shorter (see update)
+    routes_version = 0
+    updates: Optional[GraphUpdates] = None  # Closures and weight overrides (see update)
+    lowered = False  # True if an update lowers a weight below its weight in the plan
+    SNAPSHOT_ATTRIBUTES: List[str] = []  # Attributes of the graph saved in the snapshots
+    SNAPSHOT_ARRAYS: List[str] = []  # Arrays derived from the compiled graph saved in the snapshots
+    # Weight profiles: name -> types of the nodes the routes of the profile must avoid
+    PROFILES: Dict[str, List[str]] = {
+        "fastest": [],
+        "step_free": ["stair"],  # For wheelchair users
+        "stairs_only": ["lift"],  # E.g: when the lifts are crowded
+    }
+    snapshot_path: Optional[str] = None  # Snapshot the graph was loaded from
+    _name_index: Optional[NameIndex] = None
+
     def init(self, path=None):
         super(Graph, self).__init__()
         self.COLORS: Dict[str, str] = {}
@@ -46,17 +80,278 @@ class Graph(nx.DiGraph):
     def type(self) -> str:
         return self.graph_type
 
+    @property
+    def compiled(self) -> CompiledGraph:
+        """Read-only array form of the graph used for the routing (compiled on first use)."""
+        return self.get_compiled()
+
+    def get_compiled(self) -> CompiledGraph:
+        """Get the compiled graph, the graph is compiled if it has not been yet.
+
+        :returns: The compiled graph.
+        """
+        if self._compiled is None:
+            return self.compile()
+        return self._compiled
+
+    def compile(self) -> CompiledGraph:
+        """(Re)compile the array form of the graph. It must be called after editing the graph.
+
+        :returns: The compiled graph.
+        """
+        return self.set_compiled(CompiledGraph.from_graph(self, EdgeAttributes.WEIGHT))
+
+    def set_compiled(
+        self, compiled: CompiledGraph, arrays: Optional[Dict[str, Sequence]] = None
+    ) -> CompiledGraph:
+        """Use a compiled form of the graph (freshly compiled or loaded from a snapshot).
+
+        :param compiled: The compiled graph, its nodes must be the nodes of this graph.
+        :param arrays: The arrays of SNAPSHOT_ARRAYS when they were loaded with the compiled
+            graph, they are derived from it (see prepare_compiled) if None.
+        :returns: The compiled graph the searches use (with the updates of the graph).
+        """
+        if arrays is None:
+            self.prepare_compiled(compiled)
+        else:
+            for attr in self.SNAPSHOT_ARRAYS:
+                setattr(self, attr, arrays[attr])
+        self._plan_compiled = compiled
+        self.routes_version = next(_versions)
+        return self.apply_updates()
+
+    def apply_updates(self) -> CompiledGraph:
+        """Build the compiled graph the searches use: the compiled plan with the updates applied,
+        and the structures of the queries (see prepare_queries). The derived arrays (data of the
+        heuristics) are the ones of the plan. The new compiled graph replaces the previous one
+        once it is ready, a search that is running keeps the one it started with.
+
+        :returns: The compiled graph.
+        """
+        plan = self._plan_compiled
+        compiled = self.updates.apply(plan) if self.updates else plan
+        self.lowered = bool(self.updates) and self.updates.lowers_weights(plan)
+        self.prepare_queries(compiled)
+        self._compiled = compiled
+        self.version = next(_versions)
+        return compiled
+
+    @property
+    def is_updated(self) -> bool:
+        """Check if the weights of the searches are not the weights of the plan."""
+        return self._compiled is not self._plan_compiled
+
+    def update(
+        self,
+        close_nodes: Iterable[str] = (),
+        open_nodes: Iterable[str] = (),
+        close_edges: Iterable[Edge] = (),
+        open_edges: Iterable[Edge] = (),
+        weights: Optional[Dict[Edge, Optional[float]]] = None,
+    ) -> Set[Edge]:
+        """Close or reopen nodes and edges and override weights, without reloading the graph.
+        The changes are applied together: the searches see all of them or none of them.
+
+        :param close_nodes: Nodes (or names of nodes) to close, no route goes through them.
+        :param open_nodes: Closed nodes to reopen.
+        :param close_edges: Edges (source, target) to close.
+        :param open_edges: Closed edges to reopen.
+        :param weights: New weight of some edges, None resets the weight of the plan.
+        :raises ValueError: If a node or an edge is not in the graph or a weight is negative,
+            nothing is changed then.
+        :returns: The edges whose weight increased. If no weight decreased, the routes that do not
+            use them are still the shortest ones, otherwise routes_version changes.
+        """
+        close_nodes = [self.get_node(node) for node in close_nodes]
+        open_nodes = [self.get_node(node) for node in open_nodes]
+        close_edges = [self.get_edge(edge) for edge in close_edges]
+        open_edges = [self.get_edge(edge) for edge in open_edges]
+        weights = {self.get_edge(edge): weight for edge, weight in (weights or {}).items()}
+        if any(weight is not None and not weight >= 0 for weight in weights.values()):
+            raise ValueError("The weights must be positive numbers.")
+        with _updates_lock:
+            previous = self.compiled
+            # A copy is edited: the updates handed to other threads or processes never change
+            updates = self.updates.copy() if self.updates else GraphUpdates()
+            updates.closed_nodes.update(close_nodes)
+            updates.closed_nodes.difference_update(open_nodes)
+            updates.closed_edges.update(close_edges)
+            updates.closed_edges.difference_update(open_edges)
+            for edge, weight in weights.items():
+                if weight is None:
+                    updates.weights.pop(edge, None)
+                else:
+                    updates.weights[edge] = float(weight)
+            self.updates = updates
+            compiled = self.apply_updates()
+            increased: Set[Edge] = set()
+            decreased = False
+            for source in range(len(compiled)):
+                for edge in range(compiled.offsets[source], compiled.offsets[source + 1]):
+                    if compiled.weights[edge] > previous.weights[edge]:
+                        increased.add((compiled.ids[source], compiled.ids[compiled.targets[edge]]))
+                    elif compiled.weights[edge] < previous.weights[edge]:
+                        decreased = True
+            if decreased:
+                self.routes_version = next(_versions)
+            return increased
+
+    def get_node(self, node: str) -> str:
+        """Get a node of the graph from its id or its name.
+
+        :raises ValueError: If there is no such node.
+        """
+        return node if self.is_in_graph(node) else self.find_node(node)
+
+    def get_edge(self, edge: Edge) -> Edge:
+        """Get an edge of the graph from the ids or the names of its nodes.
+
+        :raises ValueError: If there is no such edge.
+        """
+        source, target = self.get_node(edge[0]), self.get_node(edge[1])
+        if not self.has_edge(source, target):
+            raise ValueError(f"There is no edge {source} -> {target} in the graph {self.name}")
+        return (source, target)
+
+    def prepare_queries(self, compiled: CompiledGraph) -> None:
+        """Build the structures the searches use on top of a compiled graph (e.g: the weight
+        profiles). They depend on the weights so they are built again after each update.
+        Subclasses can extend it.
+
+        :param compiled: The compiled graph, with the updates.
+        """
+        self.add_profiles(compiled)
+
+    def add_profiles(self, compiled: CompiledGraph) -> None:
+        """Add the weight profiles of PROFILES to the compiled graph: the edges from or to a node
+        the profile avoids get an infinite weight, the other ones keep their weight.
+
+        :param compiled: The compiled graph.
+        """
+        types = [self.nodes[node].get(NodeAttributes.TYPE) for node in compiled.ids]
+        offsets, targets, weights = compiled.get_arrays()
+        for name, avoided in self.PROFILES.items():
+            is_avoided = [node_type in avoided for node_type in types]
+            if not any(is_avoided):
+                compiled.add_profile(name)  # Shares the weights of the graph
+                continue
+            profile_weights = [
+                float("inf") if is_avoided[source] or is_avoided[targets[edge]] else weights[edge]
+                for source in range(len(compiled))
+                for edge in range(offsets[source], offsets[source + 1])
+            ]
+            compiled.add_profile(name, profile_weights)
+
+    def prepare_compiled(self, compiled: CompiledGraph) -> None:
+        """Derive data from the compiled graph (e.g: data of the heuristic).
+        Subclasses override it, the derived arrays should be listed in SNAPSHOT_ARRAYS.
+
+        :param compiled: The compiled graph.
+        """
+
+    def save_snapshot(self, path: str) -> str:
+        """Save the graph in a binary snapshot next to the json file it was loaded from.
+
+        :param path: Path of the json file of the graph.
+        :returns: The path of the snapshot.
+        """
+        self.get_compiled()  # Compile the graph if needed
+        compiled = self._plan_compiled  # The updates are not saved
+        meta = {"type": self.type, "name": self.name}
+        meta.update({attr: getattr(self, attr) for attr in self.SNAPSHOT_ATTRIBUTES})
+        nodes = [self.nodes[node] for node in compiled.ids]
+        edges = [
+            self.edges[source, compiled.ids[compiled.targets[edge]]]
+            for source_idx, source in enumerate(compiled.ids)
+            for edge in range(compiled.offsets[source_idx], compiled.offsets[source_idx + 1])
+        ]
+        arrays = {attr: getattr(self, attr) for attr in self.SNAPSHOT_ARRAYS}
+        snapshot = Snapshot(meta, compiled, nodes, edges, arrays)
+        snapshot_path = get_snapshot_path(path)
+        write_snapshot(snapshot_path, get_file_hash(path), snapshot)
+        return snapshot_path
+
+    def load_snapshot(self, path: str) -> bool:
+        """Load the graph from its snapshot if it is up to date with the json file.
+
+        :param path: Path of the json file of the graph.
+        :returns: True if the graph was loaded from the snapshot, False if it must be loaded from
+            the json file (no snapshot, or built from another version of the file).
+        """
+        snapshot_path = get_snapshot_path(path)
+        snapshot = read_snapshot(snapshot_path, get_file_hash(path))
+        if snapshot is None or snapshot.meta.get("type") != self.type:
+            return False
+        if any(attr not in snapshot.meta for attr in self.SNAPSHOT_ATTRIBUTES):
+            return False  # Written before new attributes were added
+        self.add_nodes_from(zip(snapshot.compiled.ids, snapshot.nodes))
+        self.add_edges_from(snapshot.get_edges())
+        for attr in self.SNAPSHOT_ATTRIBUTES:
+            setattr(self, attr, snapshot.meta[attr])
+        # Derive the arrays again if the snapshot does not have all of them
+        has_arrays = all(attr in snapshot.arrays for attr in self.SNAPSHOT_ARRAYS)
+        self.set_compiled(snapshot.compiled, snapshot.arrays if has_arrays else None)
+        self.snapshot_path = snapshot_path
+        return True
+
+    def nbytes(self) -> int:
+        """Estimate of the memory used by the graph: the compiled arrays, the derived arrays, the
+        networkx dicts and the attributes of the nodes and of the edges (shallow sizes of the
+        values).
+        """
+        size = self.compiled.nbytes()
+        if self.is_updated:  # Weights of the plan
+            size += 2 * self._plan_compiled.weights.itemsize * self._plan_compiled.n_edges
+        for attr in self.SNAPSHOT_ARRAYS:
+            values = getattr(self, attr)
+            size += values.itemsize * len(values)
+        for node, data in self.nodes(data=True):
+            size += sys.getsizeof(node) + sys.getsizeof(data)
+            size += sum(sys.getsizeof(value) for value in data.values())
+            size += sys.getsizeof(self._succ[node]) + sys.getsizeof(self._pred[node])
+        for _, _, data in self.edges(data=True):
+            size += sys.getsizeof(data) + sum(sys.getsizeof(value) for value in data.values())
+        return size
+
+    def get_heuristic(self, targets: List[int]) -> Optional[Callable[[int], float]]:
+        """Get a lower bound of the distance from a node to the closest target for the A* search.
+
+        :param targets: Integer ids (in the compiled graph) of the targets.
+        :returns: A function giving the lower bound of a node (integer id), or None if the graph
+            has no heuristic (the search is then a plain Dijkstra).
+        """
+        return None
+
+    @property
+    def name_index(self) -> NameIndex:
+        """Index of the names and aliases of the nodes (built on first use)."""
+        if self._name_index is None:
+            return self.build_name_index()
+        return self._name_index
+
+    def build_name_index(self) -> NameIndex:
+        """(Re)build the index of the names and aliases of the nodes.
+
+        :returns: The index.
+        """
+        index = NameIndex()
+        for node, data in self.nodes(data=True):
+            if NodeAttributes.NAME in data:
+                index.add(node, data[NodeAttributes.NAME], data.get(NodeAttributes.ALIASES, []))
+        self._name_index = index
+        return index
+
     def find_node(self, name: str) -> str:
-        """Find a node by its name.
+        """Find a node by its name or one of its aliases (the lookup ignores case and accents).
 
         :param name: The name of the node.
         :raises ValueError: If the name is not in the graph.
         :returns: The node of the graph.
         """
-        for node in self.nodes:
-            if self.nodes[node][NodeAttributes.NAME] == name:
-                return node
-        raise ValueError(f"Invalid name: {name} for node in", self.__class__.__name__)
+        try:
+            return self.name_index.get(name)
+        except KeyError:
+            raise ValueError(f"Invalid name: {name} for node in", self.__class__.__name__) from None
 
     def is_in_graph(self, node: str) -> bool:
         """Check if a node is in the graph.
@@ -0,0 +1,346 @@
+"""Contraction hierarchy of a graph.
+
+:Date: 18/10/2026
+:Description: Preprocessing that speeds up the point to point queries on a static graph (the
+outside graph). The nodes are contracted one by one, from the least to the most important: when a
+node is removed, a shortcut edge u -> w is added for each path u -> node -> w that is the only
+shortest path between u and w in the remaining graph. The rank of a node is the order in which it
+was contracted. A query is a bidirectional search that only follows the edges going to a node of
+higher rank (upward from the source, and backward from the target), so it only explores a small
+part of the graph. The shortcuts of the path found are then unpacked into the edges of the graph.
+The hierarchy is saved in a file in the snapshot format next to the json file of the graph, see
+utils/build_hierarchy.py.
+"""
+
+import json
+import os
+import threading
+from array import array
+from heapq import heappop, heappush
+from typing import Dict, List, Optional, Set, Tuple
+
+from .compiled import INDEX, WEIGHT, CompiledGraph, SearchWorkspace
+from .snapshot import read_sections, write_sections
+
+EXTENSION = ".ch"
+INF = float("inf")
+
+# Sections of the arrays of the hierarchy and their type code
+ARRAYS = {
+    b"RANK": ("ranks", INDEX),
+    b"UOFF": ("up_offsets", INDEX),
+    b"UTRG": ("up_targets", INDEX),
+    b"UWGT": ("up_weights", WEIGHT),
+    b"UMID": ("up_middles", INDEX),
+    b"DOFF": ("down_offsets", INDEX),
+    b"DTRG": ("down_sources", INDEX),
+    b"DWGT": ("down_weights", WEIGHT),
+    b"DMID": ("down_middles", INDEX),
+}
+
+# (source, target, weight, middle node of the shortcut or -1 for an edge of the graph)
+Edge = Tuple[int, int, float, int]
+
+
+def get_hierarchy_path(path: str) -> str:
+    """Path of the hierarchy of a json file (next to it, e.g: map.json -> map.ch)."""
+    return os.path.splitext(path)[0] + EXTENSION
+
+
+class ContractionHierarchy:
+    """Upward and downward graphs of a contraction hierarchy and the queries on them."""
+
+    def __init__(
+        self,
+        ids: List[str],
+        ranks: array,
+        up_offsets: array,
+        up_targets: array,
+        up_weights: array,
+        up_middles: array,
+        down_offsets: array,
+        down_sources: array,
+        down_weights: array,
+        down_middles: array,
+    ) -> None:
+        """Constructor of the class.
+
+        :param ids: Id of each node, in the order of the compiled graph.
+        :param ranks: Contraction order of each node.
+        :param up_offsets: CSR offsets of the edges u -> w with rank[u] < rank[w], by u.
+        :param up_targets: Target of each upward edge.
+        :param up_weights: Weight of each upward edge.
+        :param up_middles: Contracted node of each upward shortcut (-1 for an edge of the graph).
+        :param down_offsets: CSR offsets of the edges u -> w with rank[u] > rank[w], by w.
+        :param down_sources: Source of each downward edge.
+        :param down_weights: Weight of each downward edge.
+        :param down_middles: Contracted node of each downward shortcut (-1 for an edge of the
+            graph).
+        """
+        self.ids = ids
+        self.index: Dict[str, int] = {node: idx for idx, node in enumerate(ids)}
+        self.ranks = ranks
+        self.up_offsets, self.up_targets = up_offsets, up_targets
+        self.up_weights, self.up_middles = up_weights, up_middles
+        self.down_offsets, self.down_sources = down_offsets, down_sources
+        self.down_weights, self.down_middles = down_weights, down_middles
+        # (source, target) of each shortcut -> contracted node, used to unpack the paths
+        self.shortcuts: Dict[Tuple[int, int], int] = {}
+        for source in range(len(ids)):
+            for edge in range(up_offsets[source], up_offsets[source + 1]):
+                if up_middles[edge] >= 0:
+                    self.shortcuts[source, up_targets[edge]] = up_middles[edge]
+            for edge in range(down_offsets[source], down_offsets[source + 1]):
+                if down_middles[edge] >= 0:
+                    self.shortcuts[down_sources[edge], source] = down_middles[edge]
+        self.workspaces = threading.local()
+        self.settled = 0  # Number of nodes expanded by the last query
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def n_shortcuts(self) -> int:
+        return len(self.shortcuts)
+
+    @classmethod
+    def build(cls, graph: CompiledGraph, witness_limit: int = 500) -> "ContractionHierarchy":
+        """Contract the nodes of a graph.
+        The nodes are contracted by increasing edge difference (shortcuts added minus edges
+        removed) plus the number of their neighbors already contracted, which spreads the
+        contractions over the graph. The priorities are updated lazily.
+
+        :param graph: The compiled graph.
+        :param witness_limit: Maximum number of nodes settled by a witness search. A witness
+            search that stops early adds a shortcut that might not be needed, it is never wrong.
+        :return: The hierarchy.
+        """
+        n = len(graph)
+        # Remaining graph: out_edges[u][w] = in_edges[w][u] = (weight, middle)
+        out_edges: List[Dict[int, Tuple[float, int]]] = [{} for _ in range(n)]
+        in_edges: List[Dict[int, Tuple[float, int]]] = [{} for _ in range(n)]
+        for source in range(n):
+            for edge in range(graph.offsets[source], graph.offsets[source + 1]):
+                target, weight = graph.targets[edge], graph.weights[edge]
+                if target != source and weight < out_edges[source].get(target, (INF,))[0]:
+                    out_edges[source][target] = in_edges[target][source] = (weight, -1)
+        edges: List[Edge] = []  # Edges of the hierarchy
+        ranks = [-1] * n
+        contracted_neighbors = [0] * n
+
+        def get_shortcuts(node: int) -> List[Tuple[int, int, float]]:
+            shortcuts = []
+            for source, (in_weight, _) in in_edges[node].items():
+                targets = {
+                    target: in_weight + out_weight
+                    for target, (out_weight, _) in out_edges[node].items()
+                    if target != source
+                }
+                if not targets:
+                    continue
+                witnesses = cls.witness_search(
+                    out_edges, source, node, max(targets.values()), set(targets), witness_limit
+                )
+                shortcuts += [
+                    (source, target, length)
+                    for target, length in targets.items()
+                    if witnesses.get(target, INF) > length
+                ]
+            return shortcuts
+
+        def get_priority(node: int, shortcuts: List[Tuple[int, int, float]]) -> int:
+            removed = len(in_edges[node]) + len(out_edges[node])
+            return len(shortcuts) - removed + contracted_neighbors[node]
+
+        heap = [(get_priority(node, get_shortcuts(node)), node) for node in range(n)]
+        heap.sort()
+        rank = 0
+        while heap:
+            _, node = heappop(heap)
+            shortcuts = get_shortcuts(node)
+            priority = get_priority(node, shortcuts)
+            if heap and priority > heap[0][0]:
+                heappush(heap, (priority, node))  # Lazy update of the priority
+                continue
+            for source, target, length in shortcuts:
+                if length < out_edges[source].get(target, (INF,))[0]:
+                    out_edges[source][target] = in_edges[target][source] = (length, node)
+            # The node leaves the remaining graph, its edges go in the hierarchy
+            for target, (weight, middle) in out_edges[node].items():
+                edges.append((node, target, weight, middle))
+                del in_edges[target][node]
+                contracted_neighbors[target] += 1
+            for source, (weight, middle) in in_edges[node].items():
+                edges.append((source, node, weight, middle))
+                del out_edges[source][node]
+                contracted_neighbors[source] += 1
+            out_edges[node], in_edges[node] = {}, {}
+            ranks[node] = rank
+            rank += 1
+        up = [edge for edge in edges if ranks[edge[0]] < ranks[edge[1]]]
+        # The downward edges are grouped by their target: the backward search follows them from
+        # their target to their source.
+        down = [(t, s, w, m) for s, t, w, m in edges if ranks[s] > ranks[t]]
+        return cls(graph.ids, array(INDEX, ranks), *cls.to_csr(n, up), *cls.to_csr(n, down))
+
+    @staticmethod
+    def witness_search(
+        out_edges: List[Dict[int, Tuple[float, int]]],
+        source: int,
+        excluded: int,
+        max_distance: float,
+        targets: Set[int],
+        limit: int,
+    ) -> Dict[int, float]:
+        """Search the paths from source that avoid a node in the remaining graph.
+
+        :param out_edges: Edges of the remaining graph.
+        :param source: Node where the search starts.
+        :param excluded: The node that is contracted.
+        :param max_distance: The search stops after this distance.
+        :param targets: The search stops once they are all settled.
+        :param limit: The search stops after settling this number of nodes.
+        :return: The distance of the reached nodes (an upper bound if the search stopped early).
+        """
+        dist_to = {source: 0.0}
+        heap = [(0.0, source)]
+        pending = set(targets)
+        settled = 0
+        while heap and pending and settled < limit:
+            distance, idx = heappop(heap)
+            if distance > dist_to[idx]:
+                continue
+            if distance > max_distance:
+                break
+            settled += 1
+            pending.discard(idx)
+            for neighbor, (weight, _) in out_edges[idx].items():
+                if neighbor != excluded and distance + weight < dist_to.get(neighbor, INF):
+                    dist_to[neighbor] = distance + weight
+                    heappush(heap, (distance + weight, neighbor))
+        return dist_to
+
+    @staticmethod
+    def to_csr(n: int, edges: List[Edge]) -> Tuple[array, array, array, array]:
+        """Build the (offsets, targets, weights, middles) arrays of edges."""
+        edges = sorted(edges, key=lambda edge: edge[0])
+        offsets, targets, weights = CompiledGraph.to_csr(n, [edge[:3] for edge in edges])
+        return offsets, targets, weights, array(INDEX, [edge[3] for edge in edges])
+
+    def get_workspace(self, backward: bool = False) -> SearchWorkspace:
+        """Get a search workspace of the calling thread (see CompiledGraph.get_workspace)."""
+        name = "backward" if backward else "forward"
+        workspace = getattr(self.workspaces, name, None)
+        if workspace is None:
+            workspace = SearchWorkspace(len(self))
+            setattr(self.workspaces, name, workspace)
+        return workspace
+
+    def query(self, source: str, target: str) -> Tuple[float, List[str]]:
+        """Shortest path between two nodes.
+
+        :param source: The id of the source node.
+        :param target: The id of the target node.
+        :return: The distance and the path (with the nodes of the graph, the shortcuts are
+            unpacked), inf and an empty path if the target cannot be reached.
+        """
+        src, trg = self.index[source], self.index[target]
+        forward, backward = self.get_workspace(), self.get_workspace(backward=True)
+        sides = [
+            (forward, backward, (self.up_offsets, self.up_targets, self.up_weights)),
+            (backward, forward, (self.down_offsets, self.down_sources, self.down_weights)),
+        ]
+        for workspace, root in ((forward, src), (backward, trg)):
+            generation = workspace.start()
+            workspace.stamps[root], workspace.dist_to[root] = generation, 0.0
+            workspace.predecessor[root] = -1
+            workspace.heap.append((0.0, root))
+        best, meeting = INF, -1
+        self.settled = 0
+
+        side = 0
+        # Each search is upward only, so it can only stop when its own heap reaches the best path
+        while (forward.heap and forward.heap[0][0] < best) or (
+            backward.heap and backward.heap[0][0] < best
+        ):
+            workspace, other, (offsets, adjacent, weights) = sides[side]
+            side = 1 - side  # The directions are expanded in turn
+            heap = workspace.heap
+            if not heap or heap[0][0] >= best:
+                continue
+            dist_to, predecessor, stamps = workspace.dist_to, workspace.predecessor, workspace.stamps
+            generation = workspace.generation
+            distance, idx = heappop(heap)
+            if distance > dist_to[idx]:
+                continue
+            self.settled += 1
+            if other.is_reached(idx) and distance + other.dist_to[idx] < best:
+                best, meeting = distance + other.dist_to[idx], idx
+            for edge in range(offsets[idx], offsets[idx + 1]):
+                neighbor = adjacent[edge]
+                new_distance_neighbor = distance + weights[edge]
+                if stamps[neighbor] != generation:  # First time the node is reached
+                    stamps[neighbor] = generation
+                elif dist_to[neighbor] <= new_distance_neighbor:
+                    continue
+                dist_to[neighbor] = new_distance_neighbor
+                predecessor[neighbor] = idx
+                heappush(heap, (new_distance_neighbor, neighbor))
+        if meeting < 0:
+            return (INF, [])
+        path = [meeting]  # Nodes of the hierarchy from the source to the target
+        while path[-1] != src:
+            path.append(forward.predecessor[path[-1]])
+        path.reverse()
+        while path[-1] != trg:
+            path.append(backward.predecessor[path[-1]])
+        return (best, [self.ids[idx] for idx in self.unpack(path)])
+
+    def unpack(self, path: List[int]) -> List[int]:
+        """Replace the shortcuts of a path of the hierarchy by the edges they stand for.
+
+        :param path: The path in the hierarchy.
+        :return: The path in the graph.
+        """
+        unpacked = path[:1]
+        for source, target in zip(path, path[1:]):
+            stack = [(source, target)]
+            while stack:
+                source, target = stack.pop()
+                middle = self.shortcuts.get((source, target))
+                if middle is None:
+                    unpacked.append(target)
+                else:
+                    stack += [(middle, target), (source, middle)]
+        return unpacked
+
+    def save(self, path: str, source_hash: bytes) -> None:
+        """Save the hierarchy.
+
+        :param path: Path of the file.
+        :param source_hash: sha256 of the json file of the graph.
+        """
+        sections = [
+            (b"META", json.dumps({"type": self.__class__.__name__}).encode()),
+            (b"IDS_", "\0".join(self.ids).encode()),
+        ]
+        sections += [(name, getattr(self, attr).tobytes()) for name, (attr, _) in ARRAYS.items()]
+        write_sections(path, source_hash, sections)
+
+    @classmethod
+    def load(cls, path: str, source_hash: bytes) -> Optional["ContractionHierarchy"]:
+        """Load a hierarchy, its arrays are views of a memory map of the file.
+
+        :param path: Path of the file.
+        :param source_hash: sha256 of the json file of the graph.
+        :return: The hierarchy, or None if there is no (valid and up to date) hierarchy.
+        """
+        sections = read_sections(path, source_hash)
+        if sections is None:
+            return None
+        if json.loads(bytes(sections[b"META"])).get("type") != cls.__name__:
+            return None
+        ids_data = bytes(sections[b"IDS_"]).decode()
+        ids = ids_data.split("\0") if ids_data else []
+        arrays = {attr: sections[name].cast(code) for name, (attr, code) in ARRAYS.items()}
+        return cls(ids, **arrays)
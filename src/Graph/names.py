@@ -0,0 +1,123 @@
+"""Index of the names of the nodes of a graph.
+
+:Date: 18/10/2026
+:Description: Hash index from the (normalised) names and aliases of the nodes to the nodes, plus
+a sorted prefix index and a trigram index used to autocomplete room names.
+"""
+
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+SEPARATORS = re.compile(r"[\s._\-/]+")
+
+
+def normalize(name: str) -> str:
+    """Normalise a name so lookups ignore the case, the accents and the separators
+    (P1.2.301, p1 2 301 and P1-2-301 are the same name).
+
+    :param name: The name to normalise.
+    :return: The normalised name.
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return SEPARATORS.sub(" ", stripped.casefold()).strip()
+
+
+def get_trigrams(key: str) -> Set[str]:
+    """Get the trigrams of a normalised name (padded so the beginning counts more)."""
+    padded = f"  {key} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """Index of names and aliases to nodes."""
+
+    def __init__(self) -> None:
+        self.nodes: Dict[str, Hashable] = {}  # normalised name -> node
+        self.labels: Dict[str, str] = {}  # normalised name -> name as given
+        # Structures of the autocompletion, (re)built by the first search after a change
+        self.trigrams: Dict[str, Set[str]] = {}  # trigram -> normalised names
+        self.sorted_keys: List[str] = []
+        self.is_searchable = True
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __contains__(self, name: str) -> bool:
+        return normalize(name) in self.nodes
+
+    def add(self, node: Hashable, name: str, aliases: Iterable[str] = ()) -> None:
+        """Add a node with its name and its aliases.
+        When several nodes share a name, the first one added is kept.
+
+        :param node: The node.
+        :param name: The name of the node.
+        :param aliases: Other names of the node.
+        """
+        for label in [name, *aliases]:
+            key = normalize(label)
+            if not key or key in self.nodes:
+                continue
+            self.nodes[key] = node
+            self.labels[key] = label
+            self.is_searchable = False
+
+    def get(self, name: str) -> Hashable:
+        """Get the node of a name or of an alias.
+
+        :param name: The name to look for.
+        :raises KeyError: If the name is not in the index.
+        :return: The node.
+        """
+        return self.nodes[normalize(name)]
+
+    def prepare_search(self) -> None:
+        """Build the sorted keys (prefix search) and the trigram index of the names."""
+        self.sorted_keys = sorted(self.nodes)
+        self.trigrams = {}
+        for key in self.nodes:
+            for trigram in get_trigrams(key):
+                self.trigrams.setdefault(trigram, set()).add(key)
+        self.is_searchable = True
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, Hashable]]:
+        """Autocomplete a query. Names starting by the query come first (in alphabetical order),
+        then the names that share the most trigrams with it.
+
+        :param query: The beginning (or a part) of a name.
+        :param limit: Maximum number of results.
+        :return: A list of (name, node).
+        """
+        key = normalize(query)
+        if not key or limit <= 0:
+            return []
+        if not self.is_searchable:
+            self.prepare_search()
+        results: List[str] = []
+        idx = bisect_left(self.sorted_keys, key)
+        while (
+            idx < len(self.sorted_keys)
+            and len(results) < limit
+            and self.sorted_keys[idx].startswith(key)
+        ):
+            results.append(self.sorted_keys[idx])
+            idx += 1
+        if len(results) < limit and len(key) >= 3:
+            found = set(results)
+            trigrams = get_trigrams(key)
+            scores = Counter(
+                candidate
+                for trigram in trigrams
+                for candidate in self.trigrams.get(trigram, ())
+                if candidate not in found
+            )
+            # Keep the candidates sharing at least half of the trigrams of the query
+            ranked = sorted(
+                (candidate for candidate, score in scores.items() if 2 * score >= len(trigrams)),
+                key=lambda candidate: (-scores[candidate], candidate),
+            )
+            results += ranked[: limit - len(results)]
+        return [(self.labels[result], self.nodes[result]) for result in results]
@@ -1,10 +1,18 @@
 import json
-from typing import Any, Dict, List, Tuple
+import logging
+import math
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-import geopy.distance
 from typing_extensions import override
 
+from .compiled import CompiledGraph
 from .graph import EdgeAttributes, Graph, GraphTypes, NodeAttributes
+from .hierarchy import ContractionHierarchy, get_hierarchy_path
+from .snapshot import get_file_hash
+from .spatial import EARTH_RADIUS, SpatialIndex, haversine
+
+logger = logging.getLogger(__name__)
 
 
 class ONodeAttributes(NodeAttributes):
@@ -13,12 +21,22 @@ class ONodeAttributes(NodeAttributes):
 
 
 class OutsideGraph(Graph):
+    SNAPSHOT_ATTRIBUTES = ["heuristic_scale"]
+    SNAPSHOT_ARRAYS = ["phis", "lambdas", "cos_phis"]
+
     def __init__(self, path=None):
         super(OutsideGraph, self).__init__()
 
         self.COLORS = {"road": "#84DCC6", "exit": "#FF686B"}
         self.PREFIXES = {"c": "road", "e": "exit"}
         self.graph_type = GraphTypes.OUTSIDE
+        self.spatial_index = SpatialIndex([])
+        # Coordinates in radians of the nodes of the compiled graph, used by the A* heuristic
+        self.phis, self.lambdas, self.cos_phis = array("d"), array("d"), array("d")
+        self.heuristic_scale = 1.0
+        # Contraction hierarchy of the graph, loaded by the API if it has been built (see
+        # load_hierarchy)
+        self.hierarchy: Optional[ContractionHierarchy] = None
         self.load_graph(path) if path else None
 
     @override
@@ -40,12 +58,92 @@ class OutsideGraph(Graph):
     @override
     def load_graph(self, path: str) -> None:
         self.name = self.get_graph_name(path)
-        print(f"Campus graph {self.name} created.")
-        campus_data = json.load(open(path))
-        campus_name = list(campus_data.keys())[0]
-        nodes = list(campus_data[campus_name])
-        for node in nodes:
-            self.add_node_(node)
+        logger.info("Campus graph %s created.", self.name)
+        if not self.load_snapshot(path):
+            campus_data = json.load(open(path))
+            campus_name = list(campus_data.keys())[0]
+            nodes = list(campus_data[campus_name])
+            for node in nodes:
+                self.add_node_(node)
+            self.compile()
+
+    @override
+    def compile(self) -> CompiledGraph:
+        self.hierarchy = None  # It was built for the previous version of the graph
+        return super().compile()
+
+    @override
+    def apply_updates(self) -> CompiledGraph:
+        compiled = super().apply_updates()
+        self.build_spatial_index()  # The users are not snapped to the closed nodes
+        return compiled
+
+    def load_hierarchy(self, path: str) -> bool:
+        """Load the contraction hierarchy of the graph if it is up to date with the json file.
+
+        :param path: Path of the json file of the graph.
+        :returns: True if the hierarchy was loaded.
+        """
+        hierarchy = ContractionHierarchy.load(get_hierarchy_path(path), get_file_hash(path))
+        if hierarchy is not None and set(hierarchy.ids) != set(self.nodes):
+            hierarchy = None
+        self.hierarchy = hierarchy
+        return hierarchy is not None
+
+    def save_hierarchy(self, path: str) -> str:
+        """Build the contraction hierarchy of the graph and save it next to the json file.
+
+        :param path: Path of the json file of the graph.
+        :returns: The path of the hierarchy.
+        """
+        self.hierarchy = ContractionHierarchy.build(self.compiled)
+        hierarchy_path = get_hierarchy_path(path)
+        self.hierarchy.save(hierarchy_path, get_file_hash(path))
+        return hierarchy_path
+
+    @override
+    def prepare_compiled(self, compiled: CompiledGraph) -> None:
+        positions = [self.get_lat_long(node) for node in compiled.ids]
+        self.phis = array("d", [math.radians(lat) for lat, _ in positions])
+        self.lambdas = array("d", [math.radians(long) for _, long in positions])
+        self.cos_phis = array("d", [math.cos(phi) for phi in self.phis])
+        # The weights are rounded geodesic distances, they can be a bit shorter than the haversine
+        # distance. The heuristic is scaled by the smallest weight / distance ratio of the edges so
+        # it never overestimates the length of a path (it stays admissible and consistent).
+        self.heuristic_scale = 1.0
+        for source, target, weight in self.edges(data=EdgeAttributes.WEIGHT):
+            distance = haversine(*self.get_lat_long(source), *self.get_lat_long(target))
+            if distance > 0:
+                self.heuristic_scale = min(self.heuristic_scale, weight / distance)
+
+    @override
+    def get_heuristic(self, targets: List[int]) -> Optional[Callable[[int], float]]:
+        """Straight line (haversine) distance to the closest target."""
+        phis, lambdas, cos_phis = self.phis, self.lambdas, self.cos_phis
+        scale = 2 * EARTH_RADIUS * max(self.heuristic_scale, 0.0)
+        positions = [(phis[target], lambdas[target], cos_phis[target]) for target in targets]
+        if not positions:
+            return None
+        sin, asin, sqrt = math.sin, math.asin, math.sqrt
+
+        def heuristic(idx: int) -> float:
+            phi, lambda_, cos_phi = phis[idx], lambdas[idx], cos_phis[idx]
+            # The haversine distance grows with a, it is computed only for the closest target
+            a = min(
+                sin((t_phi - phi) / 2) ** 2
+                + cos_phi * t_cos_phi * sin((t_lambda - lambda_) / 2) ** 2
+                for t_phi, t_lambda, t_cos_phi in positions
+            )
+            return scale * asin(min(1.0, sqrt(a)))
+
+        return heuristic
+
+    def build_spatial_index(self) -> None:
+        """(Re)build the spatial index used to find the closest nodes to a position."""
+        closed = self.updates.closed_nodes if self.updates else set()
+        self.spatial_index = SpatialIndex(
+            (node, *self.get_lat_long(node)) for node in self.nodes if node not in closed
+        )
 
     @override
     def add_node_(self, node_data: Dict[str, Any]) -> None:
@@ -79,19 +177,13 @@ class OutsideGraph(Graph):
         Method to find the closest node to a given position
         :param position: tuple (latitude, longitude) representing the position
         """
-        distance_min = float("inf")
-        lat_s, long_s = position[0], position[1]
-        closest_node = ""
-        for node in self.nodes():
-            # compute the distance between the node and the position
-            # if distance is less than 5m then return the node else return
-            # the closest node
-            lat_n = self.nodes[node][ONodeAttributes.LATITUDE]
-            long_n = self.nodes[node][ONodeAttributes.LONGITUDE]
-            distance = round(geopy.distance.geodesic((lat_s, long_s), (lat_n, long_n)).m)
-            if distance <= 5:
-                return node
-            if distance < distance_min:
-                distance_min = distance
-                closest_node = node
-        return closest_node
+        return self.spatial_index.nearest(position)
+
+    def find_closest_nodes(self, position: Tuple, k: int) -> List[Tuple[float, str]]:
+        """
+        Method to find the k closest nodes to a given position
+        :param position: tuple (latitude, longitude) representing the position
+        :param k: number of nodes to find
+        :return: list of (distance in meters, node) sorted by distance
+        """
+        return self.spatial_index.k_nearest(position, k)
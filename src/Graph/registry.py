@@ -0,0 +1,194 @@
+"""Registry of the building graphs.
+
+:Date: 18/10/2026
+:Description: The buildings are found in the data directories (one folder per building with a
+<building>.json plan) but their graphs are only loaded on first use. The loaded graphs are kept in
+LRU order and the least recently used ones are evicted when their estimated memory footprint goes
+over a budget, together with the structures built on them (e.g: the campus graph, see reserve).
+An evicted graph is loaded again (from its snapshot if there is one) the next time
+it is used.
+A graph that had to be loaded from its json file is saved in a snapshot, so the next loads (in
+this process or in the other workers) map the snapshot and share its arrays.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from .b_graph import BuildingGraph
+from .graph import Graph
+
+logger = logging.getLogger(__name__)
+
+
+def save_snapshot(graph: Graph, path: str) -> Optional[str]:
+    """Save the snapshot of a graph, it is not an error if the data directory is read-only.
+
+    :param graph: The graph.
+    :param path: Path of the json file of the graph.
+    :return: The path of the snapshot, or None if it could not be written.
+    """
+    try:
+        return graph.save_snapshot(path)
+    except OSError as error:
+        logger.warning("Snapshot of %s not saved: %s", graph.name, error)
+        return None
+
+
+class GraphRegistry:
+    """Lazy, memory bounded store of building graphs."""
+
+    def __init__(
+        self,
+        directories: List[str],
+        max_bytes: int = 256 * 2**20,
+        on_evict: Optional[Callable[[str], None]] = None,
+        write_snapshots: bool = True,
+        on_load: Optional[Callable[[str, BuildingGraph], None]] = None,
+    ) -> None:
+        """Constructor of the class.
+
+        :param directories: Directories containing a folder for each building.
+        :param max_bytes: Memory budget of the loaded graphs (the most recently used graph is
+            always kept, even if it is bigger than the budget).
+        :param on_evict: Called with the name of a building when its graph is evicted, so the
+            structures built on it (e.g: the campus graph) can be dropped too.
+        :param write_snapshots: Save the snapshot of the graphs loaded from their json file.
+        :param on_load: Called with the name of a building and its graph when the graph is loaded
+            (after its snapshot is saved), e.g: to apply the live updates of the building again.
+        """
+        self.directories = directories
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self.write_snapshots = write_snapshots
+        self.on_load = on_load
+        self.graphs: "OrderedDict[str, BuildingGraph]" = OrderedDict()
+        self.sizes: Dict[str, int] = {}  # Estimated memory footprint of each loaded graph
+        # Estimated memory footprint of the structures built on the loaded graphs (see reserve)
+        self.reserved: Dict[str, int] = {}
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.loads = 0
+        self.load_time = 0.0
+        self.evictions = 0
+
+    def get_path(self, building: str) -> Optional[str]:
+        """Get the path of the plan of a building (None if there is no such building)."""
+        for directory in self.directories:
+            path = os.path.join(directory, building, f"{building}.json")
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def list_buildings(self) -> List[str]:
+        """Get the names of the buildings of the data directories, without loading them."""
+        buildings = set()
+        for directory in self.directories:
+            if not os.path.isdir(directory):
+                continue
+            for building in os.listdir(directory):
+                if os.path.isfile(os.path.join(directory, building, f"{building}.json")):
+                    buildings.add(building)
+        return sorted(buildings)
+
+    def __contains__(self, building: str) -> bool:
+        return building in self.graphs or self.get_path(building) is not None
+
+    def __getitem__(self, building: str) -> BuildingGraph:
+        return self.get(building)
+
+    def get(self, building: str) -> BuildingGraph:
+        """Get the graph of a building, it is loaded if it is not in memory.
+
+        :param building: Name of the building, e.g: P1
+        :raises KeyError: If there is no plan for this building.
+        :return: The graph of the building.
+        """
+        with self.lock:
+            graph = self.graphs.get(building)
+            if graph is not None:
+                self.graphs.move_to_end(building)
+                self.hits += 1
+                return graph
+            path = self.get_path(building)
+            if path is None:
+                raise KeyError(building)
+            start = time.perf_counter()
+            graph = BuildingGraph(path)
+            self.load_time += time.perf_counter() - start
+            if graph.snapshot_path is None and self.write_snapshots:
+                save_snapshot(graph, path)
+            if self.on_load is not None:
+                self.on_load(building, graph)
+            self.loads += 1
+            self.graphs[building] = graph
+            self.sizes[building] = graph.nbytes()
+            self.evict_over_budget()
+            return graph
+
+    def get_loaded(self) -> Dict[str, BuildingGraph]:
+        """Get the graphs in memory by building name, without changing their LRU order."""
+        with self.lock:
+            return dict(self.graphs)
+
+    def loaded(self) -> List[str]:
+        """Get the names of the buildings in memory, from the least to the most recently used."""
+        return list(self.graphs)
+
+    def evict(self, building: str) -> None:
+        """Remove the graph of a building from memory.
+
+        :param building: Name of the building.
+        """
+        with self.lock:
+            if building not in self.graphs:
+                return
+            del self.graphs[building]
+            del self.sizes[building]
+            self.evictions += 1
+        if self.on_evict is not None:
+            self.on_evict(building)
+
+    def evict_over_budget(self) -> None:
+        """Evict the least recently used graphs until the loaded graphs fit in the budget."""
+        with self.lock:
+            while len(self.graphs) > 1 and self.get_nbytes() > self.max_bytes:
+                self.evict(next(iter(self.graphs)))
+
+    def reserve(self, name: str, nbytes: int) -> None:
+        """Count the memory of a structure built on the loaded graphs in the budget, the least
+        recently used graphs are evicted if it does not fit. The structure must be dropped when a
+        graph it holds is evicted (see on_evict), then released.
+
+        :param name: Name of the structure, its previous footprint is replaced.
+        :param nbytes: Its estimated memory footprint.
+        """
+        with self.lock:
+            self.reserved[name] = nbytes
+            self.evict_over_budget()
+
+    def release(self, name: str) -> None:
+        """Stop counting the memory of a structure (see reserve)."""
+        with self.lock:
+            self.reserved.pop(name, None)
+
+    def get_nbytes(self) -> int:
+        """Estimated memory footprint of the loaded graphs and of the reserved structures."""
+        return sum(self.sizes.values()) + sum(self.reserved.values())
+
+    def stats(self) -> Dict[str, float]:
+        """Get the counters of the registry."""
+        return {
+            "buildings": len(self.list_buildings()),
+            "loaded": len(self.graphs),
+            "nbytes": self.get_nbytes(),
+            "reserved": sum(self.reserved.values()),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "loads": self.loads,
+            "load_time": self.load_time,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,220 @@
+"""Binary snapshots of the graphs.
+
+:Date: 18/10/2026
+:Description: A snapshot is a precompiled form of a plan (json file) so the graph can be loaded
+without parsing and re-deriving the plan node by node. It contains:
+    - a header with a format version and the sha256 of the json file it was built from,
+    - the compiled graph: a string table of the node ids and the CSR arrays, stored raw and
+      aligned so they are used directly from a memory map (no copy),
+    - the arrays the graph derives from the compiled graph (data of the heuristics), stored the
+      same way,
+    - the attributes of the nodes and of the edges as compact json, used to rebuild the
+      networkx graph (drawing, path analysis).
+A snapshot whose hash does not match the json file any more is ignored.
+The memory map is shared: the processes (e.g: uvicorn workers) that load the same snapshot share
+the pages of its arrays instead of each holding a copy.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .compiled import INDEX, WEIGHT, CompiledGraph
+
+MAGIC = b"CRSNAP"
+FORMAT_VERSION = 2
+EXTENSION = ".snap"
+ALIGNMENT = 8
+
+HEADER = struct.Struct("<6sH32sI")  # magic, format version, sha256 of the json, number of sections
+SECTION = struct.Struct("<4sQQ")  # name, offset, size
+
+# Sections with the arrays of the compiled graph and their type code
+ARRAYS = {
+    b"OFFS": ("offsets", INDEX),
+    b"TRGS": ("targets", INDEX),
+    b"WGHT": ("weights", WEIGHT),
+    b"ROFF": ("r_offsets", INDEX),
+    b"RTRG": ("r_targets", INDEX),
+    b"RWGT": ("r_weights", WEIGHT),
+}
+
+
+def get_snapshot_path(path: str) -> str:
+    """Path of the snapshot of a json file (next to it, e.g: P1.json -> P1.snap)."""
+    return os.path.splitext(path)[0] + EXTENSION
+
+
+def get_file_hash(path: str) -> bytes:
+    """sha256 of the content of a file."""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+class Snapshot:
+    """Content of a snapshot file."""
+
+    def __init__(
+        self,
+        meta: Dict[str, Any],
+        compiled: CompiledGraph,
+        nodes: List[Dict[str, Any]],
+        edges: List[Dict[str, Any]],
+        arrays: Optional[Dict[str, Sequence]] = None,
+    ) -> None:
+        """Constructor of the class.
+
+        :param meta: Attributes of the graph (type, name, ...).
+        :param compiled: The compiled graph.
+        :param nodes: Attributes of each node, in the order of compiled.ids.
+        :param edges: Attributes of each edge, in the order of the CSR arrays.
+        :param arrays: Derived arrays (array.array or memoryview) by name.
+        """
+        self.meta = meta
+        self.compiled = compiled
+        self.nodes = nodes
+        self.edges = edges
+        self.arrays = arrays if arrays is not None else {}
+
+    def get_edges(self) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """Get the (source, target, attributes) edges of the networkx graph."""
+        compiled = self.compiled
+        ids, offsets, targets = compiled.ids, compiled.offsets, compiled.targets
+        return [
+            (ids[source], ids[targets[edge]], self.edges[edge])
+            for source in range(len(compiled))
+            for edge in range(offsets[source], offsets[source + 1])
+        ]
+
+
+def write_snapshot(path: str, source_hash: bytes, snapshot: Snapshot) -> None:
+    """Write a snapshot file.
+
+    :param path: Path of the snapshot file.
+    :param source_hash: sha256 of the json file the graph was loaded from.
+    :param snapshot: The content of the snapshot.
+    """
+    compiled = snapshot.compiled
+    # The derived arrays are in sections A000, A001, ..., their names and types are in META
+    derived = [(name, memoryview(values)) for name, values in snapshot.arrays.items()]
+    meta = {**snapshot.meta, "arrays": [[name, values.format] for name, values in derived]}
+    sections: List[Tuple[bytes, bytes]] = [
+        (b"META", json.dumps(meta).encode()),
+        (b"IDS_", "\0".join(compiled.ids).encode()),
+        (b"NODE", json.dumps(snapshot.nodes, separators=(",", ":")).encode()),
+        (b"EDGE", json.dumps(snapshot.edges, separators=(",", ":")).encode()),
+    ]
+    sections += [(name, getattr(compiled, attr).tobytes()) for name, (attr, _) in ARRAYS.items()]
+    sections += [(b"A%03d" % idx, values.tobytes()) for idx, (_, values) in enumerate(derived)]
+    write_sections(path, source_hash, sections)
+
+
+def write_sections(path: str, source_hash: bytes, sections: List[Tuple[bytes, bytes]]) -> None:
+    """Write a file in the snapshot format: the header, the table of the sections and the
+    sections (aligned so the arrays can be cast in place).
+
+    :param path: Path of the file.
+    :param source_hash: sha256 of the json file the content was built from.
+    :param sections: (name of 4 bytes, content) of each section.
+    """
+    offset = HEADER.size + SECTION.size * len(sections)
+    table, padded = [], []
+    for name, data in sections:
+        offset += -offset % ALIGNMENT
+        table.append(SECTION.pack(name, offset, len(data)))
+        padded.append(data + b"\0" * (-len(data) % ALIGNMENT))
+        offset += len(padded[-1])
+    # A unique temporary file: the processes that write the same snapshot at once do not write in
+    # the same file, and a worker never reads a half written snapshot
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, source_hash, len(sections)))
+            f.write(b"".join(table))
+            f.write(b"\0" * (-f.tell() % ALIGNMENT))
+            f.write(b"".join(padded))
+        os.chmod(tmp_path, 0o644)  # mkstemp creates it readable by its owner only
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_snapshot(path: str, source_hash: Optional[bytes] = None) -> Optional[Snapshot]:
+    """Read a snapshot file. The arrays of the compiled graph are views of a memory map of the file.
+
+    :param path: Path of the snapshot file.
+    :param source_hash: Expected sha256 of the json file (not checked if None).
+    :return: The snapshot, or None if there is no (valid and up to date) snapshot.
+    """
+    sections = read_sections(path, source_hash)
+    if sections is None:
+        return None
+    arrays = {attr: sections[name].cast(code) for name, (attr, code) in ARRAYS.items()}
+    ids_data = bytes(sections[b"IDS_"]).decode()
+    ids = ids_data.split("\0") if ids_data else []
+    compiled = CompiledGraph(ids, **arrays)
+    meta = json.loads(bytes(sections[b"META"]))
+    derived = {
+        name: sections[b"A%03d" % idx].cast(code)
+        for idx, (name, code) in enumerate(meta.pop("arrays", []))
+    }
+    return Snapshot(
+        meta,
+        compiled,
+        json.loads(bytes(sections[b"NODE"])),
+        json.loads(bytes(sections[b"EDGE"])),
+        derived,
+    )
+
+
+def read_meta(path: str, source_hash: Optional[bytes] = None) -> Optional[Dict[str, Any]]:
+    """Read the attributes of the graph of a snapshot file, without its nodes and edges.
+
+    :param path: Path of the snapshot file.
+    :param source_hash: Expected sha256 of the json file (not checked if None).
+    :return: The attributes, or None if there is no (valid and up to date) snapshot.
+    """
+    sections = read_sections(path, source_hash)
+    if sections is None or b"META" not in sections:
+        return None
+    return json.loads(bytes(sections[b"META"]))
+
+
+def read_sections(
+    path: str, source_hash: Optional[bytes] = None
+) -> Optional[Dict[bytes, memoryview]]:
+    """Read a file in the snapshot format, the sections are views of a memory map of the file.
+
+    :param path: Path of the file.
+    :param source_hash: Expected sha256 of the json file (not checked if None).
+    :return: The sections by name, or None if there is no (valid, complete and up to date) file.
+    """
+    if not os.path.isfile(path):
+        return None
+    with open(path, "rb") as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return None
+    if len(buffer) < HEADER.size:
+        return None
+    magic, version, snapshot_hash, n_sections = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        return None
+    if source_hash is not None and snapshot_hash != source_hash:
+        return None
+    if HEADER.size + n_sections * SECTION.size > len(buffer):
+        return None  # Truncated
+    view = memoryview(buffer)
+    sections: Dict[bytes, memoryview] = {}
+    for idx in range(n_sections):
+        name, offset, size = SECTION.unpack_from(buffer, HEADER.size + idx * SECTION.size)
+        if offset + size > len(buffer):
+            return None  # Truncated
+        sections[name] = view[offset : offset + size]
+    return sections
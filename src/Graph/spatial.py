@@ -0,0 +1,146 @@
+"""Spatial index of the nodes of a graph.
+
+:Date: 18/10/2026
+:Description: A uniform grid over an equirectangular projection of the (latitude, longitude)
+coordinates of the nodes. It answers nearest node and k-nearest nodes queries by visiting
+the cells ring by ring around the position, so only the nodes close to the position are compared. A position outside the grid is compared
+to every node.
+"""
+
+import heapq
+import math
+from typing import Dict, Iterable, List, Tuple
+
+EARTH_RADIUS = 6371008.8  # Mean earth radius in meters
+
+
+def haversine(lat1: float, long1: float, lat2: float, long2: float) -> float:
+    """Compute the great-circle distance between two positions.
+
+    :param lat1: Latitude of the first position.
+    :param long1: Longitude of the first position.
+    :param lat2: Latitude of the second position.
+    :param long2: Longitude of the second position.
+    :return: The distance in meters.
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(long2 - long1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+class SpatialIndex:
+    """Grid index over the positions of the nodes of a graph."""
+
+    # The projection is not exactly the haversine distance, a ring is only skipped when its lower
+    # bound is greater than the best distance by this margin.
+    SLACK = 0.99
+
+    def __init__(self, positions: Iterable[Tuple[str, float, float]], cell_size: float = 50):
+        """Build the index.
+
+        :param positions: (node, latitude, longitude) of each node to index.
+        :param cell_size: Size of a cell of the grid in meters.
+        """
+        self.cell_size = cell_size
+        self.positions: Dict[str, Tuple[float, float]] = {}
+        for node, lat, long in positions:
+            self.positions[node] = (lat, long)
+        lats = [lat for lat, _ in self.positions.values()] or [0.0]
+        self.ref_lat = math.radians((min(lats) + max(lats)) / 2)
+        self.cells: Dict[Tuple[int, int], List[str]] = {}
+        for node, (lat, long) in self.positions.items():
+            self.cells.setdefault(self.get_cell(lat, long), []).append(node)
+        xs = [x for x, _ in self.cells] or [0]
+        ys = [y for _, y in self.cells] or [0]
+        self.bounds = (min(xs), min(ys), max(xs), max(ys))
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def project(self, lat: float, long: float) -> Tuple[float, float]:
+        """Project a position on the plane (equirectangular projection).
+
+        :return: The (x, y) coordinates in meters.
+        """
+        x = EARTH_RADIUS * math.radians(long) * math.cos(self.ref_lat)
+        y = EARTH_RADIUS * math.radians(lat)
+        return x, y
+
+    def get_cell(self, lat: float, long: float) -> Tuple[int, int]:
+        """Get the cell of the grid that contains a position."""
+        x, y = self.project(lat, long)
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def get_ring(self, center: Tuple[int, int], radius: int) -> Iterable[Tuple[int, int]]:
+        """Get the non empty cells at a given Chebyshev distance of the center cell."""
+        cx, cy = center
+        if radius == 0:
+            cells = [center]
+        else:
+            cells = [
+                (cx + dx, cy + dy) for dx in (-radius, radius) for dy in range(-radius, radius + 1)
+            ]
+            cells += [
+                (cx + dx, cy + dy) for dy in (-radius, radius) for dx in range(1 - radius, radius)
+            ]
+        return [cell for cell in cells if cell in self.cells]
+
+    def get_max_radius(self, center: Tuple[int, int]) -> int:
+        """Number of rings to visit from the center cell to cover the whole grid."""
+        min_x, min_y, max_x, max_y = self.bounds
+        cx, cy = center
+        return max(abs(cx - min_x), abs(cx - max_x), abs(cy - min_y), abs(cy - max_y))
+
+    def contains(self, cell: Tuple[int, int]) -> bool:
+        """Check if a cell is inside the bounding box of the grid."""
+        min_x, min_y, max_x, max_y = self.bounds
+        return min_x <= cell[0] <= max_x and min_y <= cell[1] <= max_y
+
+    def k_nearest(self, position: Tuple, k: int) -> List[Tuple[float, str]]:
+        """Find the k nodes that are the closest to a position.
+
+        :param position: tuple (latitude, longitude) representing the position.
+        :param k: Number of nodes to return.
+        :return: A list of (distance in meters, node) sorted by distance, empty if k <= 0 or if
+            the index is empty.
+        """
+        if k <= 0 or not self.positions:
+            return []
+        lat, long = position[0], position[1]
+        center = self.get_cell(lat, long)
+        if not self.contains(center):
+            # Far from the grid, the rings between the position and the grid are empty and the
+            # projection is not precise enough to stop early: compare every node.
+            distances = (
+                (haversine(lat, long, n_lat, n_long), node)
+                for node, (n_lat, n_long) in self.positions.items()
+            )
+            return heapq.nsmallest(k, distances)
+        best: List[Tuple[float, str]] = []  # max heap (negative distances) of the k best nodes
+        for radius in range(self.get_max_radius(center) + 1):
+            for cell in self.get_ring(center, radius):
+                for node in self.cells[cell]:
+                    n_lat, n_long = self.positions[node]
+                    distance = haversine(lat, long, n_lat, n_long)
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, node))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, node))
+            # Every node of the next ring is at least radius * cell_size meters away
+            if len(best) == k and -best[0][0] <= radius * self.cell_size * self.SLACK:
+                break
+        return sorted((-distance, node) for distance, node in best)
+
+    def nearest(self, position: Tuple) -> str:
+        """Find the node that is the closest to a position.
+
+        :param position: tuple (latitude, longitude) representing the position.
+        :raises ValueError: If the index is empty.
+        :return: The closest node.
+        """
+        closest = self.k_nearest(position, 1)
+        if not closest:
+            raise ValueError("The spatial index does not contain any node")
+        return closest[0][1]
@@ -0,0 +1,184 @@
+"""Edge based (line) graph of a building, used by the turn aware searches.
+
+:Date: 18/10/2026
+:Description: In a building graph, the direction of an edge u -> v (straight, left, right) depends
+on the node p the path comes from before u. A node based search cannot take it into account, so
+the searches with turn costs run on the line graph: its states are the edges of the compiled graph
+and there is a transition from the edge p -> u to each edge u -> v, whose weight is the weight of
+u -> v plus the penalty of the turn p -> u -> v. The transitions and their kind of turn are built
+once when the graph is loaded (and saved in its snapshot), changing the penalties only recomputes
+the weights of the transitions.
+"""
+
+import threading
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .compiled import INDEX, WEIGHT, CompiledGraph, SearchWorkspace
+
+# Kinds of turn of a transition (type code of the kinds array)
+KIND = "b"
+STRAIGHT, LEFT, RIGHT, UTURN, UNKNOWN = range(5)
+KINDS = {"straight": STRAIGHT, "left": LEFT, "right": RIGHT, "uturn": UTURN, "unknown": UNKNOWN}
+
+# Arrays of the line graph derived from the compiled graph
+ARRAYS = ["edge_sources", "start_kinds", "turn_offsets", "turn_targets", "turn_kinds"]
+
+# Penalty of each kind of turn, in the unit of the weights of the graph
+DEFAULT_PENALTIES = {"straight": 0.0, "left": 0.5, "right": 0.5, "uturn": 2.0, "unknown": 0.0}
+
+
+def get_kind(direction: Optional[str]) -> int:
+    """Kind of turn of a direction of the plans (UNKNOWN if the direction is not given)."""
+    return KINDS.get(direction, UNKNOWN) if direction is not None else UNKNOWN
+
+
+class TurnGraph:
+    """Line graph of a compiled graph with the kind of turn of each transition."""
+
+    def __init__(
+        self,
+        compiled: CompiledGraph,
+        edge_sources: array,
+        start_kinds: array,
+        turn_offsets: array,
+        turn_targets: array,
+        turn_kinds: array,
+        penalties: Optional[Dict[str, float]] = None,
+    ) -> None:
+        """Constructor of the class.
+
+        :param compiled: The compiled graph, the edges are numbered as in its CSR arrays.
+        :param edge_sources: Source node of each edge.
+        :param start_kinds: Kind of turn of each edge taken without predecessor (first edge of a
+            path).
+        :param turn_offsets: CSR offsets of the transitions, by edge (length E + 1).
+        :param turn_targets: Next edge of each transition.
+        :param turn_kinds: Kind of turn of each transition.
+        :param penalties: Penalty of each kind of turn (see DEFAULT_PENALTIES).
+        """
+        self.compiled = compiled
+        self.edge_sources = edge_sources
+        self.start_kinds = start_kinds
+        self.turn_offsets = turn_offsets
+        self.turn_targets = turn_targets
+        self.turn_kinds = turn_kinds
+        self.penalties: Dict[str, float] = {}
+        self.start_weights = array(WEIGHT)
+        self.turn_weights = array(WEIGHT)
+        # (start weights, turn weights) of the weight profiles of the compiled graph
+        self.profiles: Dict[str, Tuple[array, array]] = {}
+        self.set_penalties(penalties if penalties is not None else DEFAULT_PENALTIES)
+        self.workspaces = threading.local()
+
+    def __len__(self) -> int:
+        return len(self.edge_sources)
+
+    @staticmethod
+    def build_arrays(graph, compiled: CompiledGraph, direction: str) -> Dict[str, array]:
+        """Build the transitions of the line graph from the directions of the edges.
+
+        :param graph: The networkx graph, the attribute direction of its edges is either a
+            direction or a dict from the predecessor of the source ("null" or None for no
+            predecessor) to a direction. The turns without a direction are UNKNOWN.
+        :param compiled: The compiled form of the graph.
+        :param direction: Name of the attribute of the edges with their direction.
+        :return: The arrays of the constructor (edge_sources, start_kinds, turn_offsets,
+            turn_targets, turn_kinds).
+        """
+        ids, offsets, targets = compiled.ids, compiled.offsets, compiled.targets
+        edge_sources = array(INDEX, [0] * compiled.n_edges)
+        for source in range(len(compiled)):
+            for edge in range(offsets[source], offsets[source + 1]):
+                edge_sources[edge] = source
+        directions = [
+            graph.edges[ids[edge_sources[edge]], ids[targets[edge]]].get(direction)
+            for edge in range(compiled.n_edges)
+        ]
+        start_kinds = array(KIND, [UNKNOWN] * compiled.n_edges)
+        for edge, value in enumerate(directions):
+            if isinstance(value, dict):
+                start_kinds[edge] = get_kind(value.get("null", value.get(None)))
+            else:
+                start_kinds[edge] = get_kind(value)
+        turn_offsets = array(INDEX, [0] * (compiled.n_edges + 1))
+        turn_targets, turn_kinds = array(INDEX), array(KIND)
+        for edge in range(compiled.n_edges):
+            predecessor, node = edge_sources[edge], targets[edge]
+            for next_edge in range(offsets[node], offsets[node + 1]):
+                value = directions[next_edge]
+                if targets[next_edge] == predecessor:
+                    kind = UTURN
+                elif isinstance(value, dict):
+                    kind = get_kind(value.get(ids[predecessor]))
+                else:
+                    kind = get_kind(value)
+                turn_targets.append(next_edge)
+                turn_kinds.append(kind)
+            turn_offsets[edge + 1] = len(turn_targets)
+        return dict(zip(ARRAYS, (edge_sources, start_kinds, turn_offsets, turn_targets, turn_kinds)))
+
+    def set_penalties(self, penalties: Dict[str, float]) -> None:
+        """Change the penalties of the turns, the weights of the transitions are recomputed (O(T)).
+
+        :param penalties: Penalty of each kind of turn, the missing kinds keep their penalty. The
+            penalties must be positive or zero.
+        :raises ValueError: If a kind of turn is unknown or a penalty is negative.
+        """
+        for kind, penalty in penalties.items():
+            if kind not in KINDS:
+                raise ValueError(f"Unknown kind of turn {kind}, expected one of {list(KINDS)}")
+            if penalty < 0:
+                raise ValueError(f"The penalty of the turns {kind} must not be negative.")
+        self.penalties = {**DEFAULT_PENALTIES, **self.penalties, **penalties}
+        self.start_weights, self.turn_weights = self.compute_weights(self.compiled.weights)
+        self.profiles = {}
+
+    def compute_weights(self, weights: Sequence[float]) -> Tuple[array, array]:
+        """Weights of the first edges and of the transitions for some weights of the edges."""
+        by_kind = [self.penalties[kind] for kind in KINDS]  # In the order of the kinds
+        start_weights = array(
+            WEIGHT, [weights[edge] + by_kind[kind] for edge, kind in enumerate(self.start_kinds)]
+        )
+        turn_weights = array(
+            WEIGHT,
+            [
+                weights[next_edge] + by_kind[kind]
+                for next_edge, kind in zip(self.turn_targets, self.turn_kinds)
+            ],
+        )
+        return start_weights, turn_weights
+
+    def get_weights(self, profile: Optional[str] = None) -> Tuple[array, array]:
+        """Get the weights of the first edges and of the transitions.
+        The weights of a profile are computed on its first use (O(T)).
+
+        :param profile: Weight profile of the compiled graph (None for the weights of the graph).
+        :raises KeyError: If the compiled graph has no such profile.
+        """
+        weights = self.compiled.get_arrays(profile=profile)[2]
+        if weights is self.compiled.weights:
+            return self.start_weights, self.turn_weights
+        if profile not in self.profiles:
+            self.profiles[profile] = self.compute_weights(weights)
+        return self.profiles[profile]
+
+    def get_path(self, edges: List[int]) -> List[int]:
+        """Translate a path of edges into the path of the nodes it goes through."""
+        if not edges:
+            return []
+        return [self.edge_sources[edges[0]], *(self.compiled.targets[edge] for edge in edges)]
+
+    def get_workspace(self) -> SearchWorkspace:
+        """Get the search workspace of the calling thread (one entry per edge)."""
+        workspace = getattr(self.workspaces, "forward", None)
+        if workspace is None:
+            workspace = self.workspaces.forward = SearchWorkspace(len(self))
+        return workspace
+
+    def nbytes(self) -> int:
+        """Memory used by the arrays."""
+        arrays = (self.edge_sources, self.start_kinds, self.turn_offsets, self.turn_targets)
+        arrays += (self.turn_kinds, self.start_weights, self.turn_weights)
+        arrays += tuple(values for weights in self.profiles.values() for values in weights)
+        return sum(a.itemsize * len(a) for a in arrays)
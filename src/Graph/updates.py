@@ -0,0 +1,87 @@
+"""Live updates of a graph: closed nodes and edges and overridden weights.
+
+:Date: 18/10/2026
+:Description: The updates are kept apart from the plan (the networkx graph and its compiled form
+are not edited) so a closure can be lifted and an overridden weight reset. Applying them gives a
+new compiled graph that shares the topology arrays of the compiled plan: only the weights are
+copied, a closed edge (or an edge from or to a closed node) gets an infinite weight.
+"""
+
+from array import array
+from typing import Dict, Hashable, List, Set, Tuple
+
+from .compiled import WEIGHT, CompiledGraph
+
+INF = float("inf")
+
+Edge = Tuple[Hashable, Hashable]
+
+
+class GraphUpdates:
+    """Closures and weight overrides of a graph."""
+
+    def __init__(self) -> None:
+        self.closed_nodes: Set[Hashable] = set()
+        self.closed_edges: Set[Edge] = set()
+        self.weights: Dict[Edge, float] = {}  # Overridden weights
+
+    def __bool__(self) -> bool:
+        return bool(self.closed_nodes or self.closed_edges or self.weights)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, GraphUpdates):
+            return NotImplemented
+        return (
+            self.closed_nodes == other.closed_nodes
+            and self.closed_edges == other.closed_edges
+            and self.weights == other.weights
+        )
+
+    def copy(self) -> "GraphUpdates":
+        updates = GraphUpdates()
+        updates.closed_nodes = set(self.closed_nodes)
+        updates.closed_edges = set(self.closed_edges)
+        updates.weights = dict(self.weights)
+        return updates
+
+    def apply(self, compiled: CompiledGraph) -> CompiledGraph:
+        """Apply the updates to the compiled plan.
+
+        :param compiled: The compiled plan.
+        :return: A compiled graph with the topology of the plan and the updated weights.
+        """
+        index = compiled.index
+        weights = array(WEIGHT, compiled.weights)
+        for (source, target), weight in self.weights.items():
+            weights[compiled.find_edge(index[source], index[target])] = weight
+        for source, target in self.closed_edges:
+            weights[compiled.find_edge(index[source], index[target])] = INF
+        for node in self.closed_nodes:
+            idx = index[node]
+            for edge in range(compiled.offsets[idx], compiled.offsets[idx + 1]):
+                weights[edge] = INF
+            for edge in range(compiled.r_offsets[idx], compiled.r_offsets[idx + 1]):
+                weights[compiled.find_edge(compiled.r_targets[edge], idx)] = INF
+        return compiled.with_weights(weights)
+
+    def lowers_weights(self, compiled: CompiledGraph) -> bool:
+        """Check if an overridden weight is smaller than the weight of the plan, the heuristics
+        computed on the plan might then overestimate the distances.
+
+        :param compiled: The compiled plan.
+        """
+        index = compiled.index
+        return any(
+            weight < compiled.weights[compiled.find_edge(index[source], index[target])]
+            for (source, target), weight in self.weights.items()
+        )
+
+    def to_dict(self) -> Dict[str, List]:
+        """Get the updates in a json serialisable form."""
+        return {
+            "closed_nodes": sorted(self.closed_nodes),
+            "closed_edges": sorted([source, target] for source, target in self.closed_edges),
+            "weights": sorted(
+                [source, target, weight] for (source, target), weight in self.weights.items()
+            ),
+        }
@@ -5,17 +5,63 @@
 shortest path between two nodes in a building graph.
 """
 
-from typing import Dict, List
+from heapq import heapify, heappop, heappush
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 
-from pqdict import pqdict
-
-from Graph import Graph
+from Graph import CompiledGraph, Graph
+from Graph.compiled import SearchWorkspace
 from Graph.graph import GraphTypes
+from Graph.turns import TurnGraph
+
+INF = float("inf")
 
 
 class Dijkstra:
-    def __init__(self, graph: Graph) -> None:
+    def __init__(
+        self,
+        graph: Graph,
+        astar: bool = False,
+        bidirectional: bool = False,
+        hierarchy: bool = False,
+        turns: bool = False,
+        profile: Optional[str] = None,
+        blocked: Iterable[int] = (),
+    ) -> None:
+        """Constructor of the class.
+
+        :param graph: The graph to search.
+        :param astar: If True, the forward searches are A* searches guided by the heuristic of the
+            graph (see Graph.get_heuristic), it gives the same distances with fewer expansions.
+            The searches fall back to Dijkstra while an update of the graph lowers some weights
+            (see Graph.update): the heuristic might overestimate the distances.
+        :param bidirectional: If True, the point to point searches (dijkstra) grow a tree from the
+            source and a tree from the target on the reverse graph until they meet. It is faster
+            for long routes. It takes precedence over astar for these searches.
+        :param hierarchy: If True and the graph has a contraction hierarchy (see
+            OutsideGraph.load_hierarchy), the point to point searches are queries of the
+            hierarchy (see uses_hierarchy).
+            It takes precedence over the other modes for these searches.
+        :param turns: If True and the graph has a line graph (see BuildingGraph.turns), the
+            point to point searches add the penalties of the turns (see
+            BuildingGraph.set_turn_penalties) to the weights of the edges. It takes precedence
+            over bidirectional for these searches and it can be combined with astar.
+        :param profile: Name of the weight profile of the searches (see Graph.PROFILES), None for
+            the weights of the graph. The routes of a profile never use the edges it forbids.
+        :param blocked: Integer ids (in the compiled graph) of nodes the searches never go through
+            (e.g: the portals of the other buildings, see CampusGraph.get_blocked). The hierarchy
+            and the turn aware searches are not used when some nodes are blocked.
+        :raises ValueError: If the graph has no such profile.
+        """
         self.graph = graph
+        self.astar = astar
+        self.bidirectional = bidirectional
+        self.hierarchy = hierarchy
+        self.turns = turns
+        if profile is not None and profile not in graph.compiled.profiles:
+            raise ValueError(f"Unknown profile {profile} for the graph {graph.name}")
+        self.profile = profile
+        self.blocked = list(blocked)
+        self.settled = 0  # Number of nodes expanded by the last search
 
     def nodesNotNull(self, source: str, target: str):
         """Check if the nodes are not null
@@ -37,20 +83,25 @@ class Dijkstra:
         :raises ValueError: If the node is not in the graph.
         :return: The source and the target node.
         """
-        my_nodes: List = [source, target]
-        for idx in range(len(my_nodes)):
-            if not self.graph.is_in_graph(my_nodes[idx]):
-                if self.graph.type == GraphTypes.OUTSIDE:
-                    raise ValueError(
-                        f"The node {my_nodes[idx]} is not in the outside graph {self.graph.name}"
-                    )
-                # If the node is not in the graph, we find it by the name.
-                my_nodes[idx] = self.graph.find_node(my_nodes[idx])
-        return my_nodes
+        return [self.existingNode(source), self.existingNode(target)]
+
+    def existingNode(self, node: str) -> str:
+        """Check if a node is in the graph.
+
+        :param node: The node (or the name of the node for a building graph).
+        :raises ValueError: If the node is not in the graph.
+        :return: The id of the node in the graph.
+        """
+        if not self.graph.is_in_graph(node):
+            if self.graph.type == GraphTypes.OUTSIDE:
+                raise ValueError(f"The node {node} is not in the outside graph {self.graph.name}")
+            # If the node is not in the graph, we find it by the name.
+            return self.graph.find_node(node)
+        return node
 
     def dijkstra(self, source: str, target: str):
         """Implement the Dijkstra algorithm for finding the shortest path.
-        between two nodes in a graph using the library NetworkX.
+        between two nodes in a graph. The search runs on the compiled form of the graph.
 
         :param source: The source node's id.
         :param target: The target node's id.
@@ -58,28 +109,373 @@ class Dijkstra:
         """
         self.nodesNotNull(source, target)
         source, target = self.existingNodes(source, target)
-        dist_to: Dict = {node: float("inf") for node in self.graph.nodes}
-        predecessor: Dict = {}
-        dist_to[source] = 0
-        pq = pqdict()  # It use a min heap to store the nodes and their distances to the source node.
-        pq.additem(source, 0)
-
-        for idx, _ in pq.popitems():
-            if idx == target:
-                break  # We stop the algorithm when we reach the target node.
-            for neighbor in self.graph.neighbors(idx):
-                new_distance_neighbor = dist_to[idx] + self.graph.edges[idx, neighbor]["weight"]
-                if dist_to[neighbor] > new_distance_neighbor:
-                    dist_to[neighbor] = new_distance_neighbor
-                    predecessor[neighbor] = idx
-                    (
-                        pq.updateitem(neighbor, new_distance_neighbor)
-                        if neighbor in pq
-                        else pq.additem(neighbor, new_distance_neighbor)
-                    )
-        if dist_to[target] == float("inf"):
-            return (float("inf"), [])
-        return (dist_to[target], self.recover_path(predecessor, source, target))
+        if self.uses_hierarchy():
+            hierarchy = self.graph.hierarchy
+            result = hierarchy.query(source, target)
+            self.settled = hierarchy.settled
+            return result
+        graph = self.graph.compiled
+        src, trg = graph.index[source], graph.index[target]
+        turns = getattr(self.graph, "turns", None) if self.turns and not self.blocked else None
+        if turns is not None:
+            return self.search_turns(turns, src, trg)
+        if self.bidirectional:
+            return self.search_bidirectional(graph, src, trg)
+        workspace = self.search(graph, src, {trg})
+        if workspace.get_distance(trg) == INF:
+            return (INF, [])
+        path = self.recover_path(workspace.predecessor, src, trg)
+        return (workspace.dist_to[trg], self.get_ids(graph, path))
+
+    def dijkstra_to_many(self, source: str, targets: Iterable[str]) -> Dict[str, Tuple[float, List]]:
+        """One-to-many version of the Dijkstra algorithm.
+        A single search is rooted at the source and stops once every target is settled.
+
+        :param source: The source node's id.
+        :param targets: The targets node's id (or name for a building graph).
+        :return: For each target, its distance to the source and the path to reach it.
+        """
+        graph = self.graph.compiled
+        nodes: Dict[str, int] = {}
+        for target in targets:
+            self.nodesNotNull(source, target)
+            nodes[target] = graph.index[self.existingNode(target)]
+        src = graph.index[self.existingNode(source)]
+        workspace = self.search(graph, src, set(nodes.values()))
+        paths: Dict[str, Tuple[float, List]] = {}
+        for target, trg in nodes.items():
+            if workspace.get_distance(trg) == INF:
+                paths[target] = (INF, [])
+            else:
+                path = self.recover_path(workspace.predecessor, src, trg)
+                paths[target] = (workspace.dist_to[trg], self.get_ids(graph, path))
+        return paths
+
+    def distances_to_many(self, source: str, targets: Iterable[str]) -> Dict[str, float]:
+        """Same search as dijkstra_to_many but only the distances are returned, the paths are
+        not recovered.
+
+        :param source: The source node's id.
+        :param targets: The targets node's id (or name for a building graph).
+        :return: The distance of each target to the source (inf if it cannot be reached).
+        """
+        graph = self.graph.compiled
+        nodes: Dict[str, int] = {}
+        for target in targets:
+            self.nodesNotNull(source, target)
+            nodes[target] = graph.index[self.existingNode(target)]
+        src = graph.index[self.existingNode(source)]
+        workspace = self.search(graph, src, set(nodes.values()))
+        return {target: workspace.get_distance(trg) for target, trg in nodes.items()}
+
+    def dijkstra_from_many(
+        self, sources: Iterable[str], target: str
+    ) -> Dict[str, Tuple[float, List]]:
+        """Many-to-one version of the Dijkstra algorithm.
+        A single search is rooted at the target and follows the edges backward (the graph is a
+        DiGraph), it stops once every source is settled.
+
+        :param sources: The sources node's id (or name for a building graph).
+        :param target: The target node's id.
+        :return: For each source, its distance to the target and the path (source -> target).
+        """
+        graph = self.graph.compiled
+        nodes: Dict[str, int] = {}
+        for source in sources:
+            self.nodesNotNull(source, target)
+            nodes[source] = graph.index[self.existingNode(source)]
+        trg = graph.index[self.existingNode(target)]
+        workspace = self.search(graph, trg, set(nodes.values()), reverse=True)
+        paths: Dict[str, Tuple[float, List]] = {}
+        for source, src in nodes.items():
+            if workspace.get_distance(src) == INF:
+                paths[source] = (INF, [])
+            else:
+                # In the reverse tree the predecessor of a node is its next hop to the target
+                path = self.recover_path(workspace.predecessor, trg, src)[::-1]
+                paths[source] = (workspace.dist_to[src], self.get_ids(graph, path))
+        return paths
+
+    def search(
+        self, graph: CompiledGraph, root: int, targets: Set[int], reverse: bool = False
+    ) -> SearchWorkspace:
+        """Grow a shortest path tree from the root until all the targets are settled.
+        The search runs in the workspace of the graph for the calling thread, its results are
+        valid until the next search of the thread on the same graph.
+
+        :param graph: The compiled graph to search.
+        :param root: The integer id of the node where the search starts.
+        :param targets: The nodes we want to reach. The search stops once they are all settled.
+        :param reverse: If True, the edges are followed backward (from their target to their
+            source) so the distances are the distances from each node to the root.
+        :return: The workspace with the distance of each reached node to the root and its
+            predecessor in the tree.
+        """
+        offsets, adjacent, weights = graph.get_arrays(reverse, self.profile)
+        heuristic = self.get_heuristic(list(targets)) if not reverse else None
+        if heuristic is not None:
+            return self.search_astar(graph, root, targets, heuristic)
+        workspace = graph.get_workspace()
+        generation = self.start(workspace)
+        dist_to, predecessor, stamps = workspace.dist_to, workspace.predecessor, workspace.stamps
+        stamps[root], dist_to[root], predecessor[root] = generation, 0.0, -1
+        pending = set(targets)
+        self.settled = 0
+        # Min heap of (distance, node), outdated entries are skipped when they are popped.
+        heap = workspace.heap
+        heap.append((0.0, root))
+
+        while heap:
+            distance, idx = heappop(heap)
+            if distance > dist_to[idx]:
+                continue
+            self.settled += 1
+            pending.discard(idx)
+            if not pending:
+                break  # We stop the algorithm when we reached all the target nodes.
+            for edge in range(offsets[idx], offsets[idx + 1]):
+                neighbor = adjacent[edge]
+                new_distance_neighbor = distance + weights[edge]
+                if stamps[neighbor] != generation:  # First time the node is reached
+                    stamps[neighbor] = generation
+                elif dist_to[neighbor] <= new_distance_neighbor:
+                    continue
+                dist_to[neighbor] = new_distance_neighbor
+                predecessor[neighbor] = idx
+                heappush(heap, (new_distance_neighbor, neighbor))
+        return workspace
+
+    def search_astar(
+        self,
+        graph: CompiledGraph,
+        root: int,
+        targets: Set[int],
+        heuristic: Callable[[int], float],
+    ) -> SearchWorkspace:
+        """A* version of the search, the nodes are expanded by distance + heuristic.
+        The heuristic must never overestimate the distance to the closest target. It does not
+        have to be consistent: a node whose distance improves after its expansion is expanded again.
+
+        :param graph: The compiled graph to search.
+        :param root: The integer id of the node where the search starts.
+        :param targets: The nodes we want to reach. The search stops once they are all settled.
+        :param heuristic: Lower bound of the distance from a node to the closest target.
+        :return: The workspace with the distance of each reached node to the root and its
+            predecessor in the tree. Only the distances of the targets are exact.
+        """
+        offsets, adjacent, weights = graph.get_arrays(profile=self.profile)
+        workspace = graph.get_workspace()
+        generation = self.start(workspace)
+        dist_to, predecessor, stamps = workspace.dist_to, workspace.predecessor, workspace.stamps
+        estimates = workspace.estimates  # heuristic of the reached nodes
+        stamps[root], dist_to[root], predecessor[root] = generation, 0.0, -1
+        estimates[root] = heuristic(root)
+        pending = set(targets)
+        self.settled = 0
+        heap = workspace.heap
+        heap.append((estimates[root], root))
+
+        while heap:
+            key, idx = heappop(heap)
+            distance = dist_to[idx]
+            if key > distance + estimates[idx]:
+                continue
+            self.settled += 1
+            pending.discard(idx)
+            if not pending:
+                break
+            for edge in range(offsets[idx], offsets[idx + 1]):
+                neighbor = adjacent[edge]
+                new_distance_neighbor = distance + weights[edge]
+                if stamps[neighbor] != generation:  # First time the node is reached
+                    stamps[neighbor] = generation
+                    estimates[neighbor] = heuristic(neighbor)
+                elif dist_to[neighbor] <= new_distance_neighbor:
+                    continue
+                dist_to[neighbor] = new_distance_neighbor
+                predecessor[neighbor] = idx
+                estimate = estimates[neighbor]
+                if estimate < INF:  # No target can be reached from this node otherwise
+                    heappush(heap, (new_distance_neighbor + estimate, neighbor))
+        return workspace
+
+    def search_bidirectional(self, graph: CompiledGraph, src: int, trg: int) -> Tuple[float, List]:
+        """Bidirectional version of the search between two nodes.
+        A forward search from the source and a backward search from the target (on the reverse
+        graph, so the edges do not have to be symmetric) are expanded in turn, always the one with
+        the smallest distance at the top of its heap. Each time an edge links a node reached by the
+        forward search to a node reached by the backward search, the path through this edge is a
+        candidate. The searches stop when the sum of the tops of the heaps is not smaller than the
+        best candidate: no path left to find can be shorter.
+
+        :param graph: The compiled graph to search.
+        :param src: The integer id of the source node.
+        :param trg: The integer id of the target node.
+        :return: The distance between the source and the target and the shortest path
+            (inf and an empty path if the target cannot be reached).
+        """
+        forward, backward = graph.get_workspace(), graph.get_workspace(backward=True)
+        sides = []  # (workspace, generation, arrays, other workspace) of each direction
+        for workspace, other, root, reverse in (
+            (forward, backward, src, False),
+            (backward, forward, trg, True),
+        ):
+            generation = self.start(workspace)
+            workspace.stamps[root], workspace.dist_to[root] = generation, 0.0
+            workspace.predecessor[root] = -1
+            workspace.heap.append((0.0, root))
+            sides.append((workspace, generation, graph.get_arrays(reverse, self.profile), other))
+        best, meeting = (0.0, (src, trg)) if src == trg else (INF, None)
+        self.settled = 0
+
+        while forward.heap and backward.heap:
+            if forward.heap[0][0] + backward.heap[0][0] >= best:
+                break
+            # Expand the direction whose next node is the closest to its root
+            side = 0 if forward.heap[0][0] <= backward.heap[0][0] else 1
+            workspace, generation, (offsets, adjacent, weights), other = sides[side]
+            dist_to, predecessor, stamps = workspace.dist_to, workspace.predecessor, workspace.stamps
+            o_dist_to, o_stamps, o_generation = other.dist_to, other.stamps, other.generation
+            distance, idx = heappop(workspace.heap)
+            if distance > dist_to[idx]:
+                continue
+            self.settled += 1
+            for edge in range(offsets[idx], offsets[idx + 1]):
+                neighbor = adjacent[edge]
+                new_distance_neighbor = distance + weights[edge]
+                if stamps[neighbor] != generation:  # First time the node is reached
+                    stamps[neighbor] = generation
+                elif dist_to[neighbor] <= new_distance_neighbor:
+                    continue
+                dist_to[neighbor] = new_distance_neighbor
+                predecessor[neighbor] = idx
+                heappush(workspace.heap, (new_distance_neighbor, neighbor))
+                if o_stamps[neighbor] == o_generation:
+                    length = new_distance_neighbor + o_dist_to[neighbor]
+                    if length < best:
+                        # (last node of the forward tree, first node of the backward tree)
+                        best, meeting = length, (idx, neighbor) if side == 0 else (neighbor, idx)
+        if meeting is None:
+            return (INF, [])
+        last, first = meeting
+        path = self.recover_path(forward.predecessor, src, last)
+        if first != last:
+            path += self.recover_path(backward.predecessor, trg, first)[::-1]
+        return (best, self.get_ids(graph, path))
+
+    def search_turns(self, turns: TurnGraph, src: int, trg: int) -> Tuple[float, List]:
+        """Turn aware search between two nodes, on the line graph: the states are the edges and
+        the weight of a transition is the weight of the next edge plus the penalty of the turn.
+        The search starts from every edge leaving the source and stops at the first edge to the
+        target that is settled. With astar, the states are expanded by distance + heuristic of the
+        target node of their edge: the penalties are positive so it is still a lower bound.
+
+        :param turns: The line graph.
+        :param src: The integer id of the source node.
+        :param trg: The integer id of the target node.
+        :return: The length of the path found (without the penalties of its turns) and the path
+            (inf and an empty path if the target cannot be reached).
+        """
+        graph = turns.compiled
+        self.settled = 0
+        if src == trg:
+            return (0.0, [graph.ids[src]])
+        offsets, targets, weights = graph.get_arrays()
+        turn_offsets, turn_targets = turns.turn_offsets, turns.turn_targets
+        start_weights, turn_weights = turns.get_weights(self.profile)
+        heuristic = self.get_heuristic([trg])
+        if heuristic is None:
+            heuristic = lambda idx: 0.0  # noqa: E731
+        workspace = turns.get_workspace()
+        generation = workspace.start()
+        dist_to, predecessor, stamps = workspace.dist_to, workspace.predecessor, workspace.stamps
+        estimates = workspace.estimates  # heuristic of the target node of the reached edges
+        heap = workspace.heap
+        for edge in range(offsets[src], offsets[src + 1]):
+            stamps[edge], dist_to[edge], predecessor[edge] = generation, start_weights[edge], -1
+            estimates[edge] = heuristic(targets[edge])
+            if estimates[edge] < INF:
+                heap.append((start_weights[edge] + estimates[edge], edge))
+        heapify(heap)
+        last = -1  # Edge of the path that reaches the target
+
+        while heap:
+            key, edge = heappop(heap)
+            distance = dist_to[edge]
+            if key > distance + estimates[edge]:
+                continue
+            self.settled += 1
+            if targets[edge] == trg:
+                last = edge
+                break
+            for turn in range(turn_offsets[edge], turn_offsets[edge + 1]):
+                neighbor = turn_targets[turn]
+                new_distance_neighbor = distance + turn_weights[turn]
+                if stamps[neighbor] != generation:  # First time the edge is reached
+                    stamps[neighbor] = generation
+                    estimates[neighbor] = heuristic(targets[neighbor])
+                elif dist_to[neighbor] <= new_distance_neighbor:
+                    continue
+                dist_to[neighbor] = new_distance_neighbor
+                predecessor[neighbor] = edge
+                estimate = estimates[neighbor]
+                if estimate < INF:
+                    heappush(heap, (new_distance_neighbor + estimate, neighbor))
+        if last < 0 or dist_to[last] == INF:
+            return (INF, [])
+        edges = []
+        while last >= 0:
+            edges.append(last)
+            last = predecessor[last]
+        edges.reverse()
+        length = sum(weights[edge] for edge in edges)
+        return (length, self.get_ids(graph, turns.get_path(edges)))
+
+    def start(self, workspace: SearchWorkspace) -> int:
+        """Start a search in a workspace. The blocked nodes are marked as reached with a distance
+        of -inf: no path improves it, so they are never relaxed nor expanded.
+
+        :param workspace: The workspace of the search.
+        :return: The generation of the search.
+        """
+        generation = workspace.start()
+        stamps, dist_to = workspace.stamps, workspace.dist_to
+        for idx in self.blocked:
+            stamps[idx], dist_to[idx] = generation, -INF
+        return generation
+
+    def get_heuristic(self, targets: List[int]) -> Optional[Callable[[int], float]]:
+        """Get the heuristic of the A* searches (None if astar is False or if the heuristic of the
+        graph is not valid for its current weights).
+        """
+        if not self.astar or self.graph.lowered:
+            return None
+        return self.graph.get_heuristic(targets)
+
+    def uses_hierarchy(self) -> bool:
+        """Check if the point to point searches are queries of the contraction hierarchy of the
+        graph: it is asked for, loaded, and valid for the weights of the searches (no blocked
+        nodes, no live updates of the graph, default weights).
+        """
+        return (
+            self.hierarchy
+            and getattr(self.graph, "hierarchy", None) is not None
+            and not self.blocked
+            and not self.graph.is_updated
+            and self.has_default_weights()
+        )
+
+    def has_default_weights(self) -> bool:
+        """Check if the searches use the weights of the graph (no profile, or a profile that does
+        not change the weights of this graph). The precomputed structures (e.g: the contraction
+        hierarchy) are only valid for these weights.
+        """
+        graph = self.graph.compiled
+        return self.profile is None or graph.get_arrays(profile=self.profile)[2] is graph.weights
+
+    def get_ids(self, graph: CompiledGraph, path: List[int]) -> List[str]:
+        """Translate a path of integer ids into the ids of the nodes of the graph."""
+        return [graph.ids[idx] for idx in path]
 
     def recover_path(self, predecessors, source, target):
         """
@@ -1,17 +1,91 @@
-from typing import List, Tuple
+import asyncio
+import contextvars
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from Analyse import BPathAnalyzer, OPathAnalyzer
-from dijkstra import Dijkstra
-from Graph import BuildingGraph, OutsideGraph
-from utils.constants import BUILDINGS_DATA_DIR, OUTSIDE_DATA_DIR
+from Analyse.geometry import COORDINATES, ENCODINGS
+from dijkstra import INF, Dijkstra
+from Graph import (
+    OUTSIDE,
+    BuildingGraph,
+    CampusGraph,
+    Graph,
+    GraphRegistry,
+    NameIndex,
+    OutsideGraph,
+)
+from Graph.names import normalize
+from Graph.updates import GraphUpdates
+from utils.constants import BUILDINGS_DATA_DIR, OUTSIDE_DATA_DIR, PLAINE_BUILDINGS_DATA_DIR
+from utils.metrics import Metrics, RequestTimings, current_timings
+from utils.route_cache import RouteCache
+from utils.workers import PoolSaturated, RoutePool
+
+BUILDINGS_DIRS = [BUILDINGS_DATA_DIR, PLAINE_BUILDINGS_DATA_DIR]
+GRAPHS_MAX_BYTES = 256 * 2**20  # Memory budget of the loaded building graphs and campus graph
+ROUTE_CACHE_SIZE = 1024  # Maximum number of routes kept in the cache
+ROUTE_CACHE_TTL = None  # Time to live of a cached route in seconds (None: until it is evicted)
+# Token of the admin API (X-Admin-Token header), the admin API is disabled if it is not set
+ADMIN_TOKEN = os.environ.get("CAMPUS_ROUTING_ADMIN_TOKEN")
+# Timing of the stages of the requests and /metrics endpoint, disabled with 0
+METRICS_ENABLED = os.environ.get("CAMPUS_ROUTING_METRICS", "1") != "0"
+# Return the timings of the stages of each request in a Server-Timing header
+SERVER_TIMING = os.environ.get("CAMPUS_ROUTING_SERVER_TIMING", "0") == "1"
+LOG_LEVEL = os.environ.get("CAMPUS_ROUTING_LOG_LEVEL", "INFO")
+# Worker processes computing the routes (see utils.workers), with 0 the routes are computed by
+# ROUTE_THREADS threads of the API process
+WORKERS = int(os.environ.get("CAMPUS_ROUTING_WORKERS", "0"))
+ROUTE_THREADS = min(32, (os.cpu_count() or 1) + 4)
+# Route computations waiting or running before the API answers 503 (Retry-After)
+MAX_PENDING = int(os.environ.get("CAMPUS_ROUTING_MAX_PENDING", "64"))
+# Time (in seconds) a request waits for its route before the API answers 504
+ROUTE_TIMEOUT = float(os.environ.get("CAMPUS_ROUTING_TIMEOUT", "30"))
+
+logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger(__name__)
+metrics = Metrics("campus_routing", METRICS_ENABLED)
+
+
+class NoRoute(Exception):
+    """There is no path between the rooms of a route, e.g: no step free path to a floor without
+    a lift. The API answers 404 and the route is not cached.
+    """
+
+
+def check_route(distance: float, profile: Optional[str]) -> None:
+    """Check that a search found a path.
 
-BUILDINGS = ["P1", "S"]
+    :param distance: The distance found by the search (INF if there is no path).
+    :param profile: Weight profile of the search (None for the default weights).
+    :raises NoRoute: If there is no path.
+    """
+    if distance == INF:
+        raise NoRoute(
+            f"There is no route with the profile {profile}" if profile else "There is no route"
+        )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    stop_route_pool()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 origins = [
     "http://localhost:63342",
 ]
@@ -23,136 +97,692 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-graphs = {
-    building: BuildingGraph(f"{BUILDINGS_DATA_DIR}{building}/{building}.json")
-    for building in BUILDINGS
-}
-outside_graph = OutsideGraph(f"{OUTSIDE_DATA_DIR}solbosch_map_updated.json")
+
+
+def drop_campus_graph(building: str) -> None:
+    """Drop the campus graph if it holds an evicted building, so its graph can be freed."""
+    global campus_graph
+    campus = campus_graph
+    if campus is not None and building in campus.layers:
+        campus_graph = None
+        graphs.release(CAMPUS)
+
+
+def restore_updates(building: str, graph: BuildingGraph) -> None:
+    """Apply the live updates of a building again when its graph is (re)loaded."""
+    if building in graph_updates:
+        graph.updates = graph_updates[building]
+        graph.apply_updates()
+
+
+# Building graphs, loaded on first use
+graphs = GraphRegistry(
+    BUILDINGS_DIRS, GRAPHS_MAX_BYTES, on_evict=drop_campus_graph, on_load=restore_updates
+)
+# Live updates (closures, weights) by layer (building name or OUTSIDE), see /api/admin/update
+graph_updates: Dict[str, GraphUpdates] = {}
+OUTSIDE_PLAN = f"{OUTSIDE_DATA_DIR}solbosch_map_updated.json"
+# Mapped from its snapshot if it has been built (make snapshots): importing this module never
+# writes to the data directory
+outside_graph = OutsideGraph(OUTSIDE_PLAN)
+# Contraction hierarchy of the outside legs (see search_route_through_hierarchy), built offline by
+# utils/build_hierarchy.py: without it the routes from outside are searched on the campus graph
+outside_graph.load_hierarchy(OUTSIDE_PLAN)
+# Graph linking the loaded buildings through the outside graph, see get_campus_graph. Its memory
+# is counted in the budget of the building graphs under the name CAMPUS.
+CAMPUS = "campus"
+campus_graph: Optional[CampusGraph] = None
+campus_lock = threading.Lock()  # The campus graph is built by one thread at a time
+# Analysed responses by (snapped outside node, arrival room) or (starting room, arrival room)
+route_cache = RouteCache(ROUTE_CACHE_SIZE, ROUTE_CACHE_TTL)
+# Pool of the route computations, started on first use (see get_route_pool)
+route_pool: Optional[RoutePool] = None
+
+metrics.collect(
+    "route_cache_requests",
+    "Lookups of the route cache by result.",
+    lambda: {(("result", "hit"),): route_cache.hits, (("result", "miss"),): route_cache.misses},
+    kind="counter",
+)
+metrics.collect(
+    "route_cache_removals",
+    "Routes removed from the route cache by reason.",
+    lambda: {
+        (("reason", "eviction"),): route_cache.evictions,
+        (("reason", "invalidation"),): route_cache.invalidations,
+    },
+    kind="counter",
+)
+metrics.collect("route_cache_entries", "Routes in the cache.", lambda: {(): len(route_cache)})
+metrics.collect("graphs_loaded", "Building graphs loaded.", lambda: {(): len(graphs.graphs)})
+metrics.collect(
+    "graphs_bytes",
+    "Memory of the loaded building graphs and of the campus graph.",
+    lambda: {(): graphs.get_nbytes()},
+)
+metrics.collect(
+    "graphs_loads",
+    "Loads and evictions of building graphs.",
+    lambda: {(("event", "load"),): graphs.loads, (("event", "eviction"),): graphs.evictions},
+    kind="counter",
+)
+metrics.collect(
+    "route_pool_pending",
+    "Route computations waiting or running.",
+    lambda: {(): route_pool.pending} if route_pool else {},
+)
+metrics.collect(
+    "route_pool_computations",
+    "Route computations by result.",
+    lambda: (
+        {
+            (("result", "completed"),): route_pool.completed,
+            (("result", "failed"),): route_pool.failed,
+            (("result", "rejected"),): route_pool.rejected,
+            (("result", "timeout"),): route_pool.timeouts,
+        }
+        if route_pool
+        else {}
+    ),
+    kind="counter",
+)
+
+
+@app.middleware("http")
+async def time_request(request: Request, call_next):
+    """Time the requests, their stages and the serialisation of the responses (see metrics)."""
+    if not METRICS_ENABLED:
+        return await call_next(request)
+    timings = RequestTimings()
+    token = current_timings.set(timings)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+        end = time.perf_counter()
+        if timings.handler_end is not None:
+            metrics.observe_stage("serialise", end - timings.handler_end)
+    finally:
+        current_timings.reset(token)
+    route = request.scope.get("route")
+    metrics.observe_request(getattr(route, "path", "other"), end - start)
+    if SERVER_TIMING:
+        timings.add("total", end - start)
+        response.headers["Server-Timing"] = timings.server_timing()
+    return response
+
+
+def count_search(d: Dijkstra, graph: str) -> None:
+    """Count a search and the nodes it settled.
+
+    :param d: The Dijkstra object that ran the search.
+    :param graph: Kind of graph searched (building, campus).
+    """
+    metrics.inc("searches", 1, "Shortest path searches by kind of graph.", graph=graph)
+    metrics.inc("settled_nodes", d.settled, "Nodes settled by the searches.", graph=graph)
+
+
+def get_route_pool() -> RoutePool:
+    """Get the pool of the route computations, it is started on first use: the worker processes
+    import this module and never start a pool of their own.
+    """
+    global route_pool
+    if route_pool is None:
+        if WORKERS:
+            # The workers do not inherit the threads of the API (no fork), they map the snapshots
+            context = multiprocessing.get_context("spawn")
+            executor = ProcessPoolExecutor(WORKERS, mp_context=context, initializer=init_worker)
+            route_pool = RoutePool(executor, WORKERS, MAX_PENDING, ROUTE_TIMEOUT)
+        else:
+            executor = ThreadPoolExecutor(ROUTE_THREADS, thread_name_prefix="route")
+            route_pool = RoutePool(executor, ROUTE_THREADS, MAX_PENDING, ROUTE_TIMEOUT)
+    return route_pool
+
+
+def stop_route_pool() -> None:
+    global route_pool
+    if route_pool is not None:
+        route_pool.shutdown()
+        route_pool = None
+
+
+def init_worker() -> None:
+    """Initializer of the worker processes: compile the outside graph before the first route."""
+    outside_graph.get_compiled()
+
+
+def sync_updates(updates: Dict[str, GraphUpdates]) -> None:
+    """Apply the live updates of the API process in a worker process.
+
+    :param updates: The updates of the layers (building name or OUTSIDE) of a computation.
+    """
+    for layer, layer_updates in updates.items():
+        if graph_updates.get(layer) == layer_updates:
+            continue
+        graph_updates[layer] = layer_updates
+        graph = outside_graph if layer == OUTSIDE else graphs.graphs.get(layer)
+        if graph is not None:  # Otherwise they are applied when it is loaded (restore_updates)
+            graph.updates = layer_updates
+            graph.apply_updates()
+
+
+def get_layer_updates(layer: str) -> Optional[GraphUpdates]:
+    """Get the live updates of a layer (building name or OUTSIDE). They are read from its graph if
+    it is loaded: a graph gets its updates before its version changes (see cache_route).
+    """
+    graph = outside_graph if layer == OUTSIDE else graphs.graphs.get(layer)
+    return graph.updates if graph is not None else graph_updates.get(layer)
+
+
+def run_route_task(function: Callable, args: tuple, updates: Dict[str, GraphUpdates]) -> tuple:
+    """Run a route computation in a worker process.
+
+    :param function: The computation, a function of this module.
+    :param args: Its arguments.
+    :param updates: The live updates of the layers of the computation (see sync_updates).
+    :return: The result of the computation, the timings of its stages and the counts of its
+        searches (see Metrics.pop_counters).
+    """
+    sync_updates(updates)
+    timings = RequestTimings()
+    token = current_timings.set(timings)
+    try:
+        result = function(*args)
+    finally:
+        current_timings.reset(token)
+    return result, timings.stages, metrics.pop_counters()
+
+
+async def compute_route(function: Callable, layers: Tuple[str, ...], *args) -> Any:
+    """Run a route computation in the pool (see utils.workers), the event loop stays free.
+
+    :param function: The computation, a function of this module.
+    :param layers: The layers (building names, OUTSIDE) the computation searches, their live
+        updates are sent to the worker processes.
+    :param args: Its arguments.
+    :raises HTTPException: 503 if the pool is saturated, 504 if the computation timed out, 404
+        if there is no route (see NoRoute).
+    :return: The result of the computation.
+    """
+    pool = get_route_pool()
+    start = time.perf_counter()
+    try:
+        if not WORKERS:
+            # The stages of the computation are timed in the context of the request
+            return await pool.run(contextvars.copy_context().run, function, *args)
+        updates = {layer: get_layer_updates(layer) for layer in layers}
+        updates = {layer: value for layer, value in updates.items() if value is not None}
+        result, stages, counters = await pool.run(run_route_task, function, args, updates)
+    except PoolSaturated as error:
+        raise HTTPException(
+            status_code=503, detail=str(error), headers={"Retry-After": str(error.retry_after)}
+        ) from None
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="The route computation timed out") from None
+    except NoRoute as error:
+        raise HTTPException(status_code=404, detail=str(error)) from None
+    if METRICS_ENABLED:
+        for stage, seconds in stages.items():
+            metrics.observe_stage(stage, seconds)
+        # Time spent waiting for a worker and sending the data to it and back
+        metrics.observe_stage("dispatch", time.perf_counter() - start - sum(stages.values()))
+        metrics.add_counters(counters)
+    return result
+
+
+def lookup_route(key: tuple, buildings: Tuple[str, ...]) -> Tuple[tuple, Optional[dict]]:
+    """Look a route up in the cache.
+
+    :param key: Key of the route.
+    :param buildings: The buildings of the route (see get_versions), their graphs are loaded.
+    :return: The state of the graphs of the route (see cache_route) and the cached response (None
+        if missing).
+    """
+    versions = get_versions(*buildings)
+    state = (versions, get_graph_versions(*buildings), buildings)
+    with metrics.stage("cache"):
+        return state, route_cache.get(key, versions)
+
+
+def cache_route(key: tuple, response: dict, state: tuple, paths: Dict[str, List[str]]) -> bool:
+    """Put a computed route in the cache, unless a graph of the route was updated since its lookup.
+    The update invalidated the cached routes through the edges it changed when it was applied,
+    maybe before this route is put: it could be outdated and it would stay in the cache.
+
+    :param key: Key of the route.
+    :param response: The response.
+    :param state: The state of the graphs at the lookup of the route (see lookup_route).
+    :param paths: The path in each layer of the route (see get_route_tags).
+    :return: True if the route was put in the cache.
+    """
+    versions, graph_versions, buildings = state
+    return route_cache.put(
+        key,
+        response,
+        versions,
+        get_route_tags(paths),
+        # Checked under the lock of the cache: the updates change the versions of the graph
+        # before invalidating the routes
+        is_valid=lambda: get_graph_versions(*buildings) == graph_versions,
+    )
+
+
+async def stream_route(
+    parts: AsyncIterator[dict], key: tuple, state: tuple, paths: Dict[str, List[str]]
+) -> AsyncIterator[str]:
+    """Write the parts of a response as they are computed, one json object by line (NDJSON).
+    The response is the union of the parts, it is put in the route cache once complete. If a part
+    fails, the last line is {"error": detail} instead.
+
+    :param parts: The parts of the response, dictionaries with some keys of the response.
+    :param key: Key of the route in the cache.
+    :param state: The state of the graphs at the lookup of the route (see lookup_route).
+    :param paths: The path in each layer of the route (see get_route_tags).
+    """
+    response = {}
+    try:
+        async for part in parts:
+            response.update(part)
+            yield json.dumps(part, ensure_ascii=False, separators=(",", ":")) + "\n"
+    except HTTPException as error:
+        yield json.dumps({"error": error.detail}) + "\n"
+        return
+    except Exception:
+        logger.exception("Failed to stream the route %s", key)
+        yield json.dumps({"error": "Internal Server Error"}) + "\n"
+        return
+    cache_route(key, response, state, paths)
+
+
+async def stream_cached(response: dict) -> AsyncIterator[str]:
+    yield json.dumps(response, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def build_rooms_index() -> NameIndex:
+    """Index the names and aliases of the rooms of every building for the autocompletion.
+    The rooms are read from the snapshots of the buildings (or from their plans if they are out of
+    date), the graphs of the buildings are not loaded.
+    """
+    index = NameIndex()
+    for building in graphs.list_buildings():
+        for room, name, aliases in BuildingGraph.read_rooms(graphs.get_path(building)):
+            index.add((building, room), name, aliases)
+    index.prepare_search()
+    return index
+
+
+# Index of the rooms of every building, built on first use (see get_rooms_index)
+rooms_index: Optional[NameIndex] = None
+rooms_index_lock = threading.Lock()
+
+
+def get_rooms_index() -> NameIndex:
+    """Get the index of the rooms of every building, it is built on first use: the startup time
+    does not grow with the number of buildings.
+    """
+    global rooms_index
+    index = rooms_index
+    if index is None:
+        with rooms_index_lock:
+            if rooms_index is None:
+                rooms_index = build_rooms_index()
+            index = rooms_index
+    return index
 
 
 class PathRequest(BaseModel):
     start: tuple = (-1, -1)  # Coordinates
     arrival: str = ""  # Room name
+    profile: Optional[str] = None  # Weight profile, e.g: step_free (see Graph.PROFILES)
+    geometry: str = COORDINATES  # Encoding of the outside path (see Analyse.geometry)
+    tolerance: float = 0.0  # Simplification of the outside path in metres (0: none)
+    nodes: bool = False  # Add the ids of the nodes of the outside path (path_nodes)
 
 
 class PathRequestFromInside(BaseModel):
     start: str = ""  # Room name
     arrival: str = ""  # Room name
+    profile: Optional[str] = None  # Weight profile, e.g: step_free (see Graph.PROFILES)
+    geometry: str = COORDINATES  # Encoding of the outside path (see Analyse.geometry)
+    tolerance: float = 0.0  # Simplification of the outside path in metres (0: none)
+    nodes: bool = False  # Add the ids of the nodes of the outside path (outside_path_nodes)
+
+
+class UpdateRequest(BaseModel):
+    graph: str = ""  # Name of a building, or "outside" for the outside graph
+    close_nodes: List[str] = []  # Ids (or names) of nodes
+    open_nodes: List[str] = []
+    close_edges: List[Tuple[str, str]] = []  # (source, target)
+    open_edges: List[Tuple[str, str]] = []
+    weights: List[Tuple[str, str, Optional[float]]] = []  # (source, target, weight or None to reset)
+
+
+class BatchPathRequest(BaseModel):
+    requests: List[PathRequestFromInside] = []
+
+
+class MatrixRequest(BaseModel):
+    sources: List[str] = []  # Room names
+    targets: List[str] = []  # Room names
 
 
 def get_building_name(room: str) -> str:
     return room.split(".")[0]
 
 
-def get_all_paths(
-    building_graph: BuildingGraph, lat: float, long: float, room: str
-) -> List[Tuple[float, List, List]]:
-    """Compute all the possible path from the user location to a room inside a building.
-
-    :param building_graph: The graph of the building where the use wants to go.
-    :param lat: Latitude of the user.
-    :param long: Longitude of the user.
-    :param room: Room the user wants to go to.
-    :raises AssertionError: If the length of the outside and inside path are not the same which could
-        not happen normaly the number of entrances we can reach from the outside
-        and the number of entrances we can reach from the inside should be the same.
-    :return: a tuple which include the length of the path, the coordinates of the nodes of the outside path and the nodes of the inside path.
-    """
-    entrances = building_graph.get_entrances()  # exits/entrances
-    closest_node = outside_graph.find_closest_node((lat, long))  # find the closest node to the user
-    d = Dijkstra(outside_graph)
-    # compute the path from the user to each building entrance
-    outside_paths: List[Tuple[float, List]] = [
-        d.dijkstra(closest_node, entrance) for entrance in entrances
-    ]
-    d = Dijkstra(building_graph)
-    # compute the path from each entrance to the room
-    inside_paths: List[Tuple[float, List]] = [d.dijkstra(entrance, room) for entrance in entrances]
-    # (total distance, outside path, inside path)
-    total_paths = [
-        (opath[0] + ipath[0], opath[1], ipath[1])
-        for opath, ipath in zip(outside_paths, inside_paths)
+def check_profile(profile: Optional[str]) -> None:
+    """Check the weight profile of a request.
+
+    :param profile: Name of the profile (None for the default weights).
+    :raises HTTPException: If there is no such profile.
+    """
+    if profile is not None and profile not in Graph.PROFILES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown profile {profile}, expected one of {list(Graph.PROFILES)}",
+        )
+
+
+def get_geometry(request) -> Tuple[str, float, bool]:
+    """Check and get the format of the outside path of a request, it is part of the key of the
+    route in the cache.
+
+    :param request: A PathRequest or a PathRequestFromInside.
+    :raises HTTPException: If the encoding is unknown or the tolerance is negative.
+    :return: The encoding, the tolerance of the simplification and if the ids of the nodes of the
+        outside path are added.
+    """
+    if request.geometry not in ENCODINGS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown geometry {request.geometry}, expected one of {ENCODINGS}",
+        )
+    if not request.tolerance >= 0:
+        raise HTTPException(status_code=422, detail="The tolerance must be a positive number")
+    return request.geometry, request.tolerance, request.nodes
+
+
+# Format of the outside path of the requests without geometry options (see get_geometry)
+DEFAULT_GEOMETRY = (COORDINATES, 0.0, False)
+
+
+def get_versions(*buildings: str) -> Tuple[int, ...]:
+    """Get the current versions of the routes of the outside graph and of some buildings graphs.
+    A cached route is only valid while the versions of the graphs it was computed on did not
+    change (see Graph.routes_version).
+    """
+    versions = [graphs[building].routes_version for building in buildings]
+    return (outside_graph.routes_version, *versions)
+
+
+def get_graph_versions(*buildings: str) -> Tuple[int, ...]:
+    """Get the versions of the compiled graphs of the outside graph and of some buildings (0 for a
+    building that is not loaded), they change with every update (see Graph.version).
+    """
+    loaded = graphs.graphs
+    return (outside_graph.version, *[getattr(loaded.get(b), "version", 0) for b in buildings])
+
+
+def get_route_tags(paths: Dict[str, List[str]]) -> List[Tuple[str, str, str]]:
+    """Tags of a cached route: the (layer, source, target) of each edge of its path, so the route
+    is invalidated when one of them is closed or gets longer (see /api/admin/update).
+
+    :param paths: The path in each layer (name of a building or OUTSIDE).
+    """
+    return [
+        (layer, source, target)
+        for layer, path in paths.items()
+        for source, target in zip(path, path[1:])
     ]
-    # Compute the total distance from the user to the room and choose the shortest path
-    assert len(outside_paths) == len(
-        inside_paths
-    ), "The number of entrances and inside paths should be the same"
-    return total_paths
 
 
-def compute_path_inside_same_building(
-    starting_room: str, arrival_room: str, building_graph: BuildingGraph
-) -> dict:
-    """Compute the path from the starting room to the arrival room inside the same building.
+def check_rooms(*rooms: str) -> None:
+    """Check the rooms of a request, without loading the graphs of their buildings.
 
-    :param starting_room: name of the starting room
-    :param arrival_room: name of the arrival room
-    :param building_graph: graph of the building
-    :return: The path from the starting room to the arrival room, the instructions to get there and the images.
+    :param rooms: Names (or aliases) of the rooms.
+    :raises HTTPException: If there is no such room.
     """
-    d = Dijkstra(building_graph)
-    path = d.dijkstra(starting_room, arrival_room)[1]
-    a = BPathAnalyzer(building_graph, path)
-    return {
-        "path": [],
-        "instructions": a.get_instructions(),
-        "images": a.get_images(),
-    }
+    index = get_rooms_index()
+    for room in rooms:
+        if room not in index or index.get(room)[0] != get_building_name(room).upper():
+            raise HTTPException(status_code=404, detail=f"Unknown room {room}")
+
+
+def get_room_node(room: str) -> Tuple[str, str]:
+    """Get the node of a room in the campus graph.
+
+    :param room: Name of the room, e.g: P1.2.301
+    :raises KeyError: If there is no such building.
+    :raises ValueError: If the building has no such room.
+    :return: The (building, node) tuple.
+    """
+    building = get_building_name(room).upper()
+    return (building, graphs[building].find_node(room))
 
 
-def getShortestPathIdx(paths: List[Tuple[float, List, List]]) -> int:
-    """According to the total distance of each path, return the index of the shortest path.
+def get_campus_graph(*buildings: str) -> CampusGraph:
+    """Get the campus graph, it links the loaded buildings through the outside graph. It is built
+    on first use and kept for the next requests, it is built again when one of its graphs has been
+    edited or reloaded, or when a route needs a building it does not have. It is dropped when one
+    of its buildings is evicted (see drop_campus_graph).
 
-    :param all_paths: List of paths with the total distance, the outside path and the inside path.
-    :return: The index of the shortest path.
+    :param buildings: Names of the buildings of a route, they are loaded if needed.
+    :return: The campus graph.
     """
-    return min(range(len(paths)), key=lambda i: paths[i][0])
+    global campus_graph
+    layers = {building: graphs[building] for building in buildings}
+
+    def is_valid(campus: Optional[CampusGraph]) -> bool:
+        return (
+            campus is not None
+            and all(campus.layers.get(name) is graph for name, graph in layers.items())
+            and not campus.is_outdated()
+        )
 
+    campus = campus_graph
+    if is_valid(campus):
+        return campus
+    with campus_lock:
+        campus = campus_graph
+        if not is_valid(campus):
+            with metrics.stage("campus"):
+                campus = CampusGraph(outside_graph, {**graphs.get_loaded(), **layers})
+            campus_graph = campus
+            # Evicting a building to make room drops the campus graph, the next route builds it
+            # again without it
+            graphs.reserve(CAMPUS, campus.nbytes())
+    return campus
 
-def compute_path_inside_different_building(
-    starting_room: str, arrival_room: str, starting_building: str, arrival_building: str
-):
-    """Compute the path from the starting room to the arrival room inside different buildings.
+
+def get_campus_paths(
+    campus: CampusGraph,
+    source,
+    target,
+    departures: Tuple[str, ...],
+    arrivals: Tuple[str, ...],
+    profile: Optional[str] = None,
+) -> Dict[str, List[str]]:
+    """Compute the shortest path between two nodes of the campus graph with a single search.
+
+    :param campus: The campus graph.
+    :param source: The source node, a (layer, node) tuple.
+    :param target: The target node, a (layer, node) tuple.
+    :param departures: Buildings the route can leave (see CampusGraph.get_blocked).
+    :param arrivals: Buildings the route can enter.
+    :param profile: Weight profile of the search (None for the default weights).
+    :raises NoRoute: If there is no path.
+    :return: The path in each layer (outside graph and buildings) the route goes through.
+    """
+    with metrics.stage("search"):
+        blocked = campus.get_blocked(departures, arrivals)
+        d = Dijkstra(campus, astar=True, profile=profile, blocked=blocked)
+        distance, path = d.dijkstra(source, target)
+    count_search(d, "campus")
+    check_route(distance, profile)
+    return dict(campus.split_path(path))
+
+
+def search_route_from_inside(
+    starting_room: str, arrival_room: str, profile: Optional[str] = None
+) -> Dict[str, List[str]]:
+    """Compute the path from the starting room to the arrival room, inside the same building or
+    through the outside graph.
 
     :param starting_room: Name of the starting room.
     :param arrival_room: Name of the arrival room.
+    :param profile: Weight profile of the search (None for the default weights).
+    :raises NoRoute: If there is no path.
+    :return: The path in each layer the route goes through (see get_route_tags).
+    """
+    starting_building = get_building_name(starting_room).upper()
+    arrival_building = get_building_name(arrival_room).upper()
+    if starting_building != arrival_building:
+        campus = get_campus_graph(starting_building, arrival_building)
+        source, target = get_room_node(starting_room), get_room_node(arrival_room)
+        return get_campus_paths(
+            campus, source, target, (starting_building,), (arrival_building,), profile
+        )
+    # If the user is in the same building, we can use the building graph
+    with metrics.stage("search"):
+        d = Dijkstra(graphs[starting_building], astar=True, profile=profile)
+        distance, path = d.dijkstra(starting_room, arrival_room)
+    count_search(d, "building")
+    check_route(distance, profile)
+    return {starting_building: path}
+
+
+def search_route_through_hierarchy(
+    closest_node: str, room: str, profile: Optional[str] = None
+) -> Optional[Dict[str, List[str]]]:
+    """Compute the path from a node of the outside graph to a room with the contraction hierarchy
+    of the outside graph (see OutsideGraph.load_hierarchy). The route enters the building once: it
+    is the shortest outside path to an entrance (a query of the hierarchy) followed by the
+    shortest path from this entrance to the room (a single search rooted at the room).
+
+    :param closest_node: The node of the outside graph the user is snapped to.
+    :param room: Name of the arrival room.
+    :param profile: Weight profile of the search (None for the default weights).
+    :raises NoRoute: If there is no path.
+    :return: The path in each layer the route goes through (see get_route_tags), None if the
+        hierarchy cannot be used (not loaded, live updates of the outside graph, or a profile that
+        changes the weights of the outside graph).
+    """
+    outside = Dijkstra(outside_graph, hierarchy=True, profile=profile)
+    if not outside.uses_hierarchy():
+        return None
+    building, room_node = get_room_node(room)
+    exits = outside_graph.compiled.index
+    entrances = [entrance for entrance in graphs[building].get_entrances() if entrance in exits]
+    with metrics.stage("search"):
+        inside = Dijkstra(graphs[building], profile=profile)
+        to_room = inside.dijkstra_from_many(entrances, room_node)
+    count_search(inside, "building")
+    best, paths = INF, {}
+    # The entrances closest to the room first: the others are skipped once they cannot be better
+    for entrance in sorted(entrances, key=lambda entrance: to_room[entrance][0]):
+        inside_distance, inside_path = to_room[entrance]
+        if inside_distance >= best:
+            break
+        with metrics.stage("search"):
+            outside_distance, outside_path = outside.dijkstra(closest_node, entrance)
+        count_search(outside, "hierarchy")
+        if outside_distance + inside_distance < best:
+            best = outside_distance + inside_distance
+            paths = {OUTSIDE: outside_path, building: inside_path}
+    check_route(best, profile)
+    return paths
+
+
+def search_route_from_outside(
+    closest_node: str, room: str, profile: Optional[str] = None
+) -> Dict[str, List[str]]:
+    """Compute the path from a node of the outside graph to a room. The outside leg is a query of
+    the contraction hierarchy when it can be used (see search_route_through_hierarchy), otherwise
+    the route is a single search of the campus graph.
+
+    :param closest_node: The node of the outside graph the user is snapped to.
+    :param room: Name of the arrival room.
+    :param profile: Weight profile of the search (None for the default weights).
+    :raises NoRoute: If there is no path.
+    :return: The path in each layer the route goes through (see get_route_tags).
+    """
+    paths = search_route_through_hierarchy(closest_node, room, profile)
+    if paths is not None:
+        return paths
+    building = get_building_name(room).upper()
+    campus = get_campus_graph(building)
+    return get_campus_paths(
+        campus, (OUTSIDE, closest_node), get_room_node(room), (), (building,), profile
+    )
+
+
+def analyse_building_path(building: str, path: List[str]) -> dict:
+    """Translate the path of a route inside a building into instructions and images.
+
+    :param building: Name of the building.
+    :param path: The path in the building.
+    :return: The instructions and the images of the path.
+    """
+    with metrics.stage("analyse"):
+        a = BPathAnalyzer(graphs[building], path)
+        return {"instructions": a.get_instructions(), "images": a.get_images()}
+
+
+def analyse_outside_path(path: List[str], encoding: str = COORDINATES, tolerance: float = 0.0):
+    """Get the coordinates of the nodes of the path of a route in the outside graph.
+
+    :param path: The path in the outside graph.
+    :param encoding: Encoding of the coordinates (see Analyse.geometry).
+    :param tolerance: Tolerance of the simplification of the path in metres (0: none).
+    :return: The coordinates, simplified and encoded.
+    """
+    with metrics.stage("analyse"):
+        return OPathAnalyzer(outside_graph, path).get_geometry(encoding, tolerance)
+
+
+def analyse_path_inside_same_building(path: List[str], building_graph: BuildingGraph) -> dict:
+    """Translate a path inside a building into instructions and images.
+
+    :param path: The path from the starting room to the arrival room.
+    :param building_graph: graph of the building
+    :return: The instructions and the images of the path.
+    """
+    with metrics.stage("analyse"):
+        a = BPathAnalyzer(building_graph, path)
+        return {
+            "path": [],
+            "instructions": a.get_instructions(),
+            "images": a.get_images(),
+        }
+
+
+def analyse_path_inside_different_building(
+    paths: Dict[str, List[str]],
+    starting_building: str,
+    arrival_building: str,
+    encoding: str = COORDINATES,
+    tolerance: float = 0.0,
+) -> dict:
+    """Translate a path between two buildings into instructions, images and coordinates.
+
+    :param paths: The path in each layer of the campus graph (see get_campus_paths).
     :param starting_building: Name of the starting building.
     :param arrival_building: Name of the arrival building.
-    :return: The path to exit the first building , the path to get to the arrival building,
-        the path to get to the arrival room and the corresponding instructions and images.
-    """
-    building_graph = graphs[starting_building]
-    arrival_graph = graphs[arrival_building]
-    entrances = building_graph.get_entrances()
-    d = Dijkstra(building_graph)
-    # paths from the starting room to each entrance of starting building
-    paths_to_entrances = [d.dijkstra(starting_room, entrance) for entrance in entrances]
-    # best path from each entrances from the starting building to the arrival room
-    paths_to_rooms = []
-    for entrance in entrances:
-        lat, long = outside_graph.get_lat_long(entrance)
-        all_paths = get_all_paths(arrival_graph, lat, long, arrival_room)
-        # Get the index of the shortest path
-        idx_min = getShortestPathIdx(all_paths)
-        paths_to_rooms.append(all_paths[idx_min])
-    # (total distance, path to entrance, path from entrance to arrival room)
-    complete_paths = [
-        (p1[0] + p2[0], p1[1], p2) for p1, p2 in zip(paths_to_entrances, paths_to_rooms)
-    ]
-    # Get the index of the shortest path
-    idx_min = getShortestPathIdx(complete_paths)
+    :param encoding: Encoding of the coordinates of the outside path (see Analyse.geometry).
+    :param tolerance: Tolerance of the simplification of the outside path in metres (0: none).
+    :return: The instructions and images of both buildings and the coordinates of the outside path.
+    """
     # first building path analyse
-    fanalyse_in = BPathAnalyzer(building_graph, complete_paths[idx_min][1])
+    first = analyse_building_path(starting_building, paths.get(starting_building, []))
     # analyse outside path
-    analyse_out = OPathAnalyzer(outside_graph, complete_paths[idx_min][2][1])
+    outside_path = analyse_outside_path(paths.get(OUTSIDE, []), encoding, tolerance)
     # second building path analyse
-    sanalyse_in = BPathAnalyzer(arrival_graph, complete_paths[idx_min][2][2])
+    final = analyse_building_path(arrival_building, paths.get(arrival_building, []))
     return {
-        "first_instructions": fanalyse_in.get_instructions(),
-        "first_building_images": fanalyse_in.get_images(),
-        "outside_path": analyse_out.analyse(),
-        "final_instructions": sanalyse_in.get_instructions(),
-        "final_building_images": sanalyse_in.get_images(),
+        "first_instructions": first["instructions"],
+        "first_building_images": first["images"],
+        "outside_path": outside_path,
+        "final_instructions": final["instructions"],
+        "final_building_images": final["images"],
     }
 
 
@@ -163,53 +793,528 @@ async def root():
 
 @app.get("/api/available_buildings")
 def get_available_buildings_endpoint():
-    return {"buildings": list(graphs.keys())}
+    return {"buildings": graphs.list_buildings()}
+
+
+@app.get("/api/stats")
+def get_stats_endpoint() -> dict:
+    """Counters of the graph registry (loads, evictions, memory), of the route cache and of the
+    route pool.
+    """
+    return {
+        "graphs": graphs.stats(),
+        "route_cache": route_cache.stats(),
+        "route_pool": route_pool.stats() if route_pool else None,
+    }
+
+
+@app.get("/metrics")
+def get_metrics_endpoint() -> Response:
+    """Metrics of the API (stages of the requests, searches, caches) in the Prometheus text
+    format.
+    """
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="The metrics are disabled")
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/rooms/search")
+def search_rooms(q: str, limit: int = 10) -> dict:
+    """Autocomplete a room name.
+
+    :param q: The beginning (or a part) of the name of the room, e.g: P1.2.3
+    :param limit: Maximum number of rooms to return.
+    :return: The matching rooms with their building.
+    """
+    return {
+        "rooms": [
+            {"name": name, "building": building}
+            for name, (building, _) in get_rooms_index().search(q, limit)
+        ]
+    }
+
+
+def compute_route_from_inside(
+    starting_room: str,
+    arrival_room: str,
+    profile: Optional[str] = None,
+    geometry: Tuple[str, float, bool] = DEFAULT_GEOMETRY,
+) -> Tuple[dict, Dict[str, List[str]]]:
+    """Compute the response of /api/ask_from_inside (run in the route pool).
+
+    :param starting_room: Name of the starting room.
+    :param arrival_room: Name of the arrival room.
+    :param profile: Weight profile of the search (None for the default weights).
+    :param geometry: Format of the outside path (see get_geometry).
+    :return: The response and the path in each layer (see get_route_tags).
+    """
+    starting_building = get_building_name(starting_room).upper()
+    arrival_building = get_building_name(arrival_room).upper()
+    paths = search_route_from_inside(starting_room, arrival_room, profile)
+    if starting_building == arrival_building:
+        building_graph = graphs[starting_building]
+        result = analyse_path_inside_same_building(paths[starting_building], building_graph)
+        return {"same_building": True, **result}, paths
+    encoding, tolerance, nodes = geometry
+    result = analyse_path_inside_different_building(
+        paths, starting_building, arrival_building, encoding, tolerance
+    )
+    if nodes:
+        result["outside_path_nodes"] = paths.get(OUTSIDE, [])
+    return {"same_building": False, **result}, paths
 
 
 @app.post("/api/ask_from_inside")
-def ask_from_inside(request: PathRequestFromInside) -> dict:
+@metrics.endpoint
+async def ask_from_inside(request: PathRequestFromInside) -> dict:
     """Compute the path from the user's room to the arrival room.
 
     :param request: User's data given by the frontend.
     :return: The path if the user wants to go to a room in the same building.
     :return: The path if the user wants to go to a room in another  building.
     """
+    check_profile(request.profile)
+    geometry = get_geometry(request)
+    starting_room = request.start
+    arrival_room = request.arrival
+    buildings = (get_building_name(starting_room).upper(), get_building_name(arrival_room).upper())
+    key = ("inside", normalize(starting_room), normalize(arrival_room), request.profile, geometry)
+    state, response = await run_in_threadpool(lookup_route, key, buildings)
+    if response is not None:
+        return response
+    response, paths = await compute_route(
+        compute_route_from_inside,
+        (OUTSIDE, *buildings),
+        starting_room,
+        arrival_room,
+        request.profile,
+        geometry,
+    )
+    cache_route(key, response, state, paths)
+    return response
+
+
+@app.post("/api/ask_from_inside/stream")
+async def ask_from_inside_stream(request: PathRequestFromInside) -> StreamingResponse:
+    """Streaming variant of /api/ask_from_inside: the parts of the response are sent as soon as
+    they are computed, one json object by line (NDJSON), see stream_route. Between buildings, the
+    outside path comes first, then the instructions and images of the starting building, then the
+    ones of the arrival building. The union of the lines is the response of /api/ask_from_inside.
+
+    :param request: User's data given by the frontend.
+    :return: The parts of the response.
+    """
+    check_profile(request.profile)
+    encoding, tolerance, nodes = geometry = get_geometry(request)
     starting_room = request.start
     arrival_room = request.arrival
     starting_building = get_building_name(starting_room).upper()
     arrival_building = get_building_name(arrival_room).upper()
-    if starting_building == arrival_building:
-        # If the user is in the same building, we can use the building graph
-        result = compute_path_inside_same_building(
-            starting_room, arrival_room, graphs[starting_building]
+    layers = (OUTSIDE, starting_building, arrival_building)
+    key = ("inside", normalize(starting_room), normalize(arrival_room), request.profile, geometry)
+    state, response = await run_in_threadpool(lookup_route, key, layers[1:])
+    if response is not None:
+        return StreamingResponse(stream_cached(response), media_type="application/x-ndjson")
+    paths = await compute_route(
+        search_route_from_inside, layers, starting_room, arrival_room, request.profile
+    )
+
+    async def parts() -> AsyncIterator[dict]:
+        if starting_building == arrival_building:
+            result = await compute_route(
+                analyse_building_path, layers, starting_building, paths[starting_building]
+            )
+            yield {"same_building": True, "path": [], **result}
+            return
+        outside_path = await compute_route(
+            analyse_outside_path, layers, paths.get(OUTSIDE, []), encoding, tolerance
         )
-        return {"same_building": True, **result}
+        part = {"same_building": False, "outside_path": outside_path}
+        if nodes:
+            part["outside_path_nodes"] = paths.get(OUTSIDE, [])
+        yield part
+        for prefix, images, building in (
+            ("first", "first_building_images", starting_building),
+            ("final", "final_building_images", arrival_building),
+        ):
+            result = await compute_route(
+                analyse_building_path, layers, building, paths.get(building, [])
+            )
+            yield {f"{prefix}_instructions": result["instructions"], images: result["images"]}
+
+    return StreamingResponse(
+        stream_route(parts(), key, state, paths), media_type="application/x-ndjson"
+    )
+
+
+# A group of pairs of /api/ask_batch: (starting room, starting building, arrival building, profile)
+BatchGroup = Tuple[str, str, str, Optional[str]]
+
+
+def lookup_batch(
+    pairs: List[PathRequestFromInside], geometries: List[Tuple[str, float, bool]]
+) -> Tuple[List[dict], Dict[BatchGroup, List[int]], Dict[BatchGroup, tuple]]:
+    """Look the routes of /api/ask_batch up in the cache.
+
+    :param pairs: The pairs of the request.
+    :param geometries: The format of the outside path of each pair (see get_geometry).
+    :return: The cached response of each pair ({} if missing), the indexes of the missing pairs
+        by group and the state of the graphs of each group (see lookup_route).
+    """
+    results: List[dict] = [{} for _ in pairs]
+    groups: Dict[BatchGroup, List[int]] = {}
+    states: Dict[BatchGroup, tuple] = {}
+    for idx, pair in enumerate(pairs):
+        buildings = (get_building_name(pair.start).upper(), get_building_name(pair.arrival).upper())
+        key = ("inside", normalize(pair.start), normalize(pair.arrival), pair.profile)
+        state, cached = lookup_route(key + (geometries[idx],), buildings)
+        if cached is not None:
+            results[idx] = cached
+        else:
+            group = (pair.start, *buildings, pair.profile)
+            groups.setdefault(group, []).append(idx)
+            states.setdefault(group, state)
+    return results, groups, states
+
+
+def compute_batch_group(
+    starting_room: str,
+    starting_building: str,
+    arrival_building: str,
+    profile: Optional[str],
+    routes: List[Tuple[str, Tuple[str, float, bool]]],
+) -> Dict[Tuple[str, Tuple[str, float, bool]], Tuple[dict, Optional[Dict[str, List[str]]]]]:
+    """Compute the routes of a group of /api/ask_batch with a single one-to-many search.
+
+    :param starting_room: Name of the starting room of the group.
+    :param starting_building: Its building.
+    :param arrival_building: Building of the arrival rooms of the group.
+    :param profile: Weight profile of the search (None for the default weights).
+    :param routes: The (arrival room, geometry) of the routes, each one is analysed once.
+    :return: The response and the path in each layer of each route ({"error": detail} and None
+        for a route that does not exist, see NoRoute).
+    """
+    arrivals = list(dict.fromkeys(arrival for arrival, _ in routes))
+    if starting_building == arrival_building:
+        building_graph = graphs[starting_building]
+        with metrics.stage("search"):
+            d = Dijkstra(building_graph, profile=profile)
+            tree = d.dijkstra_to_many(starting_room, arrivals)
+        count_search(d, "building")
+        distances = {arrival: tree[arrival][0] for arrival in arrivals}
+        paths = {arrival: {starting_building: tree[arrival][1]} for arrival in arrivals}
     else:
-        result = compute_path_inside_different_building(
-            starting_room, arrival_room, starting_building, arrival_building
-        )
-        return {"same_building": False, **result}
+        campus = get_campus_graph(starting_building, arrival_building)
+        targets = {arrival: get_room_node(arrival) for arrival in arrivals}
+        with metrics.stage("search"):
+            blocked = campus.get_blocked((starting_building,), (arrival_building,))
+            d = Dijkstra(campus, astar=True, profile=profile, blocked=blocked)
+            tree = d.dijkstra_to_many(get_room_node(starting_room), targets.values())
+        count_search(d, "campus")
+        distances = {arrival: tree[node][0] for arrival, node in targets.items()}
+        paths = {
+            arrival: dict(campus.split_path(tree[node][1])) for arrival, node in targets.items()
+        }
+    results = {}
+    for arrival, geometry in routes:
+        try:
+            check_route(distances[arrival], profile)
+        except NoRoute as error:
+            results[(arrival, geometry)] = ({"error": str(error)}, None)
+            continue
+        if starting_building == arrival_building:
+            response = analyse_path_inside_same_building(
+                paths[arrival][starting_building], building_graph
+            )
+            response = {"same_building": True, **response}
+        else:
+            encoding, tolerance, nodes = geometry
+            response = analyse_path_inside_different_building(
+                paths[arrival], starting_building, arrival_building, encoding, tolerance
+            )
+            response = {"same_building": False, **response}
+            if nodes:
+                response["outside_path_nodes"] = paths[arrival].get(OUTSIDE, [])
+        results[(arrival, geometry)] = (response, paths[arrival])
+    return results
+
+
+def compute_batch(queries: Dict[BatchGroup, list]) -> Dict[BatchGroup, dict]:
+    """Compute the routes of /api/ask_batch that are not cached (run in the route pool).
+
+    :param queries: The (arrival room, geometry) of the routes of each group.
+    :return: The routes of each group (see compute_batch_group).
+    """
+    return {group: compute_batch_group(*group, routes) for group, routes in queries.items()}
+
+
+@app.post("/api/ask_batch")
+@metrics.endpoint
+async def ask_batch(request: BatchPathRequest) -> dict:
+    """Compute the paths of several (starting room, arrival room) pairs.
+    The pairs that share their starting room and their arrival building are answered by a single
+    one-to-many search. The routes that are not cached are computed by one computation of the
+    route pool.
+
+    :param request: The pairs, each one is a request of /api/ask_from_inside.
+    :raises HTTPException: 404 if a room is unknown, 422 if a profile or a geometry is invalid,
+        503 if the route pool is saturated, 504 if the computation timed out.
+    :return: The response of /api/ask_from_inside for each pair, in the same order ({"error":
+        detail} for a pair without a route, see NoRoute).
+    """
+    geometries = []
+    for pair in request.requests:
+        check_profile(pair.profile)
+        geometries.append(get_geometry(pair))
+    # The index of the rooms is built by the first request that needs it
+    rooms = [room for pair in request.requests for room in (pair.start, pair.arrival)]
+    await run_in_threadpool(check_rooms, *rooms)
+    results, groups, states = await run_in_threadpool(lookup_batch, request.requests, geometries)
+    if not groups:
+        return {"results": results}
+    queries = {
+        group: list(dict.fromkeys((request.requests[idx].arrival, geometries[idx]) for idx in idxs))
+        for group, idxs in groups.items()
+    }
+    layers = (OUTSIDE, *dict.fromkeys(b for group in groups for b in group[1:3]))
+    routes = await compute_route(compute_batch, layers, queries)
+    for group, idxs in groups.items():
+        starting_room, profile = group[0], group[3]
+        for (arrival, geometry), (response, paths) in routes[group].items():
+            if paths is not None:  # Pairs without a route are not cached
+                key = ("inside", normalize(starting_room), normalize(arrival), profile, geometry)
+                cache_route(key, response, states[group], paths)
+        for idx in idxs:
+            results[idx] = routes[group][(request.requests[idx].arrival, geometries[idx])][0]
+    return {"results": results}
+
+
+def compute_matrix(sources: List[str], targets: List[str]) -> List[List[Optional[float]]]:
+    """Compute the distances of /api/matrix (run in the route pool), with one search for each
+    source and each building of the targets.
+
+    :param sources: The source rooms.
+    :param targets: The target rooms.
+    :return: The distances, distances[i][j] is the distance from sources[i] to targets[j]
+        (None if there is no path).
+    """
+    # arrival building -> targets in this building
+    buildings: Dict[str, List[str]] = {}
+    for target in targets:
+        buildings.setdefault(get_building_name(target).upper(), []).append(target)
+    distances: List[List] = []
+    for source in sources:
+        starting_building = get_building_name(source).upper()
+        row: Dict[str, float] = {}
+        for arrival_building, building_targets in buildings.items():
+            if starting_building == arrival_building:
+                with metrics.stage("search"):
+                    d = Dijkstra(graphs[starting_building])
+                    row.update(d.distances_to_many(source, building_targets))
+                count_search(d, "building")
+                continue
+            campus = get_campus_graph(starting_building, arrival_building)
+            nodes = {target: get_room_node(target) for target in building_targets}
+            with metrics.stage("search"):
+                blocked = campus.get_blocked((starting_building,), (arrival_building,))
+                d = Dijkstra(campus, astar=True, blocked=blocked)
+                to_targets = d.distances_to_many(get_room_node(source), nodes.values())
+            count_search(d, "campus")
+            row.update({target: to_targets[node] for target, node in nodes.items()})
+        distances.append([row[target] if row[target] < INF else None for target in targets])
+    return distances
+
+
+@app.post("/api/matrix")
+@metrics.endpoint
+async def matrix(request: MatrixRequest) -> dict:
+    """Compute the distance between every source room and every target room.
+    Only the distances are computed (no path analysis), by one computation of the route pool.
+
+    :param request: The source rooms and the target rooms.
+    :raises HTTPException: 404 if a room is unknown, 503 if the route pool is saturated, 504 if
+        the computation timed out.
+    :return: The distances, distances[i][j] is the distance from sources[i] to targets[j]
+        (None if there is no path).
+    """
+    rooms = [*request.sources, *request.targets]
+    await run_in_threadpool(check_rooms, *rooms)
+    layers = (OUTSIDE, *dict.fromkeys(get_building_name(room).upper() for room in rooms))
+    distances = await compute_route(compute_matrix, layers, request.sources, request.targets)
+    return {"sources": request.sources, "targets": request.targets, "distances": distances}
+
+
+def lookup_outside_route(
+    position: Tuple[float, float],
+    room: str,
+    profile: Optional[str],
+    geometry: Tuple[str, float, bool],
+) -> Tuple[str, tuple, tuple, Optional[dict]]:
+    """Snap the user to the outside graph and look the route up in the cache (see lookup_route).
+    It is run in the threadpool, the event loop does not wait for the snapping.
+
+    :param position: (latitude, longitude) of the user.
+    :param room: Name of the arrival room.
+    :param profile: Weight profile of the search (None for the default weights).
+    :param geometry: Format of the outside path (see get_geometry).
+    :return: The node the user is snapped to, the key of the route, the state of the graphs of the
+        route and the cached response (None if missing).
+    """
+    with metrics.stage("snap"):
+        closest_node = outside_graph.find_closest_node(position)
+    # Users snapped to the same node share the cached route
+    key = ("outside", closest_node, normalize(room), profile, geometry)
+    state, response = lookup_route(key, (get_building_name(room).upper(),))
+    return closest_node, key, state, response
+
+
+def compute_route_from_outside(
+    closest_node: str,
+    room: str,
+    profile: Optional[str] = None,
+    geometry: Tuple[str, float, bool] = DEFAULT_GEOMETRY,
+) -> Tuple[dict, Dict[str, List[str]]]:
+    """Compute the response of /api/ask (run in the route pool).
+
+    :param closest_node: The node of the outside graph the user is snapped to.
+    :param room: Name of the arrival room.
+    :param profile: Weight profile of the search (None for the default weights).
+    :param geometry: Format of the outside path (see get_geometry).
+    :return: The response and the path in each layer (see get_route_tags).
+    """
+    encoding, tolerance, nodes = geometry
+    building = get_building_name(room).upper()
+    paths = search_route_from_outside(closest_node, room, profile)
+    # return : coordinates of each nodes, instruction inside, images
+    response = {
+        "path": analyse_outside_path(paths.get(OUTSIDE, []), encoding, tolerance),
+        **analyse_building_path(building, paths.get(building, [])),
+    }
+    if nodes:
+        response["path_nodes"] = paths.get(OUTSIDE, [])
+    return response, paths
 
 
 @app.post("/api/ask")
-def ask(request: PathRequest) -> dict:
+@metrics.endpoint
+async def ask(request: PathRequest) -> dict:
     """Compute the path from the user's location to the arrival room inside a building.
 
     :param request: User's data given by the frontend.
     :return: The path from the user's location to the arrival room, the instructions and the images when inside the building.
     """
+    check_profile(request.profile)
     lat, long = float(request.start[0]), float(request.start[1])
     room = request.arrival  # e.g: P1.2.301
     building = get_building_name(room).upper()  # e.g: P1
-    building_graph = graphs[building]
-    total_paths = get_all_paths(building_graph, lat, long, room)
-    idx_min = getShortestPathIdx(total_paths)
-    analyse_out = OPathAnalyzer(outside_graph, total_paths[idx_min][1])
-    analyse_in = BPathAnalyzer(building_graph, total_paths[idx_min][2])
+    geometry = get_geometry(request)
+    closest_node, key, state, response = await run_in_threadpool(
+        lookup_outside_route, (lat, long), room, request.profile, geometry
+    )
+    if response is not None:
+        return response
+    response, paths = await compute_route(
+        compute_route_from_outside,
+        (OUTSIDE, building),
+        closest_node,
+        room,
+        request.profile,
+        geometry,
+    )
+    cache_route(key, response, state, paths)
+    return response
 
-    # return : coordinates of each nodes, instruction inside, images
+
+@app.post("/api/ask/stream")
+async def ask_stream(request: PathRequest) -> StreamingResponse:
+    """Streaming variant of /api/ask: the coordinates of the outside path are sent as soon as the
+    route is found, then the instructions and images inside the building, one json object by line
+    (NDJSON), see stream_route. The union of the lines is the response of /api/ask.
+
+    :param request: User's data given by the frontend.
+    :return: The parts of the response.
+    """
+    check_profile(request.profile)
+    encoding, tolerance, nodes = geometry = get_geometry(request)
+    lat, long = float(request.start[0]), float(request.start[1])
+    room = request.arrival
+    building = get_building_name(room).upper()
+    closest_node, key, state, response = await run_in_threadpool(
+        lookup_outside_route, (lat, long), room, request.profile, geometry
+    )
+    if response is not None:
+        return StreamingResponse(stream_cached(response), media_type="application/x-ndjson")
+    layers = (OUTSIDE, building)
+    paths = await compute_route(
+        search_route_from_outside, layers, closest_node, room, request.profile
+    )
+
+    async def parts() -> AsyncIterator[dict]:
+        part = {
+            "path": await compute_route(
+                analyse_outside_path, layers, paths.get(OUTSIDE, []), encoding, tolerance
+            )
+        }
+        if nodes:
+            part["path_nodes"] = paths.get(OUTSIDE, [])
+        yield part
+        yield await compute_route(analyse_building_path, layers, building, paths.get(building, []))
+
+    return StreamingResponse(
+        stream_route(parts(), key, state, paths), media_type="application/x-ndjson"
+    )
+
+
+def check_admin(token: Optional[str]) -> None:
+    """Check the token of a request of the admin API.
+
+    :raises HTTPException: If the admin API is disabled or the token is wrong.
+    """
+    if ADMIN_TOKEN is None or token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin token missing or invalid")
+
+
+@app.post("/api/admin/update")
+def update_graph(request: UpdateRequest, x_admin_token: Optional[str] = Header(None)) -> dict:
+    """Close or reopen nodes and edges of a graph and override weights, without a restart.
+    The changes are applied atomically, the cached routes that went through an edge that is
+    closed or longer are invalidated (all the routes of the graph if an edge became shorter).
+
+    :param request: The graph and its changes.
+    :param x_admin_token: Token of the admin API.
+    :return: The updates of the graph, the number of invalidated routes and the time taken.
+    """
+    check_admin(x_admin_token)
+    start = time.perf_counter()
+    if request.graph == OUTSIDE:
+        layer, graph = OUTSIDE, outside_graph
+    else:
+        layer = request.graph.upper()
+        if layer not in graphs:
+            raise HTTPException(status_code=404, detail=f"Unknown graph {request.graph}")
+        graph = graphs[layer]
+    try:
+        increased = graph.update(
+            close_nodes=request.close_nodes,
+            open_nodes=request.open_nodes,
+            close_edges=request.close_edges,
+            open_edges=request.open_edges,
+            weights={(source, target): weight for source, target, weight in request.weights},
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error)) from None
+    graph_updates[layer] = graph.updates
+    invalidated = route_cache.invalidate((layer, source, target) for source, target in increased)
     return {
-        "path": analyse_out.analyse(),
-        "instructions": analyse_in.get_instructions(),
-        "images": analyse_in.get_images(),
+        "graph": layer,
+        "updates": graph.updates.to_dict(),
+        "invalidated_routes": invalidated,
+        "time": time.perf_counter() - start,
     }
+
+
+@app.get("/api/admin/updates")
+def get_updates(x_admin_token: Optional[str] = Header(None)) -> dict:
+    """Get the live updates of every graph (see /api/admin/update)."""
+    check_admin(x_admin_token)
+    return {layer: updates.to_dict() for layer, updates in graph_updates.items() if updates}
@@ -1 +0,0 @@
-from .update_weigths import main as update_weights
@@ -0,0 +1,32 @@
+"""
+:Date: 18/10/2026
+:Decription: Offline preprocessing that builds the contraction hierarchy of the outside graphs
+(see Graph/hierarchy.py) and saves it next to their json file. The API loads it at startup and
+answers the outside leg of the routes from outside with it (see main.search_route_through_hierarchy)
+as long as the json file does not change, it has to be built again after editing the map.
+Run it from the root of the repository: ``PYTHONPATH=src python -m utils.build_hierarchy``.
+"""
+
+import time
+
+from Graph import OutsideGraph
+from utils.build_snapshots import OUTSIDE_PLANS
+from utils.constants import OUTSIDE_DATA_DIR
+
+
+def main():
+    for plan in OUTSIDE_PLANS:
+        path = f"{OUTSIDE_DATA_DIR}{plan}"
+        graph = OutsideGraph(path)
+        start = time.perf_counter()
+        hierarchy_path = graph.save_hierarchy(path)
+        hierarchy = graph.hierarchy
+        print(
+            f"{hierarchy_path}: built in {time.perf_counter() - start:.3f}s, "
+            f"{len(hierarchy)} nodes, {graph.compiled.n_edges} edges, "
+            f"{hierarchy.n_shortcuts} shortcuts"
+        )
+
+
+if __name__ == "__main__":
+    main()
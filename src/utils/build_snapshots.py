@@ -0,0 +1,61 @@
+"""
+:Date: 18/10/2026
+:Decription: Build step that compiles every plan (buildings and outside graph) into a binary
+snapshot next to its json file, see Graph/snapshot.py. The graphs are then loaded from the
+snapshots as long as the json files do not change.
+Run it from the root of the repository: ``PYTHONPATH=src python -m utils.build_snapshots``.
+"""
+
+import os
+import time
+
+from Graph import BuildingGraph, Graph, GraphRegistry, OutsideGraph
+from Graph.snapshot import get_file_hash, get_snapshot_path, read_snapshot
+from utils.constants import BUILDINGS_DATA_DIR, OUTSIDE_DATA_DIR, PLAINE_BUILDINGS_DATA_DIR
+
+OUTSIDE_PLANS = ["solbosch_map_updated.json"]
+
+
+def get_plans():
+    """Get the (graph class, path of the json file) of every plan."""
+    registry = GraphRegistry([BUILDINGS_DATA_DIR, PLAINE_BUILDINGS_DATA_DIR])
+    plans = [(BuildingGraph, registry.get_path(building)) for building in registry.list_buildings()]
+    plans += [(OutsideGraph, f"{OUTSIDE_DATA_DIR}{plan}") for plan in OUTSIDE_PLANS]
+    return plans
+
+
+def build_snapshot(graph_class: type, path: str, force: bool = False) -> bool:
+    """Build the snapshot of a plan.
+
+    :param graph_class: Class of the graph of the plan.
+    :param path: Path of the json file of the plan.
+    :param force: Build the snapshot even if it is up to date.
+    :return: True if the snapshot was built, False if it was already up to date.
+    """
+    snapshot_path = get_snapshot_path(path)
+    if not force:
+        snapshot = read_snapshot(snapshot_path, get_file_hash(path))
+        # A snapshot written before new derived arrays or attributes were added is out of date too
+        if (
+            snapshot is not None
+            and set(graph_class.SNAPSHOT_ARRAYS) <= set(snapshot.arrays)
+            and set(graph_class.SNAPSHOT_ATTRIBUTES) <= set(snapshot.meta)
+        ):
+            return False
+    if os.path.exists(snapshot_path):
+        os.remove(snapshot_path)  # The graph must be loaded from the json file
+    graph: Graph = graph_class(path)
+    graph.save_snapshot(path)
+    return True
+
+
+def main(force: bool = False):
+    for graph_class, path in get_plans():
+        start = time.perf_counter()
+        built = build_snapshot(graph_class, path, force)
+        status = f"built in {time.perf_counter() - start:.3f}s" if built else "up to date"
+        print(f"{get_snapshot_path(path)}: {status}")
+
+
+if __name__ == "__main__":
+    main()
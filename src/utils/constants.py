@@ -9,3 +9,5 @@ INSTRUCTIONS_DIR = DATA_DIR + "images/instructions/"
 SOLBOSH_DIR = DATA_DIR + "/plans/Solbosch"
 BUILDINGS_DATA_DIR = SOLBOSH_DIR + "/buildings/"
 OUTSIDE_DATA_DIR = SOLBOSH_DIR + "/general/"
+PLAINE_DIR = DATA_DIR + "/plans/Plaine"
+PLAINE_BUILDINGS_DATA_DIR = PLAINE_DIR + "/buildings/"
@@ -0,0 +1,280 @@
+"""
+:Date: 18/10/2026
+:Decription: Generator of synthetic plans to test the routing at scale. A building has n floors
+with the same layout: a straight corridor of hallways (H) with a room (E, or a toilet T) or a
+shaft on each side of each hallway. The stair (S) and lift (L) shafts are spread along the
+corridor and shared by every floor, the entrances (e) are at both ends of the corridor on the
+first floor. The directions of the edges (straight, left, right for each predecessor) are computed
+from the positions of the nodes, as in the real plans. The outside map is a jittered grid of
+roads (c) around the campus with the entrances of the buildings (e) linked to their closest road,
+its weights are the geodesic lengths of the edges (see update_weigths).
+The plans are written in the layout of data/plans: ``<output>/buildings/<B>/<B>.json`` and
+``<output>/general/<name>_map.json``. Run it from the root of the repository, e.g: ``PYTHONPATH=src
+python -m utils.generate_plans /tmp/synthetic --buildings 4 --floors 10 --rooms 200 --roads
+20000``.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+from typing import Dict, List, Optional, Tuple
+
+from utils.update_weigths import compile_weights
+
+Position = Tuple[float, float]
+
+# Position of the campus (Solbosch) and length of a degree of latitude in metres
+CENTER = (50.8125, 4.3820)
+METRES_PER_DEGREE = 111320.0
+ROOMS_PER_TOILET = 20  # A room out of ROOMS_PER_TOILET is a toilet
+
+
+def get_direction(predecessor: Position, source: Position, target: Position) -> str:
+    """Direction of the turn predecessor -> source -> target (straight, left or right)."""
+    ux, uy = source[0] - predecessor[0], source[1] - predecessor[1]
+    vx, vy = target[0] - source[0], target[1] - source[1]
+    cross = ux * vy - uy * vx
+    if abs(cross) < 1e-9:
+        return "straight"
+    return "left" if cross > 0 else "right"
+
+
+class BuildingPlan:
+    """Layout of a synthetic building, see generate_building."""
+
+    def __init__(
+        self, name: str, n_floors: int, rooms_per_floor: int, n_stairs: int, n_lifts: int
+    ) -> None:
+        self.name = name
+        self.n_floors = n_floors
+        n_shafts = n_stairs + n_lifts
+        self.n_hallways = max(2, math.ceil((rooms_per_floor + n_shafts) / 2))
+        # Slots on each side of each hallway: (hallway, side) with side 1 (left) or -1 (right)
+        slots = [(k, side) for k in range(self.n_hallways) for side in (1, -1)]
+        shaft_slots = [slots[i * len(slots) // n_shafts] for i in range(n_shafts)]  # Spread out
+        # Shaft id of the slots of the shafts, in the order stairs then lifts
+        shaft_ids = [f"S{i + 1}" for i in range(n_stairs)] + [f"L{i + 1}" for i in range(n_lifts)]
+        self.shafts: Dict[Tuple[int, int], str] = dict(zip(shaft_slots, shaft_ids))
+        self.room_slots = [slot for slot in slots if slot not in self.shafts][:rooms_per_floor]
+
+    def get_floor(self, floor: int) -> List[Dict]:
+        """Nodes of a floor in the json format of the plans (floors are numbered from 1)."""
+        positions: Dict[str, Position] = {}
+        names: Dict[str, str] = {}
+        neighbors: Dict[str, List[str]] = {}
+
+        def add(node: str, position: Position, name: str) -> None:
+            positions[node], names[node] = position, name
+            neighbors[node] = []
+
+        def link(a: str, b: str) -> None:
+            neighbors[a].append(b)
+            neighbors[b].append(a)
+
+        offset = floor * self.n_hallways  # Ids of the hallways are unique in the building
+        hallways = [f"H{offset + k + 1}" for k in range(self.n_hallways)]
+        for k, hallway in enumerate(hallways):
+            add(hallway, (float(k), 0.0), f"Couloir {offset + k + 1}")
+            if k:
+                link(hallways[k - 1], hallway)
+        for (k, side), shaft in self.shafts.items():
+            kind = "Escalier" if shaft[0] == "S" else "Ascenseur"
+            add(shaft, (float(k), float(side)), f"{kind} {shaft[1:]}")
+            link(hallways[k], shaft)
+        for i, (k, side) in enumerate(self.room_slots):
+            prefix = "T" if i % ROOMS_PER_TOILET == ROOMS_PER_TOILET - 1 else "E"
+            room = f"{prefix}{offset + i + 1}"
+            add(room, (float(k), float(side)), f"{self.name}.{floor}.{i + 1}")
+            link(hallways[k], room)
+        if floor == 1:
+            for i, (k, x) in enumerate(((0, -1.0), (self.n_hallways - 1, float(self.n_hallways)))):
+                entrance = f"e{self.name}_{i + 1}"
+                add(entrance, (x, 0.0), f"Entrée {i + 1} batiment {self.name}")
+                link(hallways[k], entrance)
+
+        nodes = []
+        for node, node_neighbors in neighbors.items():
+            data = {"id": node, "name": names[node], "neighbors": []}
+            for target in node_neighbors:
+                if len(node_neighbors) == 1:  # Leaves (rooms, shafts): nothing to turn from
+                    direction = "straight"
+                else:
+                    predecessors = [other for other in node_neighbors if other != target]
+                    direction = {
+                        predecessor: get_direction(
+                            positions[predecessor], positions[node], positions[target]
+                        )
+                        for predecessor in predecessors
+                    }
+                    # Start of a path at this node: facing the corridor, from the entrance side
+                    start = (positions[node][0] - 1, positions[node][1])
+                    direction["null"] = get_direction(start, positions[node], positions[target])
+                data["neighbors"].append({"id": target, "direction": direction, "weight": 1})
+            nodes.append(data)
+        return nodes
+
+
+def generate_building(
+    name: str, n_floors: int, rooms_per_floor: int, n_stairs: int = 2, n_lifts: int = 1
+) -> Dict[str, List[Dict]]:
+    """Generate the plan of a building in the json format of BuildingGraph.
+
+    :param name: Name of the building, e.g: X1 (rooms X1.<floor>.<number>).
+    :param n_floors: Number of floors.
+    :param rooms_per_floor: Number of rooms of each floor.
+    :param n_stairs: Number of stair shafts.
+    :param n_lifts: Number of lift shafts.
+    :return: The nodes of each floor, by floor ("01", "02", ...).
+    """
+    plan = BuildingPlan(name, n_floors, rooms_per_floor, n_stairs, n_lifts)
+    return {f"{floor:02d}": plan.get_floor(floor) for floor in range(1, n_floors + 1)}
+
+
+def generate_outside(
+    n_roads: int,
+    entrances: Dict[str, Position],
+    center: Position = CENTER,
+    spacing: float = 20.0,
+    seed: int = 0,
+) -> List[Dict]:
+    """Generate an outside map: a grid of roads with jittered coordinates where some streets are
+    missing, and the entrances linked to their closest road.
+
+    :param n_roads: Number of road nodes.
+    :param entrances: Position (latitude, longitude) of each entrance.
+    :param center: Position of the center of the grid.
+    :param spacing: Distance between two neighbouring roads (in metres).
+    :param seed: Seed of the random generator.
+    :return: The nodes in the json format of OutsideGraph, with their weights.
+    """
+    rng = random.Random(seed)
+    side = max(1, math.ceil(math.sqrt(n_roads)))
+    d_lat = spacing / METRES_PER_DEGREE
+    d_long = d_lat / math.cos(math.radians(center[0]))
+    nodes: List[Dict] = []
+    for i in range(n_roads):
+        row, column = divmod(i, side)
+        nodes.append(
+            {
+                "id": f"c{i + 1}",
+                "latitude": round(center[0] + (row - side / 2 + rng.uniform(-0.3, 0.3)) * d_lat, 6),
+                "longitude": round(
+                    center[1] + (column - side / 2 + rng.uniform(-0.3, 0.3)) * d_long, 6
+                ),
+                "neighbors": [],
+            }
+        )
+
+    def link(a: Dict, b: Dict) -> None:
+        a["neighbors"].append({"id": b["id"], "weight": 0})
+        b["neighbors"].append({"id": a["id"], "weight": 0})
+
+    for i, node in enumerate(nodes):
+        row, column = divmod(i, side)
+        # The first row and the first column are kept so the grid stays connected
+        if column + 1 < side and i + 1 < n_roads and (row == 0 or rng.random() > 0.1):
+            link(node, nodes[i + 1])
+        if i + side < n_roads and (column == 0 or rng.random() > 0.1):
+            link(node, nodes[i + side])
+    for entrance, (lat, long) in entrances.items():
+        closest = min(
+            nodes, key=lambda node: (node["latitude"] - lat) ** 2 + (node["longitude"] - long) ** 2
+        )
+        node = {"id": entrance, "latitude": lat, "longitude": long, "neighbors": []}
+        link(node, closest)
+        nodes.append(node)
+    compile_weights(nodes)
+    return nodes
+
+
+def get_entrance_positions(
+    buildings: Dict[str, Dict[str, List[Dict]]],
+    center: Position = CENTER,
+    radius: float = 300.0,
+    seed: int = 0,
+) -> Dict[str, Position]:
+    """Place the buildings at random around the center, their entrances about 30 m apart.
+
+    :param buildings: The plans of the buildings, by name.
+    :param center: Center of the campus.
+    :param radius: Maximum distance of a building to the center (in metres).
+    :param seed: Seed of the random generator.
+    :return: The position of each entrance.
+    """
+    rng = random.Random(seed)
+    d_lat = 1 / METRES_PER_DEGREE
+    d_long = d_lat / math.cos(math.radians(center[0]))
+    positions = {}
+    for floors in buildings.values():
+        lat = center[0] + rng.uniform(-radius, radius) * d_lat
+        long = center[1] + rng.uniform(-radius, radius) * d_long
+        entrances = [node["id"] for nodes in floors.values() for node in nodes]
+        entrances = [node for node in entrances if node[0] == "e"]
+        for i, entrance in enumerate(entrances):
+            positions[entrance] = (round(lat, 6), round(long + 30 * i * d_long, 6))
+    return positions
+
+
+def write_plans(
+    output: str,
+    n_buildings: int,
+    n_floors: int,
+    rooms_per_floor: int,
+    n_roads: int,
+    name: str = "synthetic",
+    seed: int = 0,
+) -> Tuple[List[str], str]:
+    """Generate and write the plans of a synthetic campus.
+
+    :param output: Directory of the plans.
+    :param n_buildings: Number of buildings (named X1, X2, ...).
+    :param n_floors: Number of floors of each building.
+    :param rooms_per_floor: Number of rooms of each floor.
+    :param n_roads: Number of road nodes of the outside map (no outside map if 0).
+    :param name: Name of the campus (key of the outside map, name of its file).
+    :param seed: Seed of the random generator.
+    :return: The paths of the plans of the buildings and of the outside map ("" if none).
+    """
+    buildings = {
+        f"X{i + 1}": generate_building(f"X{i + 1}", n_floors, rooms_per_floor)
+        for i in range(n_buildings)
+    }
+    paths = []
+    for building, floors in buildings.items():
+        directory = os.path.join(output, "buildings", building)
+        os.makedirs(directory, exist_ok=True)
+        paths.append(os.path.join(directory, f"{building}.json"))
+        with open(paths[-1], "w") as f:
+            json.dump(floors, f)
+    outside_path = ""
+    if n_roads:
+        entrances = get_entrance_positions(buildings, seed=seed)
+        nodes = generate_outside(n_roads, entrances, seed=seed)
+        os.makedirs(os.path.join(output, "general"), exist_ok=True)
+        outside_path = os.path.join(output, "general", f"{name}_map.json")
+        with open(outside_path, "w") as f:
+            json.dump({name: nodes}, f)
+    return paths, outside_path
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Generate the plans of a synthetic campus.")
+    parser.add_argument("output", help="Directory of the plans.")
+    parser.add_argument("--buildings", type=int, default=2, help="Number of buildings.")
+    parser.add_argument("--floors", type=int, default=5, help="Floors of each building.")
+    parser.add_argument("--rooms", type=int, default=50, help="Rooms of each floor.")
+    parser.add_argument("--roads", type=int, default=1000, help="Road nodes of the outside map.")
+    parser.add_argument("--name", default="synthetic", help="Name of the campus.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random generator.")
+    args = parser.parse_args(argv)
+    paths, outside_path = write_plans(
+        args.output, args.buildings, args.floors, args.rooms, args.roads, args.name, args.seed
+    )
+    for path in paths + ([outside_path] if outside_path else []):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
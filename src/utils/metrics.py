@@ -0,0 +1,253 @@
+"""
+:Date: 18/10/2026
+:Description: Lightweight instrumentation of the API: histograms of the time spent in each stage
+of the requests (snapping, search, analysis, serialisation), counters (e.g: settled nodes) and
+gauges, rendered in the Prometheus text format. The timings of the stages of the current request
+are also collected (see RequestTimings) for the Server-Timing header. When the metrics are
+disabled, stage returns a shared no-op context manager and nothing is recorded.
+"""
+
+import functools
+import inspect
+import threading
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds (in seconds) of the buckets of the histograms
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+NO_STAGE = nullcontext()  # Stage of the disabled metrics
+
+
+class RequestTimings:
+    """Time spent in each stage of a request."""
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, float] = {}
+        self.handler_end: Optional[float] = None  # When the endpoint returned (perf_counter)
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        """Get the value of the Server-Timing header (durations in ms)."""
+        return ", ".join(
+            f"{stage};dur={seconds * 1e3:.3f}" for stage, seconds in self.stages.items()
+        )
+
+
+# Timings of the request being handled, set by the middleware of the API
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("current_timings", default=None)
+
+
+class Histogram:
+    """Histogram of observed values, by labels."""
+
+    def __init__(self, name: str, description: str, buckets: Tuple[float, ...] = BUCKETS) -> None:
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        # labels -> (count of each bucket, sum, count)
+        self.values: Dict[Labels, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        counts, total, count = self.values.get(labels) or ([0] * len(self.buckets), 0.0, 0)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        self.values[labels] = (counts, total + value, count + 1)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.description}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total, count) in sorted(self.values.items()):
+            for bound, bucket in zip(self.buckets, counts):
+                yield f"{self.name}_bucket{format_labels(labels + (('le', str(bound)),))} {bucket}"
+            yield f"{self.name}_bucket{format_labels(labels + (('le', '+Inf'),))} {count}"
+            yield f"{self.name}_sum{format_labels(labels)} {total}"
+            yield f"{self.name}_count{format_labels(labels)} {count}"
+
+
+class Counter:
+    """Monotonic counter, by labels."""
+
+    def __init__(self, name: str, description: str) -> None:
+        self.name = name
+        self.description = description
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, value: float = 1, labels: Labels = ()) -> None:
+        self.values[labels] = self.values.get(labels, 0) + value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.description}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in sorted(self.values.items()):
+            yield f"{self.name}{format_labels(labels)} {value}"
+
+
+def format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    values = ",".join(f'{key}="{value}"' for key, value in labels)
+    return "{" + values + "}"
+
+
+class Metrics:
+    """Metrics of the API."""
+
+    def __init__(self, prefix: str, enabled: bool = True) -> None:
+        """Constructor of the class.
+
+        :param prefix: Prefix of the names of the metrics.
+        :param enabled: If False, nothing is recorded.
+        """
+        self.prefix = prefix
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.stages = Histogram(f"{prefix}_stage_seconds", "Time spent in each stage of requests.")
+        self.requests = Histogram(f"{prefix}_request_seconds", "Time to handle the requests.")
+        self.counters: Dict[str, Counter] = {}
+        # name -> (description, type, function returning the value of each labels)
+        self.collected: Dict[str, Tuple[str, str, Callable[[], Dict[Labels, float]]]] = {}
+
+    def stage(self, name: str):
+        """Time a stage of the current request: ``with metrics.stage("search"): ...``"""
+        if not self.enabled:
+            return NO_STAGE
+        return StageTimer(self, name)
+
+    def endpoint(self, function: Callable) -> Callable:
+        """Decorator of an endpoint, the time from its return to the response being ready is
+        recorded as the stage serialise by the middleware of the API.
+        """
+
+        if inspect.iscoroutinefunction(function):
+
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    mark_handler_end()
+
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            try:
+                return function(*args, **kwargs)
+            finally:
+                mark_handler_end()
+
+        return wrapper
+
+    def observe_stage(self, name: str, seconds: float) -> None:
+        with self.lock:
+            self.stages.observe(seconds, (("stage", name),))
+        timings = current_timings.get()
+        if timings is not None:
+            timings.add(name, seconds)
+
+    def observe_request(self, path: str, seconds: float) -> None:
+        with self.lock:
+            self.requests.observe(seconds, (("path", path),))
+
+    def inc(self, name: str, value: float = 1, description: str = "", **labels: str) -> None:
+        """Increment a counter, it is created on first use.
+
+        :param name: Name of the counter (without the prefix and the _total suffix).
+        :param value: Increment.
+        :param description: Description of the counter, used when it is created.
+        :param labels: Labels of the value.
+        """
+        if not self.enabled:
+            return
+        with self.lock:
+            if name not in self.counters:
+                self.counters[name] = Counter(f"{self.prefix}_{name}_total", description)
+            self.counters[name].inc(value, tuple(sorted(labels.items())))
+
+    def pop_counters(self) -> List[Tuple[str, str, Labels, float]]:
+        """Get the values of the counters and reset them, e.g: to send the counts of a worker
+        process to the API (see add_counters).
+
+        :return: The (name, description, labels, value) of each value of the counters.
+        """
+        with self.lock:
+            values = [
+                (name, counter.description, labels, value)
+                for name, counter in self.counters.items()
+                for labels, value in counter.values.items()
+            ]
+            self.counters.clear()
+        return values
+
+    def add_counters(self, values: List[Tuple[str, str, Labels, float]]) -> None:
+        """Add values to the counters (see pop_counters)."""
+        if not self.enabled:
+            return
+        with self.lock:
+            for name, description, labels, value in values:
+                if name not in self.counters:
+                    self.counters[name] = Counter(f"{self.prefix}_{name}_total", description)
+                self.counters[name].inc(value, labels)
+
+    def collect(
+        self,
+        name: str,
+        description: str,
+        function: Callable[[], Dict[Labels, float]],
+        kind: str = "gauge",
+    ) -> None:
+        """Add a metric whose values are read when the metrics are rendered (e.g: the counters
+        of the route cache).
+
+        :param name: Name of the metric (without the prefix, nor the _total suffix of counters).
+        :param description: Description of the metric.
+        :param function: Function returning the value of the metric for each labels.
+        :param kind: Prometheus type of the metric, gauge or counter.
+        """
+        name = f"{self.prefix}_{name}_total" if kind == "counter" else f"{self.prefix}_{name}"
+        self.collected[name] = (description, kind, function)
+
+    def render(self) -> str:
+        """Get the metrics in the Prometheus text format."""
+        with self.lock:
+            lines = [*self.stages.render(), *self.requests.render()]
+            for counter in self.counters.values():
+                lines.extend(counter.render())
+        for name, (description, kind, function) in self.collected.items():
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(function().items()):
+                lines.append(f"{name}{format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def mark_handler_end() -> None:
+    """Record the end of the endpoint handling the current request (see Metrics.endpoint)."""
+    timings = current_timings.get()
+    if timings is not None:
+        timings.handler_end = time.perf_counter()
+
+
+class StageTimer:
+    """Context manager recording the duration of a stage (see Metrics.stage)."""
+
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics: Metrics, name: str) -> None:
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self) -> "StageTimer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.metrics.observe_stage(self.name, time.perf_counter() - self.start)
@@ -0,0 +1,139 @@
+"""
+:Date: 18/10/2026
+:Description: In-process cache of the computed routes with a bounded size, LRU eviction and an
+optional time to live. Each entry is stored with the versions of the graphs it was computed on,
+an entry whose graphs have been reloaded or edited since is dropped instead of being returned.
+An entry can also have tags (e.g: the edges its route goes through), invalidate drops the entries
+with some tags and keeps the other ones.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+
+class RouteCache:
+    """LRU cache of routes."""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None) -> None:
+        """Constructor of the class.
+
+        :param maxsize: Maximum number of routes kept in the cache.
+        :param ttl: Time to live of a route in seconds (None to keep it until it is evicted).
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (versions of the graphs, time of insertion, value)
+        self.entries: "OrderedDict[Hashable, Tuple[Hashable, float, Any]]" = OrderedDict()
+        self.tags: Dict[Hashable, Set[Hashable]] = {}  # key -> tags of the entry
+        self.tagged: Dict[Hashable, Set[Hashable]] = {}  # tag -> keys of the entries
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: Hashable, versions: Hashable = None) -> Optional[Any]:
+        """Get a route from the cache.
+
+        :param key: Key of the route.
+        :param versions: Current versions of the graphs the route depends on.
+        :return: The route, or None if it is not in the cache (or outdated, or expired).
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry_versions, inserted, value = entry
+                expired = self.ttl is not None and time.monotonic() - inserted > self.ttl
+                if entry_versions == versions and not expired:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self.remove(key)
+                self.invalidations += 1
+            self.misses += 1
+            return None
+
+    def put(
+        self,
+        key: Hashable,
+        value: Any,
+        versions: Hashable = None,
+        tags: Iterable[Hashable] = (),
+        is_valid: Optional[Callable[[], bool]] = None,
+    ) -> bool:
+        """Add a route in the cache, the least recently used route is evicted if it is full.
+
+        :param key: Key of the route.
+        :param value: The route.
+        :param versions: Versions of the graphs the route was computed on.
+        :param tags: Tags of the route, see invalidate.
+        :param is_valid: Called under the lock of the cache, the route is not added if it returns
+            False (e.g: a graph of the route was updated while it was computed). A change made
+            before the invalidation of its tags is then either seen by is_valid or followed by the
+            invalidation of the route.
+        :return: True if the route was added.
+        """
+        if self.maxsize <= 0:
+            return False
+        with self.lock:
+            if is_valid is not None and not is_valid():
+                return False
+            self.remove(key)
+            self.entries[key] = (versions, time.monotonic(), value)
+            tags = set(tags)
+            if tags:
+                self.tags[key] = tags
+                for tag in tags:
+                    self.tagged.setdefault(tag, set()).add(key)
+            while len(self.entries) > self.maxsize:
+                self.remove(next(iter(self.entries)))
+                self.evictions += 1
+            return True
+
+    def remove(self, key: Hashable) -> None:
+        """Remove an entry and its tags (the lock must be held)."""
+        self.entries.pop(key, None)
+        for tag in self.tags.pop(key, ()):
+            keys = self.tagged[tag]
+            keys.discard(key)
+            if not keys:
+                del self.tagged[tag]
+
+    def invalidate(self, tags: Iterable[Hashable]) -> int:
+        """Remove the routes that have at least one of some tags.
+
+        :param tags: The tags.
+        :return: The number of routes removed.
+        """
+        with self.lock:
+            keys = set()
+            for tag in tags:
+                keys.update(self.tagged.get(tag, ()))
+            for key in keys:
+                self.remove(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        """Remove every route from the cache."""
+        with self.lock:
+            self.invalidations += len(self.entries)
+            self.entries.clear()
+            self.tags.clear()
+            self.tagged.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Get the counters of the cache."""
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -1,35 +1,238 @@
 """
-:Author: Manu Mathey-Prévot 
+:Author: Manu Mathey-Prévot
 :Date: 13/02/2024
 :Decription: Simple script to compile the distance between each node as the crow flies
 by using the gps coordinates.
+The lengths of all the edges are computed at once with NumPy (Vincenty's inverse formula on the
+WGS-84 ellipsoid, the distance of geopy to a fraction of a millimetre, or the haversine formula).
+In incremental mode, the previous output is read back and only the edges touching a node that
+was added or moved since are computed again, the file is rewritten only if something changed.
+Run it from the root of the repository:
+``PYTHONPATH=src python -m utils.update_weigths [--incremental] [--haversine]``.
 """
 
-
 import json
+import sys
+from typing import Dict, List, Optional, Tuple
 
 import geopy.distance
+import numpy as np
 
+from utils.constants import OUTSIDE_DATA_DIR
+
+MAP = "Solbosch"
+INPUT_PATH = OUTSIDE_DATA_DIR + "solbosch_map.json"
+OUTPUT_PATH = OUTSIDE_DATA_DIR + "solbosch_map_updated.json"
+
+# WGS-84 ellipsoid
+A = 6378137.0
+F = 1 / 298.257223563
+B = (1 - F) * A
+EARTH_RADIUS = 6371008.8  # Mean radius, used by the haversine formula
+
+VINCENTY = "vincenty"
+HAVERSINE = "haversine"
+
+Edge = Tuple[str, str]
+
+
+def haversine(lat1: np.ndarray, lon1: np.ndarray, lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    """Great circle distances (in m) between arrays of points given in degrees."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    h = np.sin((lat2 - lat1) / 2) ** 2
+    h += np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(h))
+
+
+def vincenty(
+    lat1: np.ndarray,
+    lon1: np.ndarray,
+    lat2: np.ndarray,
+    lon2: np.ndarray,
+    tolerance: float = 1e-12,
+    max_iterations: int = 200,
+) -> np.ndarray:
+    """Geodesic distances (in m) on the WGS-84 ellipsoid between arrays of points given in
+    degrees, with Vincenty's inverse formula. The formula does not converge for nearly antipodal
+    points, their distance is computed by geopy instead.
+
+    :param tolerance: Convergence threshold of the longitude on the auxiliary sphere (radians).
+    :param max_iterations: Maximum number of iterations.
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    u1, u2 = np.arctan((1 - F) * np.tan(lat1)), np.arctan((1 - F) * np.tan(lat2))
+    sin_u1, cos_u1, sin_u2, cos_u2 = np.sin(u1), np.cos(u1), np.sin(u2), np.cos(u2)
+    lon = lon2 - lon1
+    lam = lon.copy()
+    converged = np.zeros(len(lam), dtype=bool)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for _ in range(max_iterations):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+            sin_sigma = np.hypot(cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam)
+            cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            sin_alpha = np.where(sin_sigma == 0, 0.0, cos_u1 * cos_u2 * sin_lam / sin_sigma)
+            cos2_alpha = 1 - sin_alpha**2
+            # cos2_alpha is 0 on the equator
+            cos_2sigma_m = np.where(
+                cos2_alpha == 0, 0.0, cos_sigma - 2 * sin_u1 * sin_u2 / cos2_alpha
+            )
+            c = F / 16 * cos2_alpha * (4 + F * (4 - 3 * cos2_alpha))
+            previous = lam
+            lam = lon + (1 - c) * F * sin_alpha * (
+                sigma + c * sin_sigma * (cos_2sigma_m + c * cos_sigma * (-1 + 2 * cos_2sigma_m**2))
+            )
+            converged = np.abs(lam - previous) <= tolerance
+            if converged.all():
+                break
+        u_2 = cos2_alpha * (A**2 - B**2) / B**2
+        k_a = 1 + u_2 / 16384 * (4096 + u_2 * (-768 + u_2 * (320 - 175 * u_2)))
+        k_b = u_2 / 1024 * (256 + u_2 * (-128 + u_2 * (74 - 47 * u_2)))
+        delta_sigma = (
+            k_b
+            * sin_sigma
+            * (
+                cos_2sigma_m
+                + k_b
+                / 4
+                * (
+                    cos_sigma * (-1 + 2 * cos_2sigma_m**2)
+                    - k_b / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma**2) * (-3 + 4 * cos_2sigma_m**2)
+                )
+            )
+        )
+        distances = B * k_a * (sigma - delta_sigma)
+    for i in np.flatnonzero(~converged):
+        points = np.degrees([lat1[i], lon1[i]]), np.degrees([lat2[i], lon2[i]])
+        distances[i] = geopy.distance.geodesic(*points).m
+    return distances
 
-def main():
-    with open("data/plans/Solbosch/general/solbosch_map.json", 'r') as f:
-        data = json.load(f)
 
-    latitudes = {}
-    longitudes = {}
-    for node in data['Solbosch']:
-        latitudes[node['id']] = node['latitude']
-        longitudes[node['id']] = node['longitude']
+DISTANCES = {VINCENTY: vincenty, HAVERSINE: haversine}
+
+
+class WeightChanges:
+    """What changed between two runs of the compiler."""
+
+    def __init__(self) -> None:
+        self.added_nodes: List[str] = []
+        self.removed_nodes: List[str] = []
+        self.moved_nodes: List[str] = []
+        self.added_edges: List[Edge] = []
+        self.removed_edges: List[Edge] = []
+        self.weights: Dict[Edge, Tuple[Optional[int], int]] = {}  # edge -> (old, new) weight
+        self.n_computed = 0  # Number of edges whose length was computed
+
+    def __bool__(self) -> bool:
+        nodes = self.added_nodes or self.removed_nodes or self.moved_nodes
+        return bool(nodes or self.removed_edges or self.weights)
+
+    def summary(self) -> str:
+        """Get a readable report of the changes."""
+        lines = [f"{self.n_computed} edge lengths computed"]
+        for label, values in (
+            ("added nodes", self.added_nodes),
+            ("removed nodes", self.removed_nodes),
+            ("moved nodes", self.moved_nodes),
+            ("added edges", [f"{s} -> {t}" for s, t in self.added_edges]),
+            ("removed edges", [f"{s} -> {t}" for s, t in self.removed_edges]),
+        ):
+            if values:
+                lines.append(f"{len(values)} {label}: {', '.join(values)}")
+        changed = [
+            f"{s} -> {t}: {old} -> {new}"
+            for (s, t), (old, new) in self.weights.items()
+            if old is not None
+        ]
+        if changed:
+            lines.append(f"{len(changed)} weights changed:")
+            lines.extend(f"  {line}" for line in changed)
+        return "\n".join(lines)
+
+
+def compile_weights(
+    nodes: List[Dict], previous: Optional[List[Dict]] = None, method: str = VINCENTY
+) -> WeightChanges:
+    """Set the weight of every edge of the map to its length rounded to the metre.
+
+    :param nodes: The nodes of the map (id, latitude, longitude, neighbors), the weights of their
+        neighbors are set in place.
+    :param previous: The nodes of the previous output. The weights of the edges whose nodes have
+        the same coordinates in both are kept instead of being computed again.
+    :param method: VINCENTY or HAVERSINE.
+    :return: The changes from the previous output (every edge is added without it).
+    """
+    changes = WeightChanges()
+    index = {node["id"]: i for i, node in enumerate(nodes)}
+    coordinates = np.array([(node["latitude"], node["longitude"]) for node in nodes], dtype=float)
+    old_weights: Dict[Edge, int] = {}
+    moved = set()
+    if previous is not None:
+        old_coordinates = {node["id"]: (node["latitude"], node["longitude"]) for node in previous}
+        old_weights = {
+            (node["id"], neighbor["id"]): neighbor["weight"]
+            for node in previous
+            for neighbor in node["neighbors"]
+        }
+        for node in nodes:
+            if node["id"] not in old_coordinates:
+                changes.added_nodes.append(node["id"])
+            elif old_coordinates[node["id"]] != (node["latitude"], node["longitude"]):
+                changes.moved_nodes.append(node["id"])
+        changes.removed_nodes = [node for node in old_coordinates if node not in index]
+        moved = set(changes.moved_nodes)
+    edges = [(node, neighbor) for node in nodes for neighbor in node["neighbors"]]
+    todo = [
+        i
+        for i, (node, neighbor) in enumerate(edges)
+        if (node["id"], neighbor["id"]) not in old_weights
+        or node["id"] in moved
+        or neighbor["id"] in moved
+    ]
+    sources = np.array([index[edges[i][0]["id"]] for i in todo], dtype=np.intp)
+    targets = np.array([index[edges[i][1]["id"]] for i in todo], dtype=np.intp)
+    sources, targets = coordinates[sources], coordinates[targets]
+    lengths = DISTANCES[method](sources[:, 0], sources[:, 1], targets[:, 0], targets[:, 1])
+    changes.n_computed = len(todo)
+    for i, length in zip(todo, lengths.round()):
+        node, neighbor = edges[i]
+        edge = (node["id"], neighbor["id"])
+        old = old_weights.get(edge)
+        if old is None and edge not in changes.weights:
+            changes.added_edges.append(edge)
+        neighbor["weight"] = int(length)
+        if old != neighbor["weight"]:
+            changes.weights[edge] = (old, neighbor["weight"])
+    computed = set(todo)
+    for i, (node, neighbor) in enumerate(edges):
+        if i not in computed:
+            neighbor["weight"] = old_weights[(node["id"], neighbor["id"])]
+    new_edges = {(node["id"], neighbor["id"]) for node, neighbor in edges}
+    changes.removed_edges = [edge for edge in old_weights if edge not in new_edges]
+    return changes
+
+
+def main(incremental: bool = False, method: str = VINCENTY):
+    with open(INPUT_PATH, "r") as f:
+        data = json.load(f)
 
-    for node in data['Solbosch']:
-        for neighbor in node['neighbors']:
-            neighbor['weight'] = round(geopy.distance.geodesic((latitudes[node['id']], longitudes[node['id']]),
-                                                         (latitudes[neighbor['id']], longitudes[neighbor['id']])).m)
+    previous = None
+    if incremental:
+        try:
+            with open(OUTPUT_PATH, "r") as f:
+                previous = json.load(f)[MAP]
+        except FileNotFoundError:
+            pass
+    changes = compile_weights(data[MAP], previous, method)
+    print(changes.summary())
+    if previous is not None and not changes:
+        print(f"{OUTPUT_PATH} is up to date.")
+        return
 
     # New json file with updated weights
-    with open("data/exits_positions/solbosch_map_updated.json", 'w') as f:
+    with open(OUTPUT_PATH, "w") as f:
         json.dump(data, f, indent=2)
 
 
-if __name__ == '__main__':
-    main()
+if __name__ == "__main__":
+    main("--incremental" in sys.argv, HAVERSINE if "--haversine" in sys.argv else VINCENTY)
@@ -0,0 +1,125 @@
+"""
+:Date: 18/10/2026
+:Description: Execution layer of the route computations. The searches and the analyses are CPU
+bound: run on the threads of the API they share one core (GIL). A RoutePool sends them to an
+executor, a pool of worker processes that hold their own graphs (see main.get_route_pool) or a
+thread pool, and awaits them so the event loop stays free. The number of computations waiting or
+running is bounded: when the pool is saturated a computation is refused at once (PoolSaturated,
+the API answers 503 with a Retry-After header) instead of queueing requests that would time out.
+A computation that takes longer than the timeout is abandoned (asyncio.TimeoutError), it still
+holds its place in the pool until its worker has finished it.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, Optional
+
+SMOOTHING = 0.1  # Weight of the last computation in the mean duration (see retry_after)
+
+
+class PoolSaturated(Exception):
+    """The pool has too many computations waiting or running."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(f"Too many route computations, retry in {retry_after}s")
+        self.retry_after = retry_after  # Estimated time (in seconds) to drain the pool
+
+
+class RoutePool:
+    """Bounded pool of route computations."""
+
+    def __init__(
+        self, executor: Executor, n_workers: int, max_pending: int, timeout: Optional[float]
+    ) -> None:
+        """Constructor of the class.
+
+        :param executor: Executor running the computations (process or thread pool).
+        :param n_workers: Number of workers of the executor.
+        :param max_pending: Maximum number of computations waiting or running.
+        :param timeout: Time (in seconds) a request waits for its computation (None: no limit).
+        """
+        self.executor = executor
+        self.n_workers = n_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.mean_duration = 0.0  # Smoothed duration of the computations, queueing included
+        self.completed = 0  # Computations that returned a result
+        self.failed = 0  # Computations that raised an exception
+        self.rejected = 0
+        self.timeouts = 0
+
+    def retry_after(self) -> int:
+        """Estimate the time (in whole seconds, at least 1) the workers need to drain the pool."""
+        return max(1, math.ceil(self.pending * self.mean_duration / self.n_workers))
+
+    async def run(self, function: Callable, *args) -> Any:
+        """Run a computation in the pool and wait for its result.
+
+        :param function: The computation, it must be picklable for a process pool.
+        :param args: Its arguments.
+        :raises PoolSaturated: If max_pending computations are waiting or running.
+        :raises asyncio.TimeoutError: If the computation took longer than the timeout.
+        :return: The result of the computation.
+        """
+        with self.lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PoolSaturated(self.retry_after())
+            self.pending += 1
+        start = time.perf_counter()
+        try:
+            future = self.executor.submit(function, *args)
+        except BaseException:
+            self.release(start)
+            raise
+        future.add_done_callback(lambda done: self.release(start, done))
+        try:
+            # A computation still waiting for a worker is cancelled on timeout
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            with self.lock:
+                self.timeouts += 1
+            raise
+
+    def release(self, start: float, future: Optional[Future] = None) -> None:
+        """Free the place of a finished (or cancelled) computation. Only the computations that
+        returned a result count in the mean duration: a failure or a cancellation says nothing
+        about the time the workers need.
+
+        :param start: Time the computation was submitted (time.perf_counter).
+        :param future: The future of the computation (None if it could not be submitted).
+        """
+        with self.lock:
+            self.pending -= 1
+            if future is None or future.cancelled():
+                return
+            if future.exception() is not None:
+                self.failed += 1
+                return
+            duration = time.perf_counter() - start
+            if self.completed:
+                self.mean_duration += SMOOTHING * (duration - self.mean_duration)
+            else:
+                self.mean_duration = duration
+            self.completed += 1
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "workers": self.n_workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "mean_duration": self.mean_duration,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the workers once the computations that are running are finished."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
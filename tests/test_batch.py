@@ -0,0 +1,91 @@
+"""Tests of the batch endpoints of the API (/api/ask_batch, /api/matrix).
+
+:Date: 18/10/2026
+:Description: The response of each pair of a batch must be the response of /api/ask_from_inside,
+with its geometry options, and the distances of the matrix the distances of single searches. An
+unknown room or building must be answered 404.
+"""
+
+import math
+
+import pytest
+from fastapi.testclient import TestClient
+
+from dijkstra import INF, Dijkstra
+
+
+@pytest.fixture(scope="module")
+def api():
+    import main
+
+    yield main, TestClient(main.app)
+    main.route_cache.clear()
+
+
+def test_batch(api):
+    main, client = api
+    main.route_cache.clear()
+    requests = [
+        {"start": "P1.2.301", "arrival": "S.4.133"},
+        {"start": "P1.2.301", "arrival": "S.4.133", "geometry": "polyline", "nodes": True},
+        {"start": "P1.2.301", "arrival": "S.9.216", "tolerance": 5.0},
+        {"start": "S.5.227", "arrival": "S.9.216"},
+        {"start": "S.5.227", "arrival": "S.9.216"},
+    ]
+    results = client.post("/api/ask_batch", json={"requests": requests}).json()["results"]
+    assert "outside_path_nodes" in results[1] and isinstance(results[1]["outside_path"], str)
+    main.route_cache.clear()
+    for request, result in zip(requests, results):
+        assert client.post("/api/ask_from_inside", json=request).json() == result
+    assert len(main.route_cache) == 4
+
+
+@pytest.mark.parametrize(
+    "request_, status",
+    [
+        ({"start": "P1.2.301", "arrival": "S.99.999"}, 404),  # Unknown room
+        ({"start": "XYZ.1.101", "arrival": "S.4.133"}, 404),  # Unknown building
+        ({"start": "P1.2.301", "arrival": "S.4.133", "geometry": "svg"}, 422),
+        ({"start": "P1.2.301", "arrival": "S.4.133", "tolerance": -1.0}, 422),
+    ],
+)
+def test_batch_invalid(api, request_: dict, status: int):
+    main, client = api
+    valid = {"start": "S.5.227", "arrival": "S.9.216"}
+    response = client.post("/api/ask_batch", json={"requests": [valid, request_]})
+    assert response.status_code == status
+
+
+def test_matrix(api):
+    main, client = api
+    sources, targets = ["P1.2.301", "S.5.227"], ["S.4.133", "P1.2.301", "S.9.216"]
+    response = client.post("/api/matrix", json={"sources": sources, "targets": targets}).json()
+    for source, row in zip(sources, response["distances"]):
+        for target, distance in zip(targets, row):
+            start, arrival = main.get_building_name(source), main.get_building_name(target)
+            if start == arrival:
+                expected = Dijkstra(main.graphs[start]).dijkstra(source, target)[0]
+            else:
+                campus = main.get_campus_graph(start, arrival)
+                d = Dijkstra(campus, blocked=campus.get_blocked([start], [arrival]))
+                expected = d.dijkstra(main.get_room_node(source), main.get_room_node(target))[0]
+            assert expected < INF and math.isclose(distance, expected)
+    for sources, targets in [(["P1.2.301"], ["S.99.999"]), (["XYZ.1.101"], ["S.4.133"])]:
+        response = client.post("/api/matrix", json={"sources": sources, "targets": targets})
+        assert response.status_code == 404
+
+
+def test_saturated(api, monkeypatch):
+    main, client = api
+    main.route_cache.clear()
+    monkeypatch.setattr(main, "route_pool", None)
+    monkeypatch.setattr(main, "MAX_PENDING", 0)
+    try:
+        batch = {"requests": [{"start": "P1.2.301", "arrival": "S.4.133"}]}
+        response = client.post("/api/ask_batch", json=batch)
+        assert response.status_code == 503 and "Retry-After" in response.headers
+        matrix = {"sources": ["P1.2.301"], "targets": ["S.4.133"]}
+        assert client.post("/api/matrix", json=matrix).status_code == 503
+        assert main.route_pool.rejected == 2
+    finally:
+        main.stop_route_pool()
@@ -0,0 +1,110 @@
+"""Tests of the campus graph (Graph/campus.py) and of its use by the API.
+
+:Date: 18/10/2026
+:Description: A route of the campus graph must only go through its buildings (the portals of the
+other ones are blocked), with the length of the route on a campus graph made of these buildings
+only. The API must build a single campus graph for every pair of buildings and count its memory
+in the budget of the building graphs.
+"""
+
+import math
+import random
+
+import pytest
+
+from dijkstra import INF, Dijkstra
+from Graph import OUTSIDE, BuildingGraph, CampusGraph, OutsideGraph
+from utils.constants import BUILDINGS_DATA_DIR, OUTSIDE_DATA_DIR
+
+
+@pytest.fixture(scope="module")
+def outside() -> OutsideGraph:
+    return OutsideGraph(f"{OUTSIDE_DATA_DIR}solbosch_map_updated.json")
+
+
+@pytest.fixture(scope="module")
+def buildings() -> dict:
+    return {name: BuildingGraph(f"{BUILDINGS_DATA_DIR}{name}/{name}.json") for name in ("P1", "S")}
+
+
+def search(campus: CampusGraph, source, target, departures, arrivals) -> tuple:
+    d = Dijkstra(campus, blocked=campus.get_blocked(departures, arrivals))
+    distance, path = d.dijkstra(source, target)
+    return distance, [layer for layer, _ in campus.split_path(path)]
+
+
+def test_blocked_portals(outside: OutsideGraph, buildings: dict):
+    campus = CampusGraph(outside, buildings)
+    only_s = CampusGraph(outside, {"S": buildings["S"]})
+    rng = random.Random(0)
+    rooms_p1, rooms_s = buildings["P1"].get_rooms(), buildings["S"].get_rooms()
+    for node in rng.sample(list(outside.nodes), 30):
+        room = ("S", rng.choice(rooms_s))
+        distance, layers = search(campus, (OUTSIDE, node), room, (), ["S"])
+        assert layers in ([OUTSIDE, "S"], ["S"])  # Never through P1
+        expected, _ = search(only_s, (OUTSIDE, node), room, (), ["S"])
+        assert math.isclose(distance, expected)
+    for _ in range(30):
+        source, target = ("P1", rng.choice(rooms_p1)), ("S", rng.choice(rooms_s))
+        distance, layers = search(campus, source, target, ["P1"], ["S"])
+        assert distance < INF and layers == ["P1", OUTSIDE, "S"]
+        # The exits of S and the entrances of P1 are closed: no way back
+        assert search(campus, target, source, ["P1"], ["S"])[0] == INF
+
+
+@pytest.fixture()
+def main():
+    import main
+
+    yield main
+    main.route_cache.clear()
+
+
+def test_single_campus_graph(main):
+    campus = main.get_campus_graph("P1", "S")
+    assert main.get_campus_graph("S") is campus and main.get_campus_graph("P1") is campus
+    assert set(campus.layers) == {"P1", "S"}
+    assert main.graphs.reserved[main.CAMPUS] == campus.nbytes()
+    sizes = main.graphs.sizes
+    assert main.graphs.get_nbytes() == sum(sizes.values()) + campus.nbytes()
+
+    # Evicting one of its buildings drops it and releases its memory
+    main.graphs.evict("P1")
+    assert main.campus_graph is None and main.CAMPUS not in main.graphs.reserved
+    rebuilt = main.get_campus_graph("S")
+    assert set(rebuilt.layers) == {"S"} and rebuilt.nbytes() < campus.nbytes()
+    assert set(main.get_campus_graph("P1", "S").layers) == {"P1", "S"}
+
+
+def test_campus_over_budget(main, monkeypatch):
+    main.get_campus_graph("P1", "S")
+    # Room for S and a campus graph of S only: the campus graph with both buildings does not fit
+    only_s = main.CampusGraph(main.outside_graph, {"S": main.graphs["S"]})
+    budget = main.graphs.sizes["S"] + only_s.nbytes()
+    monkeypatch.setattr(main.graphs, "max_bytes", budget)
+    main.graphs.evict("S")
+    main.get_campus_graph("S")  # Loads S, P1 is now the least recently used building
+    assert main.graphs.loaded() == ["S"] and main.campus_graph is None
+    campus = main.get_campus_graph("S")
+    assert set(campus.layers) == {"S"} and main.graphs.get_nbytes() <= budget
+    assert main.get_campus_graph("S") is campus
+
+
+def test_astar(outside: OutsideGraph, buildings: dict):
+    campus = CampusGraph(outside, buildings)
+    rng = random.Random(1)
+    rooms_p1, rooms_s = buildings["P1"].get_rooms(), buildings["S"].get_rooms()
+    queries = [
+        ((OUTSIDE, node), ("S", rng.choice(rooms_s))) for node in rng.sample(list(outside.nodes), 20)
+    ]
+    queries += [(("P1", rng.choice(rooms_p1)), ("S", rng.choice(rooms_s))) for _ in range(20)]
+    settled = {False: 0, True: 0}
+    for source, target in queries:
+        blocked = campus.get_blocked([source[0]] if source[0] != OUTSIDE else [], ["S"])
+        distances = []
+        for astar in (False, True):
+            d = Dijkstra(campus, astar=astar, blocked=blocked)
+            distances.append(d.dijkstra(source, target)[0])
+            settled[astar] += d.settled
+        assert math.isclose(*distances)
+    assert settled[True] < settled[False]
@@ -0,0 +1,164 @@
+"""Differential tests of the searches of Dijkstra against networkx (Graph.default_dijkstra).
+
+:Date: 18/10/2026
+:Description: Every pair of nodes of the building graphs is searched with the unidirectional and
+the bidirectional searches, the distances must be the ones of networkx and the paths must be
+paths of the graph with this length. The one-to-many and many-to-one searches must give the
+results of the searches of each pair. The compiled graph must have the edges of the networkx
+graph. The searches of concurrent threads must each use the search workspace of their thread.
+"""
+
+import math
+import random
+import sys
+import threading
+
+import networkx as nx
+import pytest
+
+from dijkstra import INF, Dijkstra
+from Graph import BEdgeAttributes, BNodeAttributes, BuildingGraph, OutsideGraph
+from utils.constants import BUILDINGS_DATA_DIR, OUTSIDE_DATA_DIR
+
+
+@pytest.fixture(scope="module", params=["P1", "S"])
+def graph(request) -> BuildingGraph:
+    return BuildingGraph(f"{BUILDINGS_DATA_DIR}{request.param}/{request.param}.json")
+
+
+def get_length(graph: BuildingGraph, path: list) -> float:
+    return nx.path_weight(graph, path, BEdgeAttributes.WEIGHT)
+
+
+@pytest.mark.parametrize("bidirectional", [False, True])
+def test_every_pair(graph: BuildingGraph, bidirectional: bool):
+    d = Dijkstra(graph, bidirectional=bidirectional)
+    for source in graph.nodes:
+        for target in graph.nodes:
+            distance, path = d.dijkstra(source, target)
+            try:
+                expected = get_length(graph, graph.default_dijkstra(source, target))
+            except nx.NetworkXNoPath:
+                assert (distance, path) == (INF, [])
+                continue
+            assert math.isclose(distance, expected, abs_tol=1e-9), (source, target)
+            assert path[0] == source and path[-1] == target
+            assert math.isclose(get_length(graph, path), distance, abs_tol=1e-9), (source, target)
+
+
+def test_bidirectional_same_node(graph: BuildingGraph):
+    node = next(iter(graph.nodes))
+    assert Dijkstra(graph, bidirectional=True).dijkstra(node, node) == (0.0, [node])
+
+
+def test_bidirectional_asymmetric_edges():
+    graph = BuildingGraph()
+    graph.add_nodes_from(["H1_1", "H2_1", "H3_1"], **{BNodeAttributes.FLOOR: 1})
+    graph.add_edge("H1_1", "H2_1", weight=1.0)
+    graph.add_edge("H2_1", "H3_1", weight=1.0)
+    graph.add_edge("H3_1", "H1_1", weight=1.0)  # The way back is around the loop
+    d = Dijkstra(graph, bidirectional=True)
+    assert d.dijkstra("H1_1", "H3_1") == (2.0, ["H1_1", "H2_1", "H3_1"])
+    assert d.dijkstra("H3_1", "H2_1") == (2.0, ["H3_1", "H1_1", "H2_1"])
+
+
+def test_to_many_from_many(graph: BuildingGraph):
+    d = Dijkstra(graph)
+    nodes = list(graph.nodes)
+    rooms = graph.get_rooms()
+    for source in nodes[:: max(1, len(nodes) // 20)]:
+        expected = nx.single_source_dijkstra_path_length(graph, source)
+        to_many = d.dijkstra_to_many(source, rooms)
+        assert d.distances_to_many(source, rooms) == {
+            room: distance for room, (distance, _) in to_many.items()
+        }
+        for room, (distance, path) in to_many.items():
+            assert math.isclose(distance, expected.get(room, INF), abs_tol=1e-9)
+            if distance < INF:
+                assert path[0] == source and path[-1] == room
+                assert math.isclose(get_length(graph, path), distance, abs_tol=1e-9)
+        # The reverse search from the source gives the paths to it
+        for room, (distance, path) in d.dijkstra_from_many(rooms, source).items():
+            assert math.isclose(distance, d.dijkstra(room, source)[0], abs_tol=1e-9)
+            if distance < INF:
+                assert path[0] == room and path[-1] == source
+                assert math.isclose(get_length(graph, path), distance, abs_tol=1e-9)
+
+
+def test_to_many_stops(graph: BuildingGraph):
+    d = Dijkstra(graph)
+    source = graph.get_rooms()[0]
+    distances = nx.single_source_dijkstra_path_length(graph, source)
+    closest = sorted(distances, key=distances.get)[1:4]
+    d.dijkstra_to_many(source, closest)
+    # The search stops once the three closest nodes are settled
+    assert d.settled < len(distances) / 2
+    d.dijkstra_to_many(source, graph.nodes)
+    assert d.settled == len(distances)
+
+
+@pytest.mark.parametrize(
+    "graph_class, path",
+    [
+        (BuildingGraph, f"{BUILDINGS_DATA_DIR}P1/P1.json"),
+        (BuildingGraph, f"{BUILDINGS_DATA_DIR}S/S.json"),
+        (OutsideGraph, f"{OUTSIDE_DATA_DIR}solbosch_map_updated.json"),
+    ],
+)
+def test_compiled_graph(graph_class, path: str):
+    graph = graph_class(path)
+    compiled = graph.compiled
+    assert len(compiled) == len(graph) and compiled.n_edges == graph.number_of_edges()
+    assert all(compiled.index[node] == idx for idx, node in enumerate(compiled.ids))
+    for reverse, adjacency in [(False, graph.succ), (True, graph.pred)]:
+        offsets, adjacent, weights = compiled.get_arrays(reverse)
+        for idx, node in enumerate(compiled.ids):
+            edges = {
+                compiled.ids[adjacent[edge]]: weights[edge]
+                for edge in range(offsets[idx], offsets[idx + 1])
+            }
+            assert edges == {
+                other: data[BEdgeAttributes.WEIGHT] for other, data in adjacency[node].items()
+            }
+    source = compiled.ids[0]
+    expected = nx.single_source_dijkstra_path_length(graph, source)
+    distances = compiled.get_distances([0])
+    for idx, node in enumerate(compiled.ids):
+        assert math.isclose(distances[idx], expected.get(node, INF), abs_tol=1e-9)
+
+
+@pytest.mark.parametrize("bidirectional", [False, True])
+def test_workspaces(graph: BuildingGraph, bidirectional: bool):
+    compiled = graph.compiled
+    d = Dijkstra(graph, bidirectional=bidirectional)
+    rng = random.Random(0)
+    pairs = [tuple(rng.sample(list(graph.nodes), 2)) for _ in range(50)]
+    expected = [d.dijkstra(*pair) for pair in pairs]
+    # The workspace of the thread is reused from a search to the next one
+    workspace = compiled.get_workspace()
+    generation = workspace.generation
+    d.dijkstra(*pairs[0])
+    assert compiled.get_workspace() is workspace and workspace.generation == generation + 1
+
+    barrier = threading.Barrier(4)
+    results, workspaces = {}, {}
+
+    def run(thread: int) -> None:
+        order = list(range(len(pairs)))
+        random.Random(thread).shuffle(order)
+        barrier.wait()  # The threads search at the same time
+        results[thread] = {idx: d.dijkstra(*pairs[idx]) for idx in order * 4}
+        workspaces[thread] = compiled.get_workspace()
+
+    threads = [threading.Thread(target=run, args=(thread,)) for thread in range(4)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Switch threads in the middle of the searches
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert all(result == dict(enumerate(expected)) for result in results.values())
+    assert len({id(workspace) for workspace in [workspace, *workspaces.values()]}) == 5
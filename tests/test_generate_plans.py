@@ -0,0 +1,58 @@
+"""Tests of the generator of synthetic plans (utils/generate_plans.py).
+
+:Date: 18/10/2026
+:Description: The generated plans must load as the real ones: every room reachable from every
+room with a path the analyzer can translate into instructions, the shafts shared by the floors,
+and an outside map linking the entrances of the buildings.
+"""
+
+import itertools
+import os
+
+import networkx as nx
+import pytest
+
+from Analyse import BPathAnalyzer
+from dijkstra import INF, Dijkstra
+from Graph import OUTSIDE, BuildingGraph, CampusGraph, GraphRegistry, OutsideGraph
+from utils.generate_plans import get_direction, write_plans
+
+
+@pytest.fixture(scope="module")
+def plans(tmp_path_factory):
+    return write_plans(str(tmp_path_factory.mktemp("plans")), 2, 3, 11, 300)
+
+
+def test_directions():
+    assert get_direction((0, 0), (1, 0), (2, 0)) == "straight"
+    assert get_direction((0, 0), (1, 0), (1, 1)) == "left"
+    assert get_direction((0, 0), (1, 0), (1, -1)) == "right"
+
+
+def test_building(plans):
+    paths, _ = plans
+    graph = BuildingGraph(paths[0])
+    rooms = graph.get_rooms()
+    assert len(rooms) == 3 * 11 and graph.n_floors == 3
+    assert sorted(graph.get_entrances()) == ["eX1_1", "eX1_2"]
+    for shaft in ("S1", "S2", "L1"):
+        floors = {graph.nodes[node]["floor"] for node in graph.successors(shaft)}
+        assert floors == {1, 2, 3}
+    d = Dijkstra(graph, astar=True)
+    for source, target in itertools.permutations(rooms + graph.get_entrances(), 2):
+        distance, path = d.dijkstra(source, target)
+        assert distance < INF
+        assert len(BPathAnalyzer(graph, path).get_instructions()) == len(path) - 1
+
+
+def test_campus(plans):
+    paths, outside_path = plans
+    outside = OutsideGraph(outside_path)
+    assert nx.is_strongly_connected(outside)
+    assert {"eX1_1", "eX1_2", "eX2_1", "eX2_2"} <= set(outside.nodes)
+    registry = GraphRegistry([os.path.dirname(os.path.dirname(paths[0]))], write_snapshots=False)
+    assert registry.list_buildings() == ["X1", "X2"]
+    campus = CampusGraph(outside, {"X1": registry["X1"], "X2": registry["X2"]})
+    d = Dijkstra(campus, blocked=campus.get_blocked(["X1"], ["X2"]))
+    paths = dict(campus.split_path(d.dijkstra("X1.2.5", "X2.3.7")[1]))
+    assert set(paths) == {"X1", OUTSIDE, "X2"}
@@ -0,0 +1,114 @@
+"""Tests of the compact forms of the coordinates of the outside paths (Analyse/geometry.py).
+
+:Date: 18/10/2026
+:Description: The encodings must decode to the coordinates rounded to their precision, the
+simplification must keep the ends of the line and drop only the points closer than the tolerance
+to it, and the API must return the geometry and the nodes asked for.
+"""
+
+import json
+import math
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from Analyse.geometry import (
+    COORDINATES,
+    DELTAS,
+    POLYLINE,
+    decode_deltas,
+    decode_polyline,
+    encode,
+    encode_polyline,
+    simplify,
+)
+
+
+def get_line(n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    lat, long = 50.8125, 4.382
+    points = []
+    for _ in range(n):
+        lat += rng.uniform(-1e-4, 1e-4)
+        long += rng.uniform(-1e-4, 1e-4)
+        points.append((lat, long))
+    return points
+
+
+def get_distance(point, a, b) -> float:
+    """Distance (m) from a point to the segment [a, b] (equirectangular projection)."""
+    scale = math.radians(1) * 6371008.8
+    cos_lat = math.cos(math.radians(a[0]))
+    (px, py), (ax, ay), (bx, by) = [(p[1] * cos_lat * scale, p[0] * scale) for p in (point, a, b)]
+    dx, dy = bx - ax, by - ay
+    length = dx * dx + dy * dy
+    t = min(1.0, max(0.0, ((px - ax) * dx + (py - ay) * dy) / length)) if length else 0.0
+    return math.hypot(px - ax - t * dx, py - ay - t * dy)
+
+
+def test_polyline():
+    # Example of the documentation of the format
+    points = [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+    assert encode_polyline(points) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+    points = get_line(500)
+    for decoded in (
+        decode_polyline(encode(points, POLYLINE)),
+        decode_deltas(encode(points, DELTAS)),
+    ):
+        assert len(decoded) == len(points)
+        for (lat, long), (decoded_lat, decoded_long) in zip(points, decoded):
+            assert abs(lat - decoded_lat) <= 0.5e-5 + 1e-12
+            assert abs(long - decoded_long) <= 0.5e-5 + 1e-12
+    assert encode([], POLYLINE) == "" and encode(points, COORDINATES) == points
+
+
+@pytest.mark.parametrize("tolerance", [0.5, 2, 10])
+def test_simplify(tolerance: float):
+    points = get_line(500)
+    simplified = simplify(points, tolerance)
+    assert simplified[0] == points[0] and simplified[-1] == points[-1]
+    assert 2 <= len(simplified) < len(points)
+    # Every dropped point is close to the segment of the simplified line that replaces it
+    kept = [points.index(point) for point in simplified]
+    for first, last in zip(kept, kept[1:]):
+        for i in range(first + 1, last):
+            assert get_distance(points[i], points[first], points[last]) <= tolerance
+    straight = [(50.0, 4.0 + i * 1e-4) for i in range(10)]
+    assert simplify(straight, 0.01) == [straight[0], straight[-1]]
+
+
+@pytest.fixture(scope="module")
+def client():
+    import main
+
+    yield TestClient(main.app)
+    main.route_cache.clear()
+
+
+def test_api(client: TestClient):
+    request = {"start": [50.8125, 4.382], "arrival": "S.4.133"}
+    path = client.post("/api/ask", json=request).json()["path"]
+    options = {"geometry": POLYLINE, "nodes": True}
+    response = client.post("/api/ask", json={**request, **options}).json()
+    assert len(response["path_nodes"]) == len(path)
+    decoded = decode_polyline(response["path"])
+    assert all(math.dist(a, b) < 1e-5 for a, b in zip(decoded, path))
+    options = {"geometry": DELTAS, "tolerance": 5}
+    response = client.post("/api/ask", json={**request, **options}).json()
+    assert 2 <= len(decode_deltas(response["path"])) <= len(path)
+    assert "path_nodes" not in response
+
+    request = {"start": "P1.2.301", "arrival": "S.4.133", "geometry": POLYLINE, "nodes": True}
+    response = client.post("/api/ask_from_inside", json=request).json()
+    assert isinstance(response["outside_path"], str) and response["outside_path_nodes"]
+    stream = client.post("/api/ask_from_inside/stream", json={**request, "tolerance": 2})
+    merged = {}
+    for line in stream.text.splitlines():
+        merged.update(json.loads(line))
+    assert merged == client.post("/api/ask_from_inside", json={**request, "tolerance": 2}).json()
+
+    for invalid in ({"geometry": "svg"}, {"tolerance": -1}):
+        response = client.post("/api/ask_from_inside", json={**request, **invalid})
+        # Refused by get_geometry (the validation errors of the models are lists)
+        assert response.status_code == 422 and isinstance(response.json()["detail"], str)
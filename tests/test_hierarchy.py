@@ -0,0 +1,102 @@
+"""Differential tests of the contraction hierarchy against networkx.
+
+:Date: 18/10/2026
+:Description: The queries of the hierarchy of the outside graph must give the distances of
+networkx and, once the shortcuts are unpacked, paths of the graph with this length. The API must
+answer the outside leg of a route from outside with the hierarchy, with the route of the campus
+graph.
+"""
+
+import math
+import shutil
+
+import networkx as nx
+import pytest
+from fastapi.testclient import TestClient
+
+from dijkstra import Dijkstra
+from Graph import OutsideGraph
+from Graph.graph import EdgeAttributes
+from Graph.hierarchy import ContractionHierarchy
+from utils.constants import OUTSIDE_DATA_DIR
+
+
+@pytest.fixture(scope="module")
+def graph() -> OutsideGraph:
+    return OutsideGraph(f"{OUTSIDE_DATA_DIR}solbosch_map_updated.json")
+
+
+@pytest.fixture(scope="module")
+def hierarchy(graph: OutsideGraph) -> ContractionHierarchy:
+    return ContractionHierarchy.build(graph.compiled)
+
+
+def test_every_pair(graph: OutsideGraph, hierarchy: ContractionHierarchy):
+    for source in graph.nodes:
+        distances = nx.single_source_dijkstra_path_length(
+            graph, source, weight=EdgeAttributes.WEIGHT
+        )
+        for target in graph.nodes:
+            distance, path = hierarchy.query(source, target)
+            if target not in distances:
+                assert (distance, path) == (math.inf, [])
+                continue
+            assert math.isclose(distance, distances[target], abs_tol=1e-9), (source, target)
+            assert path[0] == source and path[-1] == target
+            length = nx.path_weight(graph, path, EdgeAttributes.WEIGHT)
+            assert math.isclose(length, distance, abs_tol=1e-9), (source, target)
+
+
+def test_save_and_load(tmp_path, graph: OutsideGraph, hierarchy: ContractionHierarchy):
+    path = str(tmp_path / "map.ch")
+    hierarchy.save(path, b"0" * 32)
+    assert ContractionHierarchy.load(path, b"1" * 32) is None  # Built from another json file
+    loaded = ContractionHierarchy.load(path, b"0" * 32)
+    assert loaded.shortcuts == hierarchy.shortcuts
+    source, target = loaded.ids[0], loaded.ids[-1]
+    assert loaded.query(source, target) == hierarchy.query(source, target)
+
+
+def test_on_demand(tmp_path, graph: OutsideGraph):
+    path = str(tmp_path / "map.json")
+    shutil.copy(f"{OUTSIDE_DATA_DIR}solbosch_map_updated.json", path)
+    OutsideGraph(path).save_hierarchy(path)
+    copy = OutsideGraph(path)
+    assert copy.hierarchy is None  # Loaded explicitly (see main)
+    assert copy.load_hierarchy(path) and copy.hierarchy is not None
+    source, target = sorted(graph.nodes)[0], sorted(graph.nodes)[-1]
+    distance, _ = Dijkstra(copy, hierarchy=True).dijkstra(source, target)
+    assert math.isclose(distance, Dijkstra(graph).dijkstra(source, target)[0])
+
+
+def test_api(monkeypatch):
+    import main
+
+    if main.outside_graph.hierarchy is None:  # Not built (make hierarchy)
+        hierarchy = ContractionHierarchy.build(main.outside_graph.compiled)
+        monkeypatch.setattr(main.outside_graph, "hierarchy", hierarchy)
+    client = TestClient(main.app)
+
+    def get_queries() -> float:
+        counter = main.metrics.counters.get("searches")
+        return counter.values.get((("graph", "hierarchy"),), 0) if counter else 0
+
+    requests = [
+        {"start": [50.8125, 4.382], "arrival": "P1.2.301"},
+        {"start": [50.8105, 4.3835], "arrival": "S.4.133", "nodes": True},
+    ]
+    responses = []
+    for request in requests:
+        main.route_cache.clear()
+        queries = get_queries()
+        response = client.post("/api/ask", json=request)
+        assert response.status_code == 200 and get_queries() > queries
+        responses.append(response.json())
+    # The routes of the single search of the campus graph
+    monkeypatch.setattr(main.outside_graph, "hierarchy", None)
+    for request, response in zip(requests, responses):
+        main.route_cache.clear()
+        queries = get_queries()
+        assert client.post("/api/ask", json=request).json() == response
+        assert get_queries() == queries
+    main.route_cache.clear()
@@ -0,0 +1,66 @@
+"""Tests of the landmark (ALT) lower bounds of the building graphs.
+
+:Date: 18/10/2026
+:Description: The distances of the landmarks must be the distances of the compiled graph, the
+heuristic of the A* search must never be greater than the distance to the target, and the A*
+search with the landmarks must give the distances of Dijkstra with fewer settled nodes than with
+the floor bound only.
+"""
+
+import math
+import random
+from array import array
+
+import pytest
+
+from dijkstra import INF, Dijkstra
+from Graph import BuildingGraph
+from utils.constants import BUILDINGS_DATA_DIR
+
+
+@pytest.fixture(scope="module", params=["P1", "S"])
+def graph(request) -> BuildingGraph:
+    return BuildingGraph(f"{BUILDINGS_DATA_DIR}{request.param}/{request.param}.json")
+
+
+def test_landmarks(graph: BuildingGraph):
+    compiled = graph.compiled
+    n = len(compiled)
+    landmarks = list(graph.landmarks)
+    assert len(set(landmarks)) == len(landmarks) == BuildingGraph.N_LANDMARKS
+    assert len(graph.from_landmarks) == len(graph.to_landmarks) == n * len(landmarks)
+    for row, landmark in enumerate(landmarks):
+        offset = row * n
+        assert list(graph.from_landmarks[offset : offset + n]) == compiled.get_distances([landmark])
+        to_landmark = compiled.get_distances([landmark], reverse=True)
+        assert list(graph.to_landmarks[offset : offset + n]) == to_landmark
+
+
+def test_admissible(graph: BuildingGraph):
+    compiled = graph.compiled
+    rng = random.Random(0)
+    for target in rng.sample(range(len(compiled)), 20):
+        heuristic = graph.get_heuristic([target])
+        distances = compiled.get_distances([target], reverse=True)  # To the target
+        for idx, distance in enumerate(distances):
+            bound = heuristic(idx)
+            assert bound <= distance + 1e-9 or (bound == INF and distance == INF)
+
+
+def test_fewer_settled_nodes(graph: BuildingGraph):
+    rng = random.Random(1)
+    rooms = graph.get_rooms()
+    pairs = [tuple(rng.sample(rooms, 2)) for _ in range(100)]
+    without = BuildingGraph(f"{BUILDINGS_DATA_DIR}{graph.name}/{graph.name}.json")
+    without.landmarks = array("i")
+    without.from_landmarks, without.to_landmarks = array("d"), array("d")
+    settled = {}
+    for name, g in [("dijkstra", graph), ("floors", without), ("landmarks", graph)]:
+        d = Dijkstra(g, astar=name != "dijkstra")
+        settled[name] = 0
+        for source, target in pairs:
+            distance = d.dijkstra(source, target)[0]
+            expected = Dijkstra(graph).dijkstra(source, target)[0]
+            assert math.isclose(distance, expected) or distance == expected == INF
+            settled[name] += d.settled
+    assert settled["landmarks"] < settled["floors"] < settled["dijkstra"]
@@ -0,0 +1,77 @@
+"""Tests of the instrumentation of the API (utils/metrics.py).
+
+:Date: 18/10/2026
+:Description: The stages must be recorded in the histograms and in the timings of the current
+request, rendered in the Prometheus text format, and nothing must be recorded when the metrics
+are disabled. The middleware of the API must time the requests and their stages, in /metrics and
+in the Server-Timing header.
+"""
+
+from fastapi.testclient import TestClient
+
+from utils.metrics import Metrics, RequestTimings, current_timings
+
+
+def test_stages():
+    metrics = Metrics("test")
+    timings = RequestTimings()
+    token = current_timings.set(timings)
+    with metrics.stage("search"):
+        pass
+    with metrics.stage("search"):
+        pass
+    metrics.endpoint(lambda: None)()
+    current_timings.reset(token)
+    with metrics.stage("analyse"):  # Outside of a request
+        pass
+    assert list(timings.stages) == ["search"] and timings.handler_end is not None
+    assert timings.server_timing().startswith("search;dur=")
+    counts, total, count = metrics.stages.values[(("stage", "search"),)]
+    assert count == 2 and counts[-1] == 2 and total >= 0
+    assert metrics.stages.values[(("stage", "analyse"),)][2] == 1
+
+
+def test_render():
+    metrics = Metrics("test")
+    metrics.observe_stage("search", 0.003)
+    metrics.inc("settled_nodes", 10, "Settled nodes.", graph="building")
+    metrics.inc("settled_nodes", 5, graph="building")
+    metrics.collect("hits", "Hits.", lambda: {(): 3}, kind="counter")
+    metrics.collect("entries", "Entries.", lambda: {(("cache", "routes"),): 7})
+    lines = metrics.render().splitlines()
+    assert "# TYPE test_stage_seconds histogram" in lines
+    assert 'test_stage_seconds_bucket{stage="search",le="0.0025"} 0' in lines
+    assert 'test_stage_seconds_bucket{stage="search",le="0.005"} 1' in lines
+    assert 'test_stage_seconds_bucket{stage="search",le="+Inf"} 1' in lines
+    assert 'test_stage_seconds_count{stage="search"} 1' in lines
+    assert 'test_settled_nodes_total{graph="building"} 15' in lines
+    assert "# TYPE test_hits_total counter" in lines and "test_hits_total 3" in lines
+    assert 'test_entries{cache="routes"} 7' in lines
+
+
+def test_disabled():
+    metrics = Metrics("test", enabled=False)
+    timings = RequestTimings()
+    token = current_timings.set(timings)
+    with metrics.stage("search"):
+        pass
+    metrics.inc("searches")
+    current_timings.reset(token)
+    assert not timings.stages and not metrics.stages.values and not metrics.counters
+
+
+def test_middleware(monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "SERVER_TIMING", True)
+    client = TestClient(main.app)
+    main.route_cache.clear()
+    response = client.post("/api/ask_from_inside", json={"start": "S.5.227", "arrival": "S.9.216"})
+    stages = [part.split(";")[0] for part in response.headers["Server-Timing"].split(", ")]
+    assert {"cache", "search", "analyse", "serialise", "total"} <= set(stages)
+    lines = client.get("/metrics").text.splitlines()
+    assert "# TYPE campus_routing_stage_seconds histogram" in lines
+    path = 'path="/api/ask_from_inside"'
+    assert any(line.startswith(f"campus_routing_request_seconds_count{{{path}}}") for line in lines)
+    assert any(line.startswith('campus_routing_searches_total{graph="building"}') for line in lines)
+    main.route_cache.clear()
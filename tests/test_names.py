@@ -0,0 +1,75 @@
+"""Tests of the index of the names of the rooms (Graph/names.py) and of /api/rooms/search.
+
+:Date: 18/10/2026
+:Description: The lookups must ignore the case, the accents and the separators, find the nodes by
+their aliases, and the autocompletion must rank the names starting by the query before the names
+sharing its trigrams.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from Graph import NameIndex
+from Graph.names import normalize
+
+
+@pytest.fixture()
+def index() -> NameIndex:
+    index = NameIndex()
+    index.add("a", "P1.2.301", ["Auditoire Éole"])
+    index.add("b", "P1.2.302")
+    index.add("c", "P1.3.301")
+    index.add("d", "S.4.133", ["Salle P1.2.301"])
+    index.add("e", "P1.2.301bis", ["P1.2.302"])  # The alias is already the name of b
+    return index
+
+
+def test_normalize():
+    assert normalize("P1.2.301") == normalize(" p1 2 301 ") == normalize("P1-2_301") == "p1 2 301"
+    assert normalize("Éole") == normalize("eole") == normalize("EOLE")
+    assert normalize("S/4..133") == "s 4 133"
+
+
+def test_lookup(index: NameIndex):
+    assert len(index) == 7
+    assert index.get("p1-2-301") == "a" and "P1 2 301" in index
+    assert index.get("auditoire eole") == "a"
+    assert index.get("p1.2.302") == "b"  # The first node added keeps the name
+    with pytest.raises(KeyError):
+        index.get("P1.2.303")
+    assert "P1.2.303" not in index
+
+
+def test_search(index: NameIndex):
+    # The prefixes first, in alphabetical order
+    assert index.search("p1.2")[:3] == [
+        ("P1.2.301", "a"),
+        ("P1.2.301bis", "e"),
+        ("P1.2.302", "b"),
+    ]
+    # Then the other names by number of shared trigrams
+    assert index.search("p1.2")[3:] == [("Salle P1.2.301", "d"), ("P1.3.301", "c")]
+    assert index.search("P1 2", limit=1) == [("P1.2.301", "a")]
+    # No prefix: the names sharing the most trigrams (at least half of them), ties in order
+    results = index.search("2.301")
+    assert [node for _, node in results] == ["a", "d", "e", "b", "c"]
+    assert index.search("eole") == [("Auditoire Éole", "a")]
+    assert index.search("") == [] and index.search("p1", limit=0) == []
+    assert index.search("zzz") == []
+    # A name added after a search is found by the next search
+    index.add("f", "P1.2.300")
+    assert index.search("p1.2.30")[0] == ("P1.2.300", "f")
+
+
+def test_search_endpoint(monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "rooms_index", None)  # Built by the first search
+    client = TestClient(main.app)
+    rooms = client.get("/api/rooms/search", params={"q": "p1 2 30", "limit": 3}).json()["rooms"]
+    assert len(rooms) == 3 and rooms[0] == {"name": "P1.2.301", "building": "P1"}
+    rooms = client.get("/api/rooms/search", params={"q": "S.4.133"}).json()["rooms"]
+    assert rooms[0] == {"name": "S.4.133", "building": "S"}
+    assert client.get("/api/rooms/search", params={"q": ""}).json() == {"rooms": []}
+    assert client.get("/api/rooms/search").status_code == 422
+    assert main.rooms_index is not None
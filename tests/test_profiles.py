@@ -0,0 +1,101 @@
+"""Tests of the weight profiles of the graphs.
+
+:Date: 18/10/2026
+:Description: The searches with a profile must give the shortest paths of networkx on a copy of
+the graph without the nodes the profile avoids, both forward and on the reverse graph. The API
+must answer 404 to a route without a path for its profile, and not cache it.
+"""
+
+import math
+
+import networkx as nx
+import pytest
+from fastapi.testclient import TestClient
+
+from dijkstra import INF, Dijkstra
+from Graph import BNodeAttributes, BuildingGraph, Graph
+from Graph.compiled import CompiledGraph
+from utils.constants import BUILDINGS_DATA_DIR
+
+
+@pytest.fixture(scope="module", params=["P1", "S"])
+def graph(request) -> BuildingGraph:
+    return BuildingGraph(f"{BUILDINGS_DATA_DIR}{request.param}/{request.param}.json")
+
+
+def get_filtered(graph: BuildingGraph, avoided: list) -> nx.DiGraph:
+    """Copy of the graph without the nodes of the avoided types."""
+    nodes = [node for node in graph.nodes if graph.nodes[node][BNodeAttributes.TYPE] not in avoided]
+    return nx.DiGraph(graph.subgraph(nodes))
+
+
+@pytest.mark.parametrize("profile", list(Graph.PROFILES))
+def test_every_pair(graph: BuildingGraph, profile: str):
+    filtered = get_filtered(graph, Graph.PROFILES[profile])
+    d = Dijkstra(graph, profile=profile)
+    for source in graph.nodes:
+        expected = {}
+        if source in filtered:
+            expected = nx.single_source_dijkstra_path_length(filtered, source)
+        to_many = d.dijkstra_to_many(source, list(graph.nodes))
+        for target, (distance, path) in to_many.items():
+            if target == source:
+                continue
+            assert math.isclose(distance, expected.get(target, INF), abs_tol=1e-9)
+            assert all(filtered.has_edge(u, v) for u, v in zip(path, path[1:]))
+        from_many = d.dijkstra_from_many(list(graph.nodes), source)
+        for origin, (distance, path) in from_many.items():
+            if origin == source:
+                continue
+            reachable = source in filtered and origin in filtered
+            reachable = reachable and nx.has_path(filtered, origin, source)
+            assert (distance < INF) == reachable, (origin, source)
+            assert all(filtered.has_edge(u, v) for u, v in zip(path, path[1:]))
+
+
+def test_shared_weights():
+    compiled = CompiledGraph.from_edges(["a", "b", "c"], [(0, 1, 1.0), (1, 2, 2.0), (2, 0, 3.0)])
+    compiled.add_profile("same", [1.0, 2.0, 3.0])
+    compiled.add_profile("default")
+    for name in ("same", "default"):
+        assert compiled.profiles[name] == (compiled.weights, compiled.r_weights)
+    compiled.add_profile("longer", [1.0, 5.0, 3.0])
+    offsets, targets, weights = compiled.get_arrays(reverse=True, profile="longer")
+    # Reverse edges of c: the edge b -> c
+    assert [weights[edge] for edge in range(offsets[2], offsets[3])] == [5.0]
+    with pytest.raises(ValueError):
+        compiled.add_profile("shorter", [0.5, 2.0, 3.0])
+    with pytest.raises(ValueError):
+        compiled.add_profile("missing", [1.0, 2.0])
+
+
+def test_unknown_profile(graph: BuildingGraph):
+    with pytest.raises(ValueError):
+        Dijkstra(graph, profile="flying")
+
+
+def test_no_route():
+    import main
+
+    client = TestClient(main.app)
+    main.route_cache.clear()
+    # There is no lift in S: no step free route to another floor
+    inside = {"start": "S.4.133", "arrival": "S.9.206", "profile": "step_free"}
+    outside = {"start": [50.8125, 4.382], "arrival": "S.9.206", "profile": "step_free"}
+    for endpoint, request in [
+        ("ask_from_inside", inside),
+        ("ask_from_inside/stream", inside),
+        ("ask", outside),
+        ("ask/stream", outside),
+    ]:
+        response = client.post(f"/api/{endpoint}", json=request)
+        assert response.status_code == 404
+        assert response.json()["detail"] == "There is no route with the profile step_free"
+    feasible = {**inside, "arrival": "S.4.131"}
+    results = client.post("/api/ask_batch", json={"requests": [inside, feasible]}).json()["results"]
+    assert results[0] == {"error": "There is no route with the profile step_free"}
+    assert results[1]["same_building"] and results[1]["instructions"]
+    assert len(main.route_cache) == 1
+    # The same rooms with the default weights
+    assert client.post("/api/ask_from_inside", json={**inside, "profile": None}).status_code == 200
+    main.route_cache.clear()
@@ -0,0 +1,70 @@
+"""Tests of the registry of the building graphs (Graph/registry.py).
+
+:Date: 18/10/2026
+:Description: With a small memory budget, the registry must evict its least recently used graphs
+(and the structures reserved on them) to load a graph, and call on_load and on_evict.
+"""
+
+import pytest
+
+from Graph import GraphRegistry
+from utils.constants import BUILDINGS_DATA_DIR
+
+
+@pytest.fixture(scope="module")
+def sizes() -> dict:
+    registry = GraphRegistry([BUILDINGS_DATA_DIR], write_snapshots=False)
+    return {building: registry[building].nbytes() for building in ("P1", "S")}
+
+
+def get_registry(max_bytes: int, calls: list) -> GraphRegistry:
+    return GraphRegistry(
+        [BUILDINGS_DATA_DIR],
+        max_bytes,
+        on_evict=lambda building: calls.append(("evict", building)),
+        write_snapshots=False,
+        on_load=lambda building, graph: calls.append(("load", building, graph.name)),
+    )
+
+
+def test_lru_eviction(sizes: dict):
+    calls = []
+    registry = get_registry(sizes["P1"] + sizes["S"], calls)
+    p1 = registry["P1"]
+    registry["S"]
+    assert registry.loaded() == ["P1", "S"] and registry.evictions == 0
+    assert registry["P1"] is p1 and registry.loaded() == ["S", "P1"]
+    # Room for one of them: loading one evicts the other one
+    registry.max_bytes = max(sizes.values())
+    registry.evict("S")
+    registry["S"]
+    assert registry.loaded() == ["S"] and registry.get_nbytes() == sizes["S"]
+    assert calls == [
+        ("load", "P1", "P1"),
+        ("load", "S", "S"),
+        ("evict", "S"),
+        ("load", "S", "S"),
+        ("evict", "P1"),
+    ]
+    assert registry["P1"] is not p1  # Loaded again
+    assert registry.stats()["loads"] == 4 and registry.stats()["evictions"] == 3
+    # The last graph is kept even if it does not fit
+    registry.max_bytes = 1
+    registry["S"]
+    assert registry.loaded() == ["S"]
+    with pytest.raises(KeyError):
+        registry["XYZ"]
+
+
+def test_reserve(sizes: dict):
+    calls = []
+    registry = get_registry(sizes["P1"] + sizes["S"] + 100, calls)
+    registry["P1"]
+    registry["S"]
+    registry.reserve("campus", 100)
+    assert registry.loaded() == ["P1", "S"] and registry.get_nbytes() == registry.max_bytes
+    registry.reserve("campus", 101)  # Replaces the previous footprint
+    assert registry.loaded() == ["S"] and calls[-1] == ("evict", "P1")
+    assert registry.stats()["reserved"] == 101
+    registry.release("campus")
+    assert registry.get_nbytes() == sizes["S"]
@@ -0,0 +1,75 @@
+"""Tests of the cache of the routes (utils/route_cache.py).
+
+:Date: 18/10/2026
+:Description: The cache must evict its least recently used route when it is full, drop the routes
+older than its time to live and the routes computed on other versions of the graphs, and count
+them.
+"""
+
+import pytest
+
+from utils import route_cache
+from utils.route_cache import RouteCache
+
+
+@pytest.fixture()
+def clock(monkeypatch) -> list:
+    """Time of the cache, set by the test."""
+    now = [1000.0]
+    monkeypatch.setattr(route_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_lru_eviction():
+    cache = RouteCache(maxsize=3)
+    for key in "abc":
+        assert cache.put(key, key.upper())
+    assert cache.get("a") == "A"  # b is now the least recently used route
+    cache.put("d", "D")
+    assert cache.get("b") is None and len(cache) == 3
+    cache.put("c", "C2")  # Replacing a route makes it the most recently used one
+    cache.put("e", "E")  # Evicts a
+    assert list(cache.entries) == ["d", "c", "e"] and cache.get("c") == "C2"
+    assert cache.stats() == {
+        "size": 3,
+        "maxsize": 3,
+        "hits": 2,
+        "misses": 1,
+        "evictions": 2,
+        "invalidations": 0,
+    }
+
+
+def test_ttl(clock: list):
+    cache = RouteCache(maxsize=4, ttl=10.0)
+    cache.put("a", 1)
+    clock[0] += 5.0
+    cache.put("b", 2)
+    clock[0] += 5.0
+    assert cache.get("a") == 1  # Exactly its time to live
+    clock[0] += 1.0
+    assert cache.get("a") is None and cache.get("b") == 2
+    assert "a" not in cache.entries and cache.invalidations == 1
+    # A route put again lives again
+    cache.put("a", 3)
+    clock[0] += 10.0
+    assert cache.get("a") == 3 and cache.get("b") is None
+
+
+def test_versions():
+    cache = RouteCache()
+    cache.put("a", 1, versions=(1, 4))
+    assert cache.get("a", (1, 5)) is None  # The route is dropped
+    assert cache.get("a", (1, 4)) is None
+    cache.put("a", 2, versions=(1, 5))
+    assert cache.get("a") is None and len(cache) == 0
+    assert cache.misses == 3 and cache.invalidations == 2
+
+
+def test_put_refused():
+    cache = RouteCache(maxsize=2)
+    assert not cache.put("a", 1, is_valid=lambda: False)
+    assert cache.put("a", 1, tags=["x"], is_valid=lambda: True) and cache.get("a") == 1
+    assert not RouteCache(maxsize=0).put("a", 1)
+    cache.clear()
+    assert len(cache) == 0 and not cache.tagged and cache.invalidations == 1
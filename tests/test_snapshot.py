@@ -0,0 +1,121 @@
+"""Tests of the binary snapshots of the graphs (Graph/snapshot.py).
+
+:Date: 18/10/2026
+:Description: A graph loaded from its snapshot (memory map) must be the graph loaded from its json
+file and give the same routes. A snapshot built from another version of the json file, or
+truncated, must be ignored (the graph is loaded from its json file), and writing a snapshot must
+not leave a temporary file behind. The rooms of a building must be read from its snapshot without
+parsing its json file, and importing the API must not write any snapshot.
+"""
+
+import os
+import random
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from dijkstra import Dijkstra
+from Graph import BuildingGraph, OutsideGraph, b_graph
+from Graph.snapshot import (
+    ALIGNMENT,
+    get_file_hash,
+    get_snapshot_path,
+    read_sections,
+    read_snapshot,
+)
+from utils.constants import BUILDINGS_DATA_DIR, OUTSIDE_DATA_DIR
+
+
+@pytest.fixture()
+def plan(tmp_path) -> str:
+    path = str(tmp_path / "P1.json")
+    shutil.copy(f"{BUILDINGS_DATA_DIR}P1/P1.json", path)
+    return path
+
+
+@pytest.mark.parametrize(
+    "graph_class, source",
+    [
+        (BuildingGraph, f"{BUILDINGS_DATA_DIR}S/S.json"),
+        (OutsideGraph, f"{OUTSIDE_DATA_DIR}solbosch_map_updated.json"),
+    ],
+)
+def test_round_trip(tmp_path, graph_class, source: str):
+    path = str(tmp_path / os.path.basename(source))
+    shutil.copy(source, path)
+    built = graph_class(path)
+    assert built.snapshot_path is None
+    built.save_snapshot(path)
+    loaded = graph_class(path)
+    assert loaded.snapshot_path == get_snapshot_path(path)
+    assert isinstance(loaded.compiled.offsets, memoryview)  # Mapped, not copied
+    assert list(loaded.nodes(data=True)) == list(built.nodes(data=True))
+    assert sorted(loaded.edges(data=True)) == sorted(built.edges(data=True))
+    for attr in ("ids", "offsets", "targets", "weights", "r_offsets", "r_targets", "r_weights"):
+        assert list(getattr(loaded.compiled, attr)) == list(getattr(built.compiled, attr))
+    rng = random.Random(0)
+    nodes = list(built.nodes)
+    for _ in range(50):
+        source, target = rng.sample(nodes, 2)
+        for astar in (False, True):
+            expected = Dijkstra(built, astar=astar).dijkstra(source, target)
+            assert Dijkstra(loaded, astar=astar).dijkstra(source, target) == expected
+
+
+def test_other_version(plan: str):
+    snapshot_path = BuildingGraph(plan).save_snapshot(plan)
+    with open(plan, "a") as f:
+        f.write("\n")  # Same plan, other file
+    assert read_snapshot(snapshot_path) is not None
+    assert read_snapshot(snapshot_path, get_file_hash(plan)) is None
+    graph = BuildingGraph(plan)
+    assert graph.snapshot_path is None and len(graph.compiled) == len(graph)
+    # The snapshot of the new version replaces it
+    graph.save_snapshot(plan)
+    assert BuildingGraph(plan).snapshot_path == snapshot_path
+
+
+def test_truncated(plan: str):
+    snapshot_path = BuildingGraph(plan).save_snapshot(plan)
+    assert sorted(os.listdir(os.path.dirname(plan))) == ["P1.json", "P1.snap"]  # No .tmp file
+    source_hash = get_file_hash(plan)
+    assert read_snapshot(snapshot_path, source_hash) is not None
+    with open(snapshot_path, "rb") as f:
+        data = f.read()
+    # Cut in the last section (after its padding), and in the table of the sections
+    for size in (len(data) - ALIGNMENT, 60):
+        with open(snapshot_path, "wb") as f:
+            f.write(data[:size])
+        assert read_sections(snapshot_path, source_hash) is None
+        graph = BuildingGraph(plan)
+        assert graph.snapshot_path is None and len(graph.compiled) == len(graph)
+
+
+def test_rooms(plan: str, monkeypatch):
+    rooms = BuildingGraph.read_rooms(plan)  # From the json file
+    graph = BuildingGraph(plan)
+    assert graph.rooms == rooms and rooms
+    graph.save_snapshot(plan)
+    monkeypatch.setattr(b_graph.json, "load", None)  # The json file must not be parsed
+    assert BuildingGraph.read_rooms(plan) == rooms
+    monkeypatch.undo()
+    # A snapshot written before the rooms were saved is out of date
+    monkeypatch.setattr(BuildingGraph, "SNAPSHOT_ATTRIBUTES", ["n_floors"])
+    BuildingGraph(plan).save_snapshot(plan)
+    monkeypatch.undo()
+    assert BuildingGraph(plan).snapshot_path is None and BuildingGraph.read_rooms(plan) == rooms
+
+
+def test_import_main():
+    # Importing the API (e.g: in a worker process) must not write to the data directory
+    code = (
+        "from Graph import snapshot\n"
+        "def write_sections(*args):\n"
+        "    raise AssertionError('snapshot written on import')\n"
+        "snapshot.write_sections = write_sections\n"
+        "import main\n"
+    )
+    env = {**os.environ, "PYTHONPATH": "src"}
+    subprocess.run([sys.executable, "-c", code], check=True, env=env, capture_output=True)
@@ -0,0 +1,53 @@
+"""Tests of the spatial index of the outside graph (Graph/spatial.py).
+
+:Date: 18/10/2026
+:Description: The k nearest nodes of a position must be the ones of a linear scan, for any k.
+"""
+
+import math
+import random
+import time
+
+import pytest
+
+from Graph.spatial import SpatialIndex, haversine
+
+
+@pytest.fixture(scope="module")
+def positions() -> list:
+    rng = random.Random(0)
+    return [
+        (f"c{idx}", 50.81 + rng.random() * 0.01, 4.38 + rng.random() * 0.01) for idx in range(300)
+    ]
+
+
+@pytest.mark.parametrize("k", [-1, 0, 1, 5, 300, 400])
+def test_k_nearest(positions: list, k: int):
+    index = SpatialIndex(positions)
+    rng = random.Random(k)
+    for _ in range(20):
+        lat, long = 50.805 + rng.random() * 0.02, 4.375 + rng.random() * 0.02
+        expected = sorted(
+            (haversine(lat, long, n_lat, n_long), node) for node, n_lat, n_long in positions
+        )[: max(k, 0)]
+        result = index.k_nearest((lat, long), k)
+        assert [node for _, node in result] == [node for _, node in expected]
+        assert all(math.isclose(a, b) for (a, _), (b, _) in zip(result, expected))
+
+
+@pytest.mark.parametrize("position", [(0, 0), (-1, -1), (52.5, 4.4), (50.81, 5.0)])
+def test_far_position(positions: list, position: tuple):
+    index = SpatialIndex(positions)
+    start = time.perf_counter()
+    result = index.k_nearest(position, 3)
+    assert time.perf_counter() - start < 0.1
+    expected = sorted((haversine(*position, lat, long), node) for node, lat, long in positions)
+    assert result == expected[:3]
+    assert index.nearest(position) == expected[0][1]
+
+
+def test_empty():
+    index = SpatialIndex([])
+    assert index.k_nearest((50.81, 4.38), 3) == []
+    with pytest.raises(ValueError):
+        index.nearest((50.81, 4.38))
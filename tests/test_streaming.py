@@ -0,0 +1,77 @@
+"""Tests of the streaming endpoints of the API (/api/ask/stream, /api/ask_from_inside/stream).
+
+:Date: 18/10/2026
+:Description: The union of the lines of a stream must be the response of the endpoint it is the
+variant of, with the outside path first, from the cache as well, and a part that fails must end
+the stream with an error line.
+"""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="module")
+def api():
+    import main
+
+    yield main, TestClient(main.app, raise_server_exceptions=False)
+    main.route_cache.clear()
+
+
+def get_lines(client: TestClient, endpoint: str, request: dict) -> list:
+    response = client.post(f"/api/{endpoint}/stream", json=request)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def merge(lines: list) -> dict:
+    response = {}
+    for line in lines:
+        response.update(line)
+    return response
+
+
+@pytest.mark.parametrize(
+    "endpoint, request_, first",
+    [
+        ("ask", {"start": [50.8125, 4.382], "arrival": "P1.2.301"}, ["path"]),
+        ("ask", {"start": [50.8135, 4.383], "arrival": "S.4.133"}, ["path"]),
+        (
+            "ask_from_inside",
+            {"start": "P1.2.301", "arrival": "S.4.133"},
+            ["same_building", "outside_path"],
+        ),
+        (
+            "ask_from_inside",
+            {"start": "S.5.227", "arrival": "S.9.216"},
+            ["same_building", "path", "instructions", "images"],
+        ),
+    ],
+)
+def test_stream(api, endpoint: str, request_: dict, first: list):
+    main, client = api
+    main.route_cache.clear()
+    lines = get_lines(client, endpoint, request_)
+    assert list(lines[0]) == first
+    main.route_cache.clear()
+    expected = client.post(f"/api/{endpoint}", json=request_).json()
+    assert merge(lines) == expected
+    # The response is now in the cache: a single line
+    assert get_lines(client, endpoint, request_) == [expected]
+    main.route_cache.clear()
+    get_lines(client, endpoint, request_)  # The stream puts its response in the cache
+    assert client.post(f"/api/{endpoint}", json=request_).json() == expected
+    assert main.route_cache.hits > 0
+
+
+def test_stream_error(api):
+    main, client = api
+    main.route_cache.clear()
+    request = {"start": "S.10.102", "arrival": "P1.1.203"}  # Analyzer fails on the plan of S
+    assert client.post("/api/ask_from_inside", json=request).status_code == 500
+    lines = get_lines(client, "ask_from_inside", request)
+    assert "outside_path" in lines[0] and lines[-1] == {"error": "Internal Server Error"}
+    assert len(main.route_cache) == 0
@@ -0,0 +1,122 @@
+"""Tests of the turn aware searches of Dijkstra (line graph of the buildings).
+
+:Date: 18/10/2026
+:Description: The costs of the routes found on the line graph are checked against a networkx
+search on a line graph built independently from the directions of the edges. Without penalties,
+the routes must have the length of the node based shortest paths.
+"""
+
+import math
+
+import networkx as nx
+import pytest
+
+from dijkstra import INF, Dijkstra
+from Graph import BEdgeAttributes, BNodeAttributes, BuildingGraph
+from Graph.turns import DEFAULT_PENALTIES
+from utils.constants import BUILDINGS_DATA_DIR
+
+NO_PENALTIES = {kind: 0.0 for kind in DEFAULT_PENALTIES}
+
+
+@pytest.fixture(scope="module")
+def graph() -> BuildingGraph:
+    return BuildingGraph(f"{BUILDINGS_DATA_DIR}P1/P1.json")
+
+
+def get_turn(graph: BuildingGraph, predecessor, source, target) -> str:
+    """Kind of turn of the edge source -> target when coming from predecessor."""
+    if predecessor is not None and predecessor == target:
+        return "uturn"
+    direction = graph.edges[source, target].get(BEdgeAttributes.DIRECTION)
+    if isinstance(direction, dict):
+        if predecessor is None:
+            direction = direction.get("null", direction.get(None))
+        else:
+            direction = direction.get(predecessor)
+    return direction if direction in ("straight", "left", "right") else "unknown"
+
+
+def get_cost(graph: BuildingGraph, path: list, penalties: dict) -> float:
+    """Weight of a path plus the penalties of its turns."""
+    cost, predecessor = 0.0, None
+    for source, target in zip(path, path[1:]):
+        cost += graph.edges[source, target][BEdgeAttributes.WEIGHT]
+        cost += penalties[get_turn(graph, predecessor, source, target)]
+        predecessor = source
+    return cost
+
+
+def get_line_graph(graph: BuildingGraph, penalties: dict) -> nx.DiGraph:
+    """Line graph with a state for each edge, plus a state ("start", node) for each node."""
+    line = nx.DiGraph()
+    for source, target, data in graph.edges(data=True):
+        turn = get_turn(graph, None, source, target)
+        line.add_edge(("start", source), (source, target), weight=data["weight"] + penalties[turn])
+        for following in graph.successors(target):
+            turn = get_turn(graph, source, target, following)
+            weight = graph.edges[target, following]["weight"] + penalties[turn]
+            line.add_edge((source, target), (target, following), weight=weight)
+    return line
+
+
+@pytest.mark.parametrize("astar", [False, True])
+def test_no_penalties(graph: BuildingGraph, astar: bool):
+    graph.set_turn_penalties(NO_PENALTIES)
+    d, expected = Dijkstra(graph, astar=astar, turns=True), Dijkstra(graph)
+    for source in graph.nodes:
+        for target in graph.nodes:
+            distance, path = d.dijkstra(source, target)
+            assert math.isclose(distance, expected.dijkstra(source, target)[0], abs_tol=1e-9)
+            if distance < INF:
+                assert path[0] == source and path[-1] == target
+    graph.set_turn_penalties(DEFAULT_PENALTIES)
+
+
+@pytest.mark.parametrize("astar", [False, True])
+def test_every_pair(graph: BuildingGraph, astar: bool):
+    penalties = {**DEFAULT_PENALTIES, "left": 0.7, "right": 0.3}
+    graph.set_turn_penalties(penalties)
+    line = get_line_graph(graph, penalties)
+    d = Dijkstra(graph, astar=astar, turns=True)
+    for source in graph.nodes:
+        if ("start", source) not in line:
+            continue
+        costs = nx.single_source_dijkstra_path_length(line, ("start", source))
+        for target in graph.nodes:
+            if target == source:
+                continue
+            distance, path = d.dijkstra(source, target)
+            expected = min(
+                (cost for state, cost in costs.items() if state[1] == target), default=INF
+            )
+            if expected == INF:
+                assert (distance, path) == (INF, [])
+                continue
+            assert math.isclose(get_cost(graph, path, penalties), expected, abs_tol=1e-9)
+            assert math.isclose(nx.path_weight(graph, path, "weight"), distance, abs_tol=1e-9)
+    graph.set_turn_penalties(DEFAULT_PENALTIES)
+
+
+def test_fewer_turns():
+    # H1 -> H4 is 2 long through H2 (two turns) and 2.5 long straight through H3
+    graph = BuildingGraph()
+    graph.add_nodes_from(["H1_1", "H2_1", "H3_1", "H4_1"], **{BNodeAttributes.FLOOR: 1})
+    graph.add_edge("H1_1", "H2_1", weight=1.0, direction="left")
+    graph.add_edge("H2_1", "H4_1", weight=1.0, direction={"H1_1": "right"})
+    graph.add_edge("H1_1", "H3_1", weight=1.5, direction="straight")
+    graph.add_edge("H3_1", "H4_1", weight=1.0, direction={"H1_1": "straight"})
+    assert Dijkstra(graph).dijkstra("H1_1", "H4_1") == (2.0, ["H1_1", "H2_1", "H4_1"])
+    d = Dijkstra(graph, turns=True)
+    assert d.dijkstra("H1_1", "H4_1") == (2.5, ["H1_1", "H3_1", "H4_1"])
+    graph.set_turn_penalties({"left": 0.1, "right": 0.1})
+    assert d.dijkstra("H1_1", "H4_1") == (2.0, ["H1_1", "H2_1", "H4_1"])
+    assert d.dijkstra("H4_1", "H1_1") == (INF, [])
+    assert d.dijkstra("H1_1", "H1_1") == (0.0, ["H1_1"])
+
+
+def test_invalid_penalties(graph: BuildingGraph):
+    with pytest.raises(ValueError):
+        graph.set_turn_penalties({"sideways": 1.0})
+    with pytest.raises(ValueError):
+        graph.set_turn_penalties({"left": -1.0})
@@ -0,0 +1,81 @@
+"""Tests of the compiler of the weights of the outside map (utils/update_weigths.py).
+
+:Date: 18/10/2026
+:Description: The vectorised distances are checked against geopy, and the incremental mode must
+give the weights of a full run while computing only the edges of the nodes that changed.
+"""
+
+import copy
+import json
+import math
+import random
+
+import geopy.distance
+import numpy as np
+
+from utils.update_weigths import HAVERSINE, INPUT_PATH, MAP, compile_weights, vincenty
+
+
+def load_nodes() -> list:
+    with open(INPUT_PATH) as f:
+        return json.load(f)[MAP]
+
+
+def test_distances():
+    rng = random.Random(0)
+    points = [
+        (rng.uniform(-89, 89), rng.uniform(-180, 180), rng.uniform(-89, 89), rng.uniform(-180, 180))
+        for _ in range(500)
+    ]
+    points += [(50.8, 4.38, 50.8, 4.38), (0.0, 0.0, 0.0, 90.0), (0.0, 0.0, 0.5, 179.7)]
+    lat1, lon1, lat2, lon2 = np.array(points).T
+    distances = vincenty(lat1, lon1, lat2, lon2)
+    for point, distance in zip(points, distances):
+        expected = geopy.distance.geodesic(point[:2], point[2:]).m
+        assert math.isclose(distance, expected, abs_tol=1e-3), point
+
+
+def test_full_run():
+    nodes = load_nodes()
+    changes = compile_weights(nodes)
+    coordinates = {node["id"]: (node["latitude"], node["longitude"]) for node in nodes}
+    edges = []
+    for node in nodes:
+        for neighbor in node["neighbors"]:
+            length = geopy.distance.geodesic(coordinates[node["id"]], coordinates[neighbor["id"]])
+            assert neighbor["weight"] == round(length.m)
+            edges.append((node["id"], neighbor["id"]))
+    assert changes.n_computed == len(edges)
+    assert sorted(changes.added_edges) == sorted(set(edges))  # Some edges are listed twice
+    haversine_nodes = load_nodes()
+    compile_weights(haversine_nodes, method=HAVERSINE)
+    for node, haversine_node in zip(nodes, haversine_nodes):
+        for neighbor, haversine_neighbor in zip(node["neighbors"], haversine_node["neighbors"]):
+            assert abs(neighbor["weight"] - haversine_neighbor["weight"]) <= 1
+
+
+def test_incremental():
+    previous = load_nodes()
+    compile_weights(previous)
+    nodes = load_nodes()
+    changes = compile_weights(nodes, copy.deepcopy(previous))
+    assert not changes and changes.n_computed == 0
+    assert nodes == previous
+    # Move a node by about 100 m and remove an edge
+    nodes = load_nodes()
+    moved = nodes[0]
+    moved["latitude"] += 0.001
+    removed = nodes[1]["neighbors"].pop()
+    changes = compile_weights(nodes, previous)
+    assert changes.moved_nodes == [moved["id"]]
+    assert changes.removed_edges == [(nodes[1]["id"], removed["id"])]
+    touching = [
+        (node["id"], neighbor["id"])
+        for node in nodes
+        for neighbor in node["neighbors"]
+        if moved["id"] in (node["id"], neighbor["id"])
+    ]
+    assert changes.n_computed == len(touching) and set(changes.weights) <= set(touching)
+    expected = copy.deepcopy(nodes)
+    compile_weights(expected)
+    assert nodes == expected
@@ -0,0 +1,145 @@
+"""Tests of the live updates of the graphs (closures and weight overrides).
+
+:Date: 18/10/2026
+:Description: The searches on an updated graph must give the shortest paths of networkx on a
+copy of the graph with the same closures and weights, and lifting the updates must give back the
+routes of the plan. A route computed while its graph is updated must not stay in the route cache.
+"""
+
+import math
+import shutil
+
+import networkx as nx
+import pytest
+from fastapi.testclient import TestClient
+
+from dijkstra import INF, Dijkstra
+from Graph import BuildingGraph
+from Graph.snapshot import get_file_hash, get_snapshot_path, read_snapshot
+from utils.constants import BUILDINGS_DATA_DIR
+from utils.route_cache import RouteCache
+
+
+@pytest.fixture()
+def graph() -> BuildingGraph:
+    return BuildingGraph(f"{BUILDINGS_DATA_DIR}P1/P1.json")
+
+
+def get_updated(graph: BuildingGraph) -> nx.DiGraph:
+    """Copy of the graph with the updates applied."""
+    updated = nx.DiGraph(graph)
+    updated.remove_nodes_from(graph.updates.closed_nodes)
+    updated.remove_edges_from(graph.updates.closed_edges)
+    for (source, target), weight in graph.updates.weights.items():
+        if updated.has_edge(source, target):
+            updated.edges[source, target]["weight"] = weight
+    return updated
+
+
+def check_every_pair(graph: BuildingGraph, astar: bool) -> None:
+    updated = get_updated(graph)
+    d = Dijkstra(graph, astar=astar)
+    for source in graph.nodes:
+        expected = {}
+        if source in updated:
+            expected = nx.single_source_dijkstra_path_length(updated, source)
+        for target in graph.nodes:
+            distance, path = d.dijkstra(source, target)
+            if source == target:
+                continue
+            assert math.isclose(distance, expected.get(target, INF), abs_tol=1e-9)
+            assert all(updated.has_edge(u, v) for u, v in zip(path, path[1:]))
+
+
+@pytest.mark.parametrize("astar", [False, True])
+def test_closures(graph: BuildingGraph, astar: bool):
+    source, target = list(graph.nodes)[0], list(graph.nodes)[-1]
+    distance, path = Dijkstra(graph, astar=astar).dijkstra(source, target)
+    assert len(path) > 3
+    increased = graph.update(close_nodes=[path[1]], close_edges=[(path[2], path[3])])
+    assert (path[0], path[1]) in increased and (path[2], path[3]) in increased
+    assert graph.is_updated and not graph.lowered
+    check_every_pair(graph, astar)
+    graph.update(open_nodes=[path[1]], open_edges=[(path[2], path[3])])
+    assert not graph.updates
+    assert Dijkstra(graph, astar=astar).dijkstra(source, target) == (distance, path)
+
+
+@pytest.mark.parametrize("astar", [False, True])
+def test_weights(graph: BuildingGraph, astar: bool):
+    edges = list(graph.edges)
+    routes_version = graph.routes_version
+    graph.update(weights={edges[0]: 1000.0})
+    assert graph.routes_version == routes_version and not graph.lowered
+    graph.update(weights={edges[1]: 0.0, edges[2]: 0.0})
+    assert graph.routes_version != routes_version and graph.lowered
+    assert Dijkstra(graph, astar=True).get_heuristic([edges[0][1]]) is None
+    check_every_pair(graph, astar)
+    graph.update(weights={edge: None for edge in edges[:3]})
+    assert not graph.updates and not graph.lowered
+
+
+def test_invalid_update(graph: BuildingGraph):
+    version = graph.version
+    with pytest.raises(ValueError):
+        graph.update(close_nodes=[list(graph.nodes)[0], "nowhere"])
+    with pytest.raises(ValueError):
+        graph.update(weights={list(graph.edges)[0]: -1.0})
+    assert graph.version == version and not graph.updates
+
+
+def test_snapshot_without_updates(graph: BuildingGraph, tmp_path):
+    path = str(tmp_path / "P1.json")
+    shutil.copy(f"{BUILDINGS_DATA_DIR}P1/P1.json", path)
+    graph.update(close_nodes=[list(graph.nodes)[0]])
+    graph.save_snapshot(path)
+    snapshot = read_snapshot(get_snapshot_path(path), get_file_hash(path))
+    assert list(snapshot.compiled.weights) == list(graph._plan_compiled.weights)
+    assert list(snapshot.compiled.weights) != list(graph.compiled.weights)
+
+
+def test_route_cache_tags():
+    cache = RouteCache(maxsize=2)
+    cache.put("a", 1, tags=[("S", "x", "y")])
+    cache.put("b", 2, tags=[("S", "y", "z")])
+    cache.put("c", 3)  # Evicts a
+    assert cache.tagged == {("S", "y", "z"): {"b"}}
+    assert cache.invalidate([("S", "x", "y"), ("S", "y", "z")]) == 1
+    assert cache.get("b") is None and cache.get("c") == 3
+
+
+@pytest.mark.parametrize(
+    "endpoint, function, request_",
+    [
+        ("ask", "compute_route_from_outside", {"start": [50.8125, 4.382], "arrival": "S.9.216"}),
+        ("ask_from_inside", "compute_route_from_inside", {"start": "S.5.227", "arrival": "S.9.216"}),
+    ],
+)
+def test_update_during_computation(monkeypatch, endpoint: str, function: str, request_: dict):
+    import main
+
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "token")
+    client = TestClient(main.app)
+    main.route_cache.clear()
+    compute = getattr(main, function)
+    path = main.search_route_from_inside("S.5.227", "S.9.216")["S"]
+    closed = path[len(path) // 2]
+    main.route_cache.clear()
+
+    def compute_then_update(*args):
+        result = compute(*args)
+        # The node is closed after the route is computed through it and before it is cached
+        main.update_graph(main.UpdateRequest(graph="S", close_nodes=[closed]), "token")
+        return result
+
+    monkeypatch.setattr(main, function, compute_then_update)
+    try:
+        stale = client.post(f"/api/{endpoint}", json=request_).json()
+        assert len(main.route_cache) == 0
+        monkeypatch.setattr(main, function, compute)
+        fresh = client.post(f"/api/{endpoint}", json=request_).json()
+        assert fresh != stale and len(main.route_cache) == 1
+        assert client.post(f"/api/{endpoint}", json=request_).json() == fresh
+    finally:
+        main.update_graph(main.UpdateRequest(graph="S", open_nodes=[closed]), "token")
+        main.route_cache.clear()
@@ -0,0 +1,135 @@
+"""Tests of the pool of the route computations (utils/workers.py).
+
+:Date: 18/10/2026
+:Description: The pool must refuse the computations over its bound and give up on the ones that
+time out, and the worker processes must give the responses of the API process, with its live
+updates.
+"""
+
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from utils.workers import PoolSaturated, RoutePool
+
+
+def test_backpressure():
+    release = threading.Event()
+    pool = RoutePool(ThreadPoolExecutor(1), 1, 2, timeout=None)
+
+    async def run():
+        blocked = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        with pytest.raises(PoolSaturated) as error:
+            await pool.run(lambda: None)
+        assert error.value.retry_after >= 1
+        release.set()
+        await asyncio.gather(*blocked)
+        assert await pool.run(sum, [1, 2]) == 3
+
+    asyncio.run(run())
+    assert pool.pending == 0 and pool.rejected == 1 and pool.completed == 3
+    pool.shutdown()
+
+
+def test_failures():
+    release = threading.Event()
+    pool = RoutePool(ThreadPoolExecutor(1), 1, 4, timeout=0.05)
+
+    def fail():
+        raise ValueError("no route")
+
+    async def run():
+        with pytest.raises(ValueError):
+            await pool.run(fail)
+        running = asyncio.ensure_future(pool.run(release.wait))
+        waiting = asyncio.ensure_future(pool.run(lambda: None))
+        for future in (running, waiting):
+            with pytest.raises(asyncio.TimeoutError):
+                await future
+        release.set()
+
+    asyncio.run(run())
+    pool.executor.shutdown(wait=True)
+    # The waiting computation was cancelled: only the running one is completed
+    assert pool.pending == 0 and pool.failed == 1 and pool.completed == 1
+    assert pool.mean_duration >= 0.05
+
+
+def test_timeout():
+    release = threading.Event()
+    pool = RoutePool(ThreadPoolExecutor(1), 1, 4, timeout=0.05)
+
+    async def run():
+        running = asyncio.ensure_future(pool.run(release.wait))
+        waiting = asyncio.ensure_future(pool.run(lambda: None))
+        with pytest.raises(asyncio.TimeoutError):
+            await running
+        with pytest.raises(asyncio.TimeoutError):
+            await waiting  # Cancelled before a worker started it
+        assert pool.pending == 1  # The running computation holds its place until it is finished
+        release.set()
+
+    asyncio.run(run())
+    pool.shutdown()
+    assert pool.timeouts == 2
+
+
+@pytest.fixture()
+def api(monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "token")
+    monkeypatch.setattr(main, "route_pool", None)
+    monkeypatch.setattr(main, "WORKERS", 1)
+    yield main, TestClient(main.app)
+    main.stop_route_pool()
+    main.route_cache.clear()
+
+
+def compute(main, start: str, arrival: str) -> dict:
+    """Response of /api/ask_from_inside computed in the test process."""
+    return json.loads(json.dumps(main.compute_route_from_inside(start, arrival)[0]))
+
+
+def test_worker_processes(api):
+    main, client = api
+    pairs = [("P1.2.301", "S.4.133"), ("S.5.227", "S.9.216")]
+    for start, arrival in pairs:
+        response = client.post("/api/ask_from_inside", json={"start": start, "arrival": arrival})
+        assert response.json() == compute(main, start, arrival)
+    before = response.json()
+    response = client.post("/api/ask", json={"start": [50.8125, 4.382], "arrival": "P1.2.301"})
+    assert response.status_code == 200
+    assert main.route_pool.completed == 3
+
+    # The live updates of the API process are applied by the workers
+    start, arrival = pairs[1]
+    path = main.search_route_from_inside(start, arrival)["S"]
+    update = {"graph": "S", "close_nodes": [path[len(path) // 2]]}
+    headers = {"X-Admin-Token": "token"}
+    assert client.post("/api/admin/update", json=update, headers=headers).status_code == 200
+    try:
+        response = client.post("/api/ask_from_inside", json={"start": start, "arrival": arrival})
+        assert response.json() == compute(main, start, arrival) != before
+        assert main.route_pool.completed == 4
+    finally:
+        update = {"graph": "S", "open_nodes": update["close_nodes"]}
+        client.post("/api/admin/update", json=update, headers=headers)
+
+    # A route without a path fails in the worker and the API answers 404
+    request = {"start": "S.4.133", "arrival": "S.9.206", "profile": "step_free"}
+    assert client.post("/api/ask_from_inside", json=request).status_code == 404
+    assert main.route_pool.completed == 4 and main.route_pool.failed == 1
+
+    # The batch endpoints are computed in the pool too
+    batch = {"requests": [{"start": "P1.2.301", "arrival": "S.9.216"}, request]}
+    results = client.post("/api/ask_batch", json=batch).json()["results"]
+    assert results[0] == compute(main, "P1.2.301", "S.9.216") and "error" in results[1]
+    matrix = {"sources": ["P1.2.301"], "targets": ["S.9.216", "P1.2.301"]}
+    assert client.post("/api/matrix", json=matrix).json()["distances"][0][1] == 0
+    assert main.route_pool.completed == 6 and main.route_pool.failed == 1
@@ -21,6 +21,8 @@ document.addEventListener("DOMContentLoaded", function () {
         submitInput("classroom");
     });
 
+    ["building", "classSrc", "classDst"].forEach(attachRoomAutocomplete);
+
 
     items.forEach(function (item) {
         item.addEventListener("mouseover", function () {
@@ -33,6 +35,48 @@ document.addEventListener("DOMContentLoaded", function () {
     });
 });
 
+// The code below is for the autocompletion of the room names
+const AUTOCOMPLETE_DELAY = 150; // Milliseconds without typing before the rooms are searched
+
+function attachRoomAutocomplete(inputId) {
+    const input = document.getElementById(inputId);
+    const datalist = document.createElement("datalist");
+    datalist.id = inputId + "Rooms";
+    input.setAttribute("list", datalist.id);
+    input.insertAdjacentElement("afterend", datalist);
+    let timer = null;
+    let lastRequest = 0; // Only the response of the last search is shown
+
+    input.addEventListener("input", function () {
+        clearTimeout(timer);
+        const request = ++lastRequest;
+        const query = input.value.trim();
+        if (query.length === 0) {
+            datalist.replaceChildren();
+            return;
+        }
+        timer = setTimeout(() => searchRooms(query, request), AUTOCOMPLETE_DELAY);
+    });
+
+    function searchRooms(query, request) {
+        fetch("http://127.0.0.1:8000/api/rooms/search?q=" + encodeURIComponent(query))
+        .then(response => response.json())
+        .then(data => {
+            if (request !== lastRequest) {
+                return; // A later search was started, this response is outdated
+            }
+            datalist.replaceChildren(...data.rooms.map(room => {
+                const option = document.createElement("option");
+                option.value = room.name;
+                return option;
+            }));
+        })
+        .catch(error => {
+            console.error('Error:', error);
+        });
+    }
+}
+
 // The code below is for the form toggling
 let currentFormId = null;
 